@@ -1,17 +1,23 @@
 import os
 import threading
+import argparse
 from flask import Flask, send_from_directory
 from flask_cors import CORS
-from sockets import start_server
 from config import Config
 from routes import register_blueprints
-from utils import logger, start_scheduler, stop_scheduler, init_default_data
+from middlewares import register_command_tracking, register_metrics
+from utils import logger, start_scheduler, stop_scheduler, init_default_data, ensure_indexes
+from services import close_clients
 from gevent import pywsgi
 import sys, signal
-from services import DetectionService
 
 ADMIN_DIST = os.path.join(os.path.dirname(__file__), "..", Config.ADMIN_PATH, "dist")
 
+# api: REST API (可用 gunicorn 等多 worker 執行)
+# realtime: Socket 伺服器與 YOLO 辨識
+# scheduler: 排程工作 (整個部署只需一個)
+ROLES = ('api', 'realtime', 'scheduler')
+
 app = Flask(__name__, static_folder=ADMIN_DIST, static_url_path="/")
 CORS(app)
 
@@ -22,53 +28,106 @@ def index():
 def signal_handler(sig, frame):
     logger.info("Server shutting down...")
     stop_scheduler()
+    close_clients()
     sys.exit(0)
 
-def create_app():
+def parse_roles(roles) -> set:
+    roles = set(roles)
+    unknown = roles - set(ROLES)
+    if unknown or not roles:
+        raise ValueError(f"Invalid roles: {', '.join(sorted(unknown)) or 'empty'} (options: {', '.join(ROLES)})")
+    
+    return roles
+
+def create_frame_archiver():
+    """建立辨識幀保存器 (ARCHIVE_ENABLED 未開啟時回傳 None)"""
+    if not Config.ARCHIVE_ENABLED:
+        return None
+    
+    from services import FrameArchiver, ArchivePolicy
+    
+    policy = ArchivePolicy(
+        confidence_band=(Config.ARCHIVE_CONFIDENCE_LOW, Config.ARCHIVE_CONFIDENCE_HIGH),
+        categories=Config.ARCHIVE_CATEGORIES,
+        sample_rate=Config.ARCHIVE_SAMPLE_RATE
+    )
+    
+    frame_archiver = FrameArchiver(
+        archive_dir=Config.ARCHIVE_PATH,
+        policy=policy,
+        queue_size=Config.ARCHIVE_QUEUE_SIZE,
+        max_total_bytes=Config.ARCHIVE_MAX_MB * 1024 * 1024
+    )
+    frame_archiver.start()
+    logger.info(f"Frame archiver started @{Config.ARCHIVE_PATH}")
+    
+    return frame_archiver
+
+def create_realtime_server():
+    """載入辨識模型，回傳啟動 Socket 伺服器的函式 (torch / ultralytics 只在此時載入)"""
+    from services import DetectionService, preload_models
+    from sockets import start_server
+    
+    # 在主程序 (python app.py 或 gunicorn --preload 的 master) fork 前載入模型，
+    # 子程序以 copy-on-write 繼承，DetectionService 直接取用已載入的模型
+    preload_models(DetectionService.model_path_for(Config.DETECTION_MODEL_VERSION))
+    
+    detection_service = DetectionService(
+        frame_archiver=create_frame_archiver(),
+        precision=Config.DETECTION_PRECISION,
+        calibration_dir=Config.PRECISION_CALIBRATION_PATH,
+        min_agreement=Config.PRECISION_MIN_AGREEMENT
+    )
+    
+    return lambda: start_server(Config.SOCKET_PORT, detection_service)
+
+def create_app(roles=None):
+    """依角色初始化，只有 api 角色註冊路由；realtime 角色回傳的 Socket 伺服器由呼叫端決定執行方式"""
+    roles = parse_roles(roles or Config.APP_ROLES)
+    realtime_server = None
+    
     try:
         # Load Config
         app.config.from_object(Config)
+        app.config["ROLES"] = roles
         
-        # Initial MongoDB connection store in app.config
-        mongodb = Config.init_db()
-        app.config["MongoDB"] = mongodb
-        
-        # Log successful MongoDB connection
-        logger.info(f"success: connect to mongoDB @{Config.MONGO_HOST}")
-        
-        # Blueprint
-        with app.app_context():
+        if 'api' in roles or 'scheduler' in roles:
+            # Initial MongoDB connection store in app.config
+            mongodb = Config.init_db()
+            app.config["MongoDB"] = mongodb
+            
+            # Log successful MongoDB connection
+            logger.info(f"success: connect to mongoDB @{Config.MONGO_HOST}")
+            
+            # 依 utils/db_indexes.py 建立缺少的索引 (已存在時不會重建)
+            ensure_indexes(mongodb)
+            
             init_default_data(mongodb)
-            register_blueprints(app)
-        
-        # Log server startup
-        logger.info(f"listening on *:{Config.PORT}")
         
-        # initalize detection service
-        detection_service = DetectionService()
-        thread = threading.Thread(target=lambda: start_server(Config.SOCKET_PORT, detection_service), daemon=True)
-        thread.start()
+        if 'api' in roles:
+            # Blueprint
+            with app.app_context():
+                register_blueprints(app)
+                register_command_tracking(app)
+                register_metrics(app)
+            
+            # Log server startup
+            logger.info(f"listening on *:{Config.PORT}")
         
-        logger.info(f"Socket server listening on *:{Config.SOCKET_PORT}")
+        if 'realtime' in roles:
+            realtime_server = create_realtime_server()
         
-        start_scheduler()
-        logger.info("Daily trash statistics scheduler started")
+        if 'scheduler' in roles:
+            start_scheduler()
+            logger.info("Daily trash statistics scheduler started")
         
-        return app
+        logger.info(f"Roles: {', '.join(sorted(roles))}")
+        return app, realtime_server
     except Exception as e:
         logger.error(f"Failed to start server: {str(e)}")
         raise e
 
-try:
-    app = create_app()
-    
-except Exception as e:
-    print(f"Error during app initialization: {e}")
-
-if __name__ == "__main__":
-    signal.signal(signal.SIGTERM, signal_handler)
-    signal.signal(signal.SIGINT, signal_handler)
-    
+def run_api():
     # 根據環境變數決定使用哪種伺服器
     if Config.ENV == 'development':
         app.run(
@@ -84,4 +143,39 @@ if __name__ == "__main__":
             server.serve_forever()
         except KeyboardInterrupt:
             logger.info("Server shutting down...")
-            sys.exit(0)
\ No newline at end of file
+            sys.exit(0)
+
+if __name__ != "__main__":
+    # 以 WSGI 伺服器載入 (例如 gunicorn app:app) 時依 APP_ROLES 初始化，
+    # 多 worker 部署時應設定 APP_ROLES=api，避免每個 worker 都載入模型與排程
+    try:
+        app, realtime_server = create_app()
+        if realtime_server:
+            threading.Thread(target=realtime_server, daemon=True).start()
+            logger.info(f"Socket server listening on *:{Config.SOCKET_PORT}")
+    except Exception as e:
+        print(f"Error during app initialization: {e}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trash-Detect backend")
+    parser.add_argument('--roles', default=",".join(Config.APP_ROLES), help=f"逗號分隔: {', '.join(ROLES)}")
+    args = parser.parse_args()
+    
+    signal.signal(signal.SIGTERM, signal_handler)
+    signal.signal(signal.SIGINT, signal_handler)
+    
+    roles = [role.strip() for role in args.roles.split(",") if role.strip()]
+    app, realtime_server = create_app(roles)
+    
+    if 'api' in roles:
+        if realtime_server:
+            threading.Thread(target=realtime_server, daemon=True).start()
+            logger.info(f"Socket server listening on *:{Config.SOCKET_PORT}")
+        
+        run_api()
+    elif realtime_server:
+        logger.info(f"Socket server listening on *:{Config.SOCKET_PORT}")
+        realtime_server()
+    else:
+        # 只有 scheduler：排程在背景執行緒，主執行緒等待結束訊號
+        threading.Event().wait()
@@ -0,0 +1,88 @@
+"""Socket 辨識結果的傳輸大小基準測試 (json / msgpack)
+
+以 python-socketio 的封包編碼計算每則 detection_result 實際送出的 bytes
+(json 為文字封包；msgpack 為 binary event 的文字標頭加上 binary attachment)，
+並以 unpack_result 確認 msgpack 結果還原後與 json 格式一致 (置信度取到小數第二位)，
+不一致時以非 0 結束
+
+使用方式:
+    python bench_serializer.py
+    python bench_serializer.py --detections 0,1,5,20 --iterations 20000
+"""
+import argparse
+import random
+import sys
+import time
+
+import utils # utils 需先於 services 載入
+from socketio import packet
+from models import DetectionResult, DetectionResponse
+from sockets.serializer import DetectionSerializer, JSON_FORMAT, MSGPACK_FORMAT
+
+CATEGORIES = ['plastic', 'paper', 'can', 'container', 'plasticbottle']
+IMAGE_SIZE = {'width': 1280, 'height': 720}
+
+def make_response(count: int, tracking: bool, rng: random.Random) -> DetectionResponse:
+    detections = []
+    for index in range(count):
+        x1, y1 = rng.randint(0, 1000), rng.randint(0, 500)
+        detections.append(DetectionResult(
+            category=rng.choice(CATEGORIES),
+            confidence=round(rng.uniform(0.85, 1.0), 2),
+            bbox=[x1, y1, x1 + rng.randint(20, 280), y1 + rng.randint(20, 220)],
+            track_id=index + 1 if tracking else None
+        ))
+
+    return DetectionResponse(detections, IMAGE_SIZE, inferred=True if tracking else None, config_version=3)
+
+def encode_packet(payload):
+    return packet.Packet(packet.EVENT, data=['detection_result', payload], namespace='/').encode()
+
+def wire_bytes(payload) -> int:
+    """detection_result 事件在 Socket.IO 上送出的 bytes"""
+    encoded = encode_packet(payload)
+    if isinstance(encoded, list):
+        return sum(len(part.encode('utf-8') if isinstance(part, str) else part) for part in encoded)
+    return len(encoded.encode('utf-8'))
+
+def encode_us(serializer: DetectionSerializer, response: DetectionResponse, fmt: str, iterations: int) -> float:
+    """每則訊息的編碼時間 (encode_result 與 Socket.IO 封包編碼，json 的 dumps 在封包編碼中執行)"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        encode_packet(serializer.encode_result(response, 1700000000000, fmt))
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure bytes per detection_result message for json and msgpack")
+    parser.add_argument('--detections', default='0,1,3,5,10,20', help="每幀的辨識數量 (逗號分隔)")
+    parser.add_argument('--iterations', type=int, default=5000, help="量測編碼時間的次數")
+    args = parser.parse_args()
+
+    serializer = DetectionSerializer(CATEGORIES)
+    rng = random.Random(0)
+    errors = []
+
+    print(f"{'detections':>10s} {'tracking':>8s} {'json B':>8s} {'msgpack B':>9s} {'saved':>7s} {'json us':>8s} {'msgpack us':>10s}")
+    for count in [int(value) for value in args.detections.split(',')]:
+        for tracking in (False, True):
+            response = make_response(count, tracking, rng)
+            json_payload = serializer.encode_result(response, 1700000000000, JSON_FORMAT)
+            msgpack_payload = serializer.encode_result(response, 1700000000000, MSGPACK_FORMAT)
+
+            if serializer.unpack_result(msgpack_payload) != json_payload:
+                errors.append(f"{count} detections (tracking={tracking}): unpacked msgpack differs from json")
+
+            json_size, msgpack_size = wire_bytes(json_payload), wire_bytes(msgpack_payload)
+            print(
+                f"{count:>10d} {str(tracking):>8s} {json_size:>8d} {msgpack_size:>9d} {1 - msgpack_size / json_size:>7.1%} "
+                f"{encode_us(serializer, response, JSON_FORMAT, args.iterations):>8.1f} "
+                f"{encode_us(serializer, response, MSGPACK_FORMAT, args.iterations):>10.1f}"
+            )
+
+    if errors:
+        for error in errors:
+            print(f"FAIL: {error}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
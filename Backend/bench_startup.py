@@ -0,0 +1,109 @@
+"""模型載入的啟動時間 / 記憶體基準測試
+
+比較多個推論 worker 的啟動時間與記憶體用量:
+    pt:   每個 worker 各自讀取原始 .pt (fp16 -> fp32 轉換與 Conv+BN 融合都在私有記憶體)
+    mmap: 每個 worker 以唯讀 mmap 載入快取權重，共用同一份 page cache
+    fork: 主程序先載入模型，worker 以 fork 繼承 (copy-on-write)
+
+RSS 會重複計算共用的頁面，實際佔用的實體記憶體以 PSS 總和為準 (Linux)
+
+使用方式:
+    python bench_startup.py
+    python bench_startup.py --workers 1,4,8 --modes pt,mmap,fork
+"""
+import argparse
+import multiprocessing as mp
+import time
+from pathlib import Path
+import numpy as np
+import psutil
+
+MODEL_PATH = Path(__file__).resolve().parent / "detect_models" / "yolov11l.pt"
+MB = 1024 * 1024
+
+def warmup(model):
+    """執行一次推論，讓權重頁面實際載入記憶體"""
+    model.predict(source=np.zeros((640, 640, 3), dtype=np.uint8), verbose=False, imgsz=896)
+
+def worker(mode: str, started_at: float, results, release):
+    if mode == 'pt':
+        from ultralytics import YOLO
+        model = YOLO(MODEL_PATH)
+    else:
+        from utils import logger # utils 需先於 services 載入
+        from services import load_shared_model
+        model = load_shared_model(MODEL_PATH)
+
+    warmup(model)
+    results.put(time.time() - started_at)
+    release.wait()
+
+def memory_of(processes) -> dict:
+    totals = {'rss': 0, 'pss': 0, 'uss': 0}
+    for process in processes:
+        info = psutil.Process(process.pid).memory_full_info()
+        totals['rss'] += info.rss
+        totals['pss'] += getattr(info, 'pss', info.uss)
+        totals['uss'] += info.uss
+    return {key: value / MB for key, value in totals.items()}
+
+def run(mode: str, workers: int) -> dict:
+    context = mp.get_context('fork' if mode == 'fork' else 'spawn')
+    results = context.Queue()
+    release = context.Event()
+
+    parent_memory = {'rss': 0.0, 'pss': 0.0, 'uss': 0.0}
+    preload_seconds = 0.0
+    if mode == 'fork':
+        from utils import logger # utils 需先於 services 載入
+        from services import load_shared_model
+        start = time.time()
+        warmup(load_shared_model(MODEL_PATH))
+        preload_seconds = time.time() - start
+        parent_memory = memory_of([psutil.Process()])
+
+    started_at = time.time()
+    processes = [context.Process(target=worker, args=(mode, started_at, results, release)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+
+    startup = [results.get() for _ in processes]
+    total_seconds = time.time() - started_at
+
+    memory = memory_of(processes)
+    release.set()
+    for process in processes:
+        process.join()
+
+    return {
+        'mode': mode,
+        'workers': workers,
+        'preload_s': preload_seconds,
+        'startup_mean_s': float(np.mean(startup)),
+        'startup_max_s': float(np.max(startup)),
+        'all_ready_s': total_seconds,
+        'rss_mb': memory['rss'] + parent_memory['rss'],
+        'pss_mb': memory['pss'] + parent_memory['pss'],
+        'uss_mb': memory['uss'] + parent_memory['uss']
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark detection worker startup time and memory")
+    parser.add_argument('--workers', default='1,4,8')
+    parser.add_argument('--modes', default='pt,mmap,fork')
+    args = parser.parse_args()
+
+    columns = ['mode', 'workers', 'preload_s', 'startup_mean_s', 'startup_max_s', 'all_ready_s', 'rss_mb', 'pss_mb', 'uss_mb']
+    print('| ' + ' | '.join(columns) + ' |')
+    print('|' + '---|' * len(columns))
+
+    for mode in args.modes.split(','):
+        for workers in (int(value) for value in args.workers.split(',')):
+            result = run(mode, workers)
+            print('| ' + ' | '.join(
+                f"{result[column]:.2f}" if isinstance(result[column], float) else str(result[column])
+                for column in columns
+            ) + ' |', flush=True)
+
+if __name__ == "__main__":
+    main()
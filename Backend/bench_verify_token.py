@@ -0,0 +1,59 @@
+"""verify_token 的基準測試 (已驗證 JWT 快取)
+
+比較每秒可驗證的 token 數量:
+    decode: 每次都以 jwt.decode 計算 HS256 簽章 (use_cache=False)
+    cached: 經由 VerifiedTokenCache，同一個 token 只在第一次解碼
+
+--tokens 為輪流驗證的不同 token 數量 (模擬同時在線的使用者)，超過 JWT_CACHE_SIZE 時快取會不斷淘汰
+
+使用方式:
+    python bench_verify_token.py
+    python bench_verify_token.py --tokens 1,100,10000 --seconds 2
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault('SECRET_KEY', 'bench-verify-token-secret-key-0123456789')
+
+from utils.token import generate_token, verify_token, token_cache
+
+def run(tokens: list, use_cache: bool, seconds: float) -> tuple:
+    """回傳 (每秒驗證數, 快取命中率)"""
+    token_cache.clear()
+    before = token_cache.get_stats()
+    count = 0
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+
+    while time.perf_counter() < deadline:
+        for token in tokens:
+            if verify_token(token, use_cache=use_cache) is None:
+                raise RuntimeError("token verification failed")
+        count += len(tokens)
+
+    rate = count / (time.perf_counter() - start)
+    after = token_cache.get_stats()
+    hits = after['hits'] - before['hits']
+    lookups = hits + after['misses'] - before['misses']
+
+    return rate, hits / lookups if lookups else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark verify_token with and without the verified-token cache")
+    parser.add_argument('--tokens', default='1,100,1000', help="不同 token 數量 (逗號分隔)")
+    parser.add_argument('--seconds', type=float, default=1.0, help="每種情境的執行時間")
+    args = parser.parse_args()
+
+    print(f"cache size: {token_cache.max_size}")
+    print(f"{'tokens':>8s} {'decode/s':>12s} {'cached/s':>12s} {'speedup':>8s} {'hit_rate':>8s}")
+    for size in [int(value) for value in args.tokens.split(',')]:
+        tokens = [generate_token(f"{index:024x}", 'user') for index in range(size)]
+
+        decode_rate, _ = run(tokens, use_cache=False, seconds=args.seconds)
+        cached_rate, hit_rate = run(tokens, use_cache=True, seconds=args.seconds)
+
+        print(f"{size:>8d} {decode_rate:>12,.0f} {cached_rate:>12,.0f} {cached_rate / decode_rate:>7.1f}x {hit_rate:>8.2%}")
+
+if __name__ == "__main__":
+    main()
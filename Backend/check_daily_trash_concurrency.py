@@ -0,0 +1,120 @@
+"""每日垃圾統計的並行累加檢查
+
+多個執行緒同時對同幾天的 daily_trash 累加 (_update_daily_trash 與 bulk_update_daily_trash 混合，
+包含尚未建立紀錄的日期)，結束後比對:
+    - 每天各類別的數量與送出的累加總和相同 (沒有遺失的更新)
+    - total 等於各類別的總和
+    - 每天只有一筆紀錄 (同時 upsert 不會建立重複紀錄)
+有任何不符時以非 0 結束
+
+並行檢查需以 --mongo-uri 連線本機 mongod 的暫時資料庫 (結束時刪除)。
+未指定時使用 mongomock 作為 smoke test: mongomock 不是 thread-safe，
+各 worker 改為在主執行緒依序執行，只檢查累加與 upsert 的邏輯，不檢查並行。
+
+使用方式:
+    python check_daily_trash_concurrency.py
+    python check_daily_trash_concurrency.py --mongo-uri mongodb://localhost:27017 --threads 16
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+from collections import defaultdict
+from unittest import mock
+
+CHECK_DB_NAME = 'daily_trash_concurrency_check'
+TRASH_TYPES = ('plastic', 'paper', 'cans', 'bottles', 'containers')
+
+def worker(service, index: int, dates: list, iterations: int, expected: dict, lock: threading.Lock, barrier: threading.Barrier):
+    rng = random.Random(index)
+    sent = defaultdict(int)
+
+    barrier.wait()
+    for _ in range(iterations):
+        if rng.random() < 0.5:
+            date, trash_type, count = rng.choice(dates), rng.choice(TRASH_TYPES), rng.randint(1, 5)
+            service._update_daily_trash(trash_type, count, date)
+            sent[(date, trash_type)] += count
+        else:
+            increments = [(rng.choice(dates), rng.choice(TRASH_TYPES), rng.randint(1, 5)) for _ in range(rng.randint(1, 6))]
+            service.bulk_update_daily_trash(increments)
+            for date, trash_type, count in increments:
+                sent[(date, trash_type)] += count
+
+    with lock:
+        for key, count in sent.items():
+            expected[key] += count
+
+def main():
+    parser = argparse.ArgumentParser(description="Check concurrent daily_trash increments for lost updates")
+    parser.add_argument('--mongo-uri', help="本機 mongod (預設使用 mongomock)")
+    parser.add_argument('--threads', type=int, default=8, help="worker 數量 (mongomock 時依序執行)")
+    parser.add_argument('--iterations', type=int, default=200, help="每個執行緒的累加次數")
+    parser.add_argument('--days', type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ['DB_NAME'] = CHECK_DB_NAME
+    if not args.mongo_uri:
+        import mongomock
+        mock.patch('pymongo.MongoClient', mongomock.MongoClient).start()
+
+    import utils # utils 需先於 services 載入
+    from utils import ensure_indexes
+    from services import DailyTrashService
+
+    service = DailyTrashService(args.mongo_uri or 'mongodb://localhost:27017')
+    db = service.db
+    db.daily_trash.drop()
+    ensure_indexes(db)
+
+    dates = [f"2099-01-{day:02d}" for day in range(1, args.days + 1)]
+    expected = defaultdict(int)
+    lock = threading.Lock()
+    concurrent = bool(args.mongo_uri)
+    if not concurrent:
+        print(f"smoke test (mongomock): {args.threads} workers run sequentially, concurrency is not checked (use --mongo-uri)")
+
+    try:
+        if concurrent:
+            barrier = threading.Barrier(args.threads)
+            threads = [
+                threading.Thread(target=worker, args=(service, index, dates, args.iterations, expected, lock, barrier))
+                for index in range(args.threads)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        else:
+            for index in range(args.threads):
+                worker(service, index, dates, args.iterations, expected, lock, threading.Barrier(1))
+
+        errors = []
+        for date in dates:
+            docs = list(db.daily_trash.find({"date": date}))
+            if len(docs) != 1:
+                errors.append(f"{date}: {len(docs)} documents")
+                continue
+
+            doc = docs[0]
+            for trash_type in TRASH_TYPES:
+                if doc.get(trash_type, 0) != expected[(date, trash_type)]:
+                    errors.append(f"{date} {trash_type}: {doc.get(trash_type, 0)} != {expected[(date, trash_type)]}")
+
+            if doc.get('total', 0) != sum(doc.get(trash_type, 0) for trash_type in TRASH_TYPES):
+                errors.append(f"{date} total: {doc.get('total', 0)} != sum of categories")
+
+            print(f"{date} total={doc.get('total', 0)} " + " ".join(f"{trash_type}={doc.get(trash_type, 0)}" for trash_type in TRASH_TYPES))
+    finally:
+        db.client.drop_database(CHECK_DB_NAME)
+
+    if errors:
+        for error in errors:
+            print(f"FAIL: {error}")
+        sys.exit(1)
+
+    print("OK" if concurrent else "OK (smoke test)")
+
+if __name__ == "__main__":
+    main()
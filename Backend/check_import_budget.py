@@ -0,0 +1,90 @@
+"""REST API 程序的 import 時間 / 記憶體檢查
+
+以 python -X importtime 在新的程序中 import REST API 用到的模組 (routes / controllers / middlewares)，
+超過時間或記憶體預算，或載入了辨識相關套件 (torch / ultralytics / cv2 / GPUtil) 時以非 0 結束，
+可加在部署前或 CI 的檢查步驟
+
+使用方式:
+    python check_import_budget.py
+    python check_import_budget.py --max-ms 1500 --max-rss-mb 120
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+REST_MODULES = ['utils', 'routes', 'controllers', 'middlewares'] # utils 需先於 services 載入
+FORBIDDEN_MODULES = ['torch', 'ultralytics', 'cv2', 'GPUtil']
+
+PROBE = (
+    f"import {', '.join(REST_MODULES)}\n"
+    "import resource\n"
+    "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n"
+)
+
+def measure() -> dict:
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Import failed:\n{result.stderr[-2000:]}")
+
+    total_us = 0
+    modules, top_level = set(), {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        total_us += int(self_us)
+        modules.add(name.strip())
+
+        # 巢狀 import 以縮排表示 (每層 2 個空白)，只列出前幾層
+        if len(name) - len(name.lstrip()) <= 5:
+            top_level[name.strip()] = int(cumulative_us)
+
+    return {
+        'import_ms': total_us / 1000,
+        'rss_mb': int(result.stdout.strip().splitlines()[-1]) / 1024, # ru_maxrss 在 Linux 為 KB
+        'modules': modules,
+        'top_level': top_level
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Check REST API import time and memory budget")
+    parser.add_argument('--max-ms', type=float, default=float(os.getenv('IMPORT_BUDGET_MS', '1500')))
+    parser.add_argument('--max-rss-mb', type=float, default=float(os.getenv('IMPORT_BUDGET_RSS_MB', '120')))
+    parser.add_argument('--top', type=int, default=10, help="列出最慢的模組數量")
+    args = parser.parse_args()
+
+    result = measure()
+    failures = []
+
+    loaded = [name for name in FORBIDDEN_MODULES if name in result['modules']]
+    if loaded:
+        failures.append(f"detection stack imported: {', '.join(loaded)}")
+
+    if result['import_ms'] > args.max_ms:
+        failures.append(f"import time {result['import_ms']:.0f}ms > {args.max_ms:.0f}ms")
+
+    if result['rss_mb'] > args.max_rss_mb:
+        failures.append(f"rss {result['rss_mb']:.1f}MB > {args.max_rss_mb:.0f}MB")
+
+    print(f"import time: {result['import_ms']:.0f}ms (budget {args.max_ms:.0f}ms)")
+    print(f"max rss: {result['rss_mb']:.1f}MB (budget {args.max_rss_mb:.0f}MB)")
+    print("slowest imports:")
+    for name, us in sorted(result['top_level'].items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {us / 1000:8.1f}ms  {name}")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""MongoDB 索引檢查
+
+1. 比對 utils/db_indexes.py 的 INDEXES 與資料庫現有索引，列出缺少 / 選項不同 / 多餘的索引
+2. 對 QUERY_SHAPES 中每個查詢執行 explain，winning plan 出現 COLLSCAN (全表掃描) 即視為未被索引涵蓋
+
+預設在暫時的資料庫 ({DB_NAME}_index_check) 建立索引與一筆空文件後檢查，結束時刪除，不影響正式資料；
+--live 則直接檢查 Config.DB_NAME (只讀取，除非加上 --apply)
+
+使用方式:
+    python check_indexes.py
+    python check_indexes.py --live
+    python check_indexes.py --live --apply [--drop-extra]
+"""
+import argparse
+import sys
+import utils # utils 需先於 services 載入
+from config import Config
+from services.db_service import get_client
+from utils import INDEXES, QUERY_SHAPES, ensure_indexes
+
+def _plan_stages(plan) -> list:
+    """遞迴取出 explain 結果中的所有 stage (相容 classic 與 SBE 的 explain 格式)"""
+    stages = []
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            stages.append(plan['stage'])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(_plan_stages(value))
+
+    return stages
+
+def explain_queries(db) -> list:
+    results = []
+    for collection_name, query, sort in QUERY_SHAPES:
+        cursor = db[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+
+        stages = _plan_stages(cursor.explain()['queryPlanner']['winningPlan'])
+        results.append({
+            'query': f"{collection_name}.find({query}){f'.sort({sort})' if sort else ''}",
+            'stages': stages,
+            'covered': 'COLLSCAN' not in stages
+        })
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Check MongoDB indexes against the manifest")
+    parser.add_argument('--live', action='store_true', help="檢查正式資料庫 (預設使用暫時資料庫)")
+    parser.add_argument('--apply', action='store_true', help="建立缺少的索引 (--live 時使用)")
+    parser.add_argument('--drop-extra', action='store_true', help="刪除不在清單中的索引 (需搭配 --apply)")
+    args = parser.parse_args()
+
+    client = get_client(Config.MONGO_URI)
+    db_name = Config.DB_NAME if args.live else f"{Config.DB_NAME}_index_check"
+    db = client[db_name]
+
+    try:
+        if not args.live:
+            client.drop_database(db_name)
+            # 空集合的 explain 只會回傳 EOF，先放一筆空文件讓 planner 實際選擇索引
+            for collection_name in INDEXES:
+                db[collection_name].insert_one({})
+
+        report = ensure_indexes(db, drop_extra=args.drop_extra, apply=args.apply or not args.live)
+        results = explain_queries(db)
+    finally:
+        if not args.live:
+            client.drop_database(db_name)
+        client.close()
+
+    print(f"database: {db_name}")
+    for key in ('created', 'missing', 'conflicts', 'failed', 'extra', 'dropped'):
+        for label in report[key]:
+            print(f"  {key:9s} {label}")
+
+    print("queries:")
+    for result in results:
+        print(f"  {'OK  ' if result['covered'] else 'SCAN'} {result['query']}  [{' > '.join(result['stages'])}]")
+
+    failures = [result['query'] for result in results if not result['covered']]
+    failures += report['missing'] + report['conflicts'] + report['failed']
+    if failures:
+        print(f"FAIL: {len(failures)} problem(s)")
+        sys.exit(1)
+
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""密碼雜湊的並行檢查 (gevent)
+
+在同一個 gevent hub 中同時執行多個 hash_password，並以另一個 greenlet 每 10ms 模擬一般請求，
+記錄一般請求最長被卡住的時間:
+    inline: 直接在 greenlet 呼叫 bcrypt (整個 hub 停住，其他請求要等雜湊算完)
+    pool:   經由 utils.password 的執行緒計算 (其他請求持續進行)
+
+pool 模式下一般請求的最長等待超過 --max-stall-ms 時以非 0 結束
+
+使用方式:
+    python check_password_concurrency.py
+    python check_password_concurrency.py --hashes 8 --rounds 12
+"""
+import argparse
+import sys
+import time
+import bcrypt
+import gevent
+from utils.password import hash_password, check_password
+
+TICK_SECONDS = 0.01
+
+def _inline_hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+def run(mode: str, hashes: int, rounds: int) -> dict:
+    ticks = []
+    running = True
+
+    def ticker():
+        while running:
+            ticks.append(time.perf_counter())
+            gevent.sleep(TICK_SECONDS)
+
+    def worker(index: int):
+        password = f"password-{index}"
+        if mode == 'inline':
+            hashed = _inline_hash(password, rounds)
+            assert bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+        else:
+            hashed = hash_password(password, rounds)
+            assert check_password(password, hashed)
+
+    tick = gevent.spawn(ticker)
+    gevent.sleep(TICK_SECONDS * 3)
+
+    start = time.perf_counter()
+    gevent.joinall([gevent.spawn(worker, index) for index in range(hashes)], raise_error=True)
+    elapsed = time.perf_counter() - start
+
+    gevent.sleep(TICK_SECONDS * 3)
+    running = False
+    tick.join()
+
+    gaps = [later - earlier for earlier, later in zip(ticks, ticks[1:])]
+    return {
+        'elapsed_ms': elapsed * 1000,
+        'ticks': len(ticks),
+        'max_stall_ms': max(gaps) * 1000 if gaps else 0.0
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that password hashing does not block other greenlets")
+    parser.add_argument('--hashes', type=int, default=4, help="同時計算的雜湊數量")
+    parser.add_argument('--rounds', type=int, default=12, help="bcrypt cost")
+    parser.add_argument('--max-stall-ms', type=float, default=100, help="pool 模式允許的最長等待")
+    args = parser.parse_args()
+
+    print(f"{'mode':8s} {'elapsed_ms':>10s} {'ticks':>6s} {'max_stall_ms':>12s}")
+    results = {}
+    for mode in ('inline', 'pool'):
+        results[mode] = run(mode, args.hashes, args.rounds)
+        result = results[mode]
+        print(f"{mode:8s} {result['elapsed_ms']:>10.0f} {result['ticks']:>6d} {result['max_stall_ms']:>12.1f}")
+
+    if results['pool']['max_stall_ms'] > args.max_stall_ms:
+        print(f"FAIL: pool stalled other greenlets for {results['pool']['max_stall_ms']:.1f}ms (> {args.max_stall_ms}ms)")
+        sys.exit(1)
+
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""REST API 的 MongoDB round trip 預算檢查
+
+依 round_trip_budget.json 的情境依序呼叫各路由 (Flask test client)，統計每個請求發出的 MongoDB 指令次數，
+與清單中的 budget 比對:
+    - 超過 budget: 退步，以非 0 結束
+    - 低於 budget: 已改善，需以 --update 更新清單將改善鎖定 (同樣以非 0 結束)
+    - 狀態碼與 expect 不同，或有路由未列在 cases / skip 中，也會以非 0 結束
+
+預設使用 mongomock (不需資料庫，以 collection 方法呼叫次數計算，需 pip install mongomock)，
+--mongo-uri 則連線本機 mongod 的暫時資料庫 (以 CommandListener 計算，結束時刪除)。
+寄信與 Cloudinary 上傳在檢查中以假資料取代，不會對外連線。
+
+使用方式:
+    python check_round_trips.py
+    python check_round_trips.py --mongo-uri mongodb://localhost:27017
+    python check_round_trips.py --update
+"""
+import argparse
+import contextvars
+import io
+import json
+import os
+import sys
+from unittest import mock
+
+MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'round_trip_budget.json')
+CHECK_DB_NAME = 'round_trip_check'
+
+# 檢查只需要以下設定，其餘沿用 .env
+CHECK_ENV = {
+    'FLASK_PORT': '8000',
+    'SECRET_KEY': 'round-trip-check-secret-key-0123456789',
+    'DB_NAME': CHECK_DB_NAME,
+    'RATE_LIMIT_BACKEND': 'memory',
+    'RATE_LIMIT_USER_CAPACITY': '1000000',
+    'RATE_LIMIT_IP_CAPACITY': '1000000',
+    'RATE_LIMIT_AUTH_CAPACITY': '1000000',
+    'DEFAULT_ADMIN_USER': 'admin',
+    'DEFAULT_ADMIN_EMAIL': 'admin@example.com',
+    'DEFAULT_ADMIN_PASSWORD': 'admin-password',
+    'MONGO_SLOW_COMMAND_MS': '0',
+    'BCRYPT_ROUNDS': '4', # 只檢查 round trip，不需要正式的雜湊 cost
+    'PRINCIPAL_CACHE_TTL': '3600' # 不讓快取在檢查途中過期，結果才會固定
+}
+
+VERIFICATION_CODE = '123456'
+PNG_BYTES = (
+    b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89'
+    b'\x00\x00\x00\rIDATx\x9cc\xf8\x0f\x00\x00\x01\x01\x00\x05\x18\xd8N\x00\x00\x00\x00IEND\xaeB`\x82'
+)
+
+# mongomock 的 collection 方法 (每次呼叫視為一次 round trip)
+MONGOMOCK_METHODS = [
+    'find', 'find_one', 'insert_one', 'insert_many', 'replace_one', 'update_one', 'update_many',
+    'delete_one', 'delete_many', 'find_one_and_update', 'find_one_and_replace', 'find_one_and_delete',
+    'count_documents', 'estimated_document_count', 'aggregate', 'distinct', 'bulk_write',
+    'create_index', 'create_indexes', 'index_information', 'drop_index', 'drop'
+]
+
+_in_call = contextvars.ContextVar('round_trip_in_call', default=False)
+
+def _count_mongomock_calls(current_command_scope):
+    """mongomock 不會發出 command 事件，改為統計最外層的 collection 方法呼叫 (內部互相呼叫不重複計算)"""
+    from mongomock.collection import Collection
+
+    def wrap(method):
+        def counted(self, *args, **kwargs):
+            if _in_call.get():
+                return method(self, *args, **kwargs)
+
+            scope = current_command_scope()
+            if scope is not None:
+                scope.commands += 1
+                scope.collections[self.name] += 1
+
+            token = _in_call.set(True)
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                _in_call.reset(token)
+
+        return counted
+
+    return [mock.patch.object(Collection, name, wrap(getattr(Collection, name))) for name in MONGOMOCK_METHODS]
+
+def _external_patches() -> list:
+    upload = lambda image_file, **options: {
+        'public_id': f"{options.get('folder') or 'check'}/{options.get('public_id') or 'image'}",
+        'secure_url': 'https://example.com/image.png'
+    }
+
+    return [
+        mock.patch('cloudinary.uploader.upload', upload),
+        mock.patch('cloudinary.uploader.destroy', lambda public_id, **options: {'result': 'ok'}),
+        mock.patch('services.email_service.EmailService.send_verification_email', lambda self, to_email: VERIFICATION_CODE),
+        mock.patch('services.email_service.EmailService.send_password_reset_email', lambda self, to_email: VERIFICATION_CODE)
+    ]
+
+class _Variables(dict):
+    """前面的請求失敗而缺少的變數保留原字串，讓後續請求以狀態碼錯誤回報"""
+    def __missing__(self, key):
+        return f"{{{key}}}"
+
+def _fill(value, variables: dict):
+    """以 variables 取代字串中的 {name}"""
+    if isinstance(value, str):
+        return value.format_map(variables)
+    if isinstance(value, dict):
+        return {key: _fill(item, variables) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_fill(item, variables) for item in value]
+
+    return value
+
+def _dig(data, path: str):
+    try:
+        for key in path.split('.'):
+            data = data[int(key)] if isinstance(data, list) else data[key]
+    except (KeyError, IndexError, ValueError, TypeError):
+        return None
+
+    return data
+
+def run_case(client, case: dict, variables: dict, command_scope) -> dict:
+    method = case['method']
+    path = _fill(case['path'], variables)
+    headers = {}
+    if case.get('auth'):
+        headers['Authorization'] = f"Bearer {variables[f'{case['auth']}_token']}"
+
+    kwargs = {'headers': headers, 'query_string': _fill(case.get('query'), variables)}
+    if 'json' in case:
+        kwargs['json'] = _fill(case['json'], variables)
+    elif 'form' in case or 'files' in case:
+        data = _fill(case.get('form', {}), variables)
+        for field, filename in case.get('files', {}).items():
+            data[field] = (io.BytesIO(PNG_BYTES), filename)
+        kwargs['data'] = data
+        kwargs['content_type'] = 'multipart/form-data'
+
+    with command_scope(case['name']) as scope:
+        response = client.open(path, method=method, **kwargs)
+
+    body = response.get_json(silent=True) or {}
+    for name, body_path in case.get('capture', {}).items():
+        value = _dig(body, body_path)
+        if value is not None:
+            variables[name] = str(value)
+
+    return {
+        'name': case['name'],
+        'status': response.status_code,
+        'message': body.get('message'),
+        'commands': scope.commands,
+        'collections': dict(scope.collections)
+    }
+
+def covered_rules(app, manifest: dict) -> tuple:
+    """列出沒有被 cases 或 skip 涵蓋的路由 (METHOD rule)"""
+    adapter = app.url_map.bind('localhost')
+    covered = set(manifest.get('skip', {}))
+    for case in manifest['cases']:
+        path = case['path'].split('?')[0]
+        rule, _ = adapter.match(path.replace('{', '').replace('}', ''), method=case['method'], return_rule=True)
+        covered.add(f"{case['method']} {rule.rule}")
+
+    rules = {
+        f"{method} {rule.rule}"
+        for rule in app.url_map.iter_rules() if rule.endpoint != 'static'
+        for method in rule.methods - {'HEAD', 'OPTIONS'}
+    }
+
+    return sorted(rules - covered), sorted(covered - rules)
+
+def main():
+    parser = argparse.ArgumentParser(description="Check MongoDB round trips per REST route against a budget")
+    parser.add_argument('--mongo-uri', help="本機 mongod (預設使用 mongomock)")
+    parser.add_argument('--update', action='store_true', help="以本次結果更新 round_trip_budget.json")
+    parser.add_argument('--manifest', default=MANIFEST_PATH)
+    args = parser.parse_args()
+
+    os.environ.update(CHECK_ENV)
+    patches = []
+    if not args.mongo_uri:
+        import mongomock
+        patches.append(mock.patch('pymongo.MongoClient', mongomock.MongoClient))
+
+    for patch in patches:
+        patch.start()
+
+    import utils # utils 需先於 services 載入
+    from config import Config
+    Config.MONGO_URI = args.mongo_uri or 'mongodb://localhost:27017'
+    Config.DB_NAME = CHECK_DB_NAME
+
+    from flask import Flask
+    from routes import register_blueprints
+    from services import command_scope, current_command_scope, get_client
+    from utils import init_default_data, generate_token
+
+    patches = _external_patches()
+    if not args.mongo_uri:
+        patches += _count_mongomock_calls(current_command_scope)
+    for patch in patches:
+        patch.start()
+
+    with open(args.manifest, encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    client = get_client(Config.MONGO_URI)
+    client.drop_database(CHECK_DB_NAME)
+    db = client[CHECK_DB_NAME]
+
+    app = Flask(__name__)
+    register_blueprints(app)
+    test_client = app.test_client()
+
+    init_default_data(db)
+    # 2025 年的每日統計，供 admin/trash/all 的月份彙總使用 (沒有紀錄的月份不會建立彙總)
+    db.daily_trash.insert_many([
+        {"date": f"2025-{month:02d}-{day:02d}", "plastic": 1, "total": 1}
+        for month in range(1, 13) for day in (1, 15)
+    ])
+    admin = db.users.find_one({"userRole": "admin"})
+    variables = _Variables({
+        'admin_id': str(admin['_id']),
+        'admin_token': generate_token(admin['_id'], 'admin'),
+        'verification_code': VERIFICATION_CODE
+    })
+
+    results = []
+    try:
+        for case in manifest['cases']:
+            results.append(run_case(test_client, case, variables, command_scope))
+    finally:
+        if args.mongo_uri:
+            client.drop_database(CHECK_DB_NAME)
+
+    failures = []
+    print(f"{'route':58s} {'status':>6s} {'budget':>6s} {'actual':>6s}")
+    for case, result in zip(manifest['cases'], results):
+        budget = case.get('budget')
+        expect = case.get('expect', 200)
+        flag = ''
+
+        if result['status'] != expect:
+            flag = f"status {result['status']} != {expect}: {result['message']}"
+        elif budget is None:
+            flag = "no budget"
+        elif result['commands'] > budget:
+            flag = f"over budget (+{result['commands'] - budget})"
+        elif result['commands'] < budget:
+            flag = f"under budget (-{budget - result['commands']}), run --update to lock in"
+
+        if flag and not (args.update and result['status'] == expect):
+            failures.append(f"{case['name']}: {flag}")
+
+        print(f"{case['name']:58s} {result['status']:>6d} {str(budget):>6s} {result['commands']:>6d}  {flag}")
+
+    uncovered, unknown = covered_rules(app, manifest)
+    for rule in uncovered:
+        failures.append(f"route not in manifest: {rule}")
+    for rule in unknown:
+        failures.append(f"manifest entry matches no route: {rule}")
+
+    if args.update:
+        for case, result in zip(manifest['cases'], results):
+            if result['status'] == case.get('expect', 200):
+                case['budget'] = result['commands']
+
+        with open(args.manifest, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=4)
+            f.write('\n')
+        print(f"updated {args.manifest}")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+
+    print("OK")
+
+if __name__ == "__main__":
+    main()
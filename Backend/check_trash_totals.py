@@ -0,0 +1,35 @@
+"""全體垃圾統計 (trash_totals) 核對
+
+以所有使用者的 trash_stats 彙整結果核對 trash_totals (排程每日也會執行一次，見 TRASH_TOTALS_RECONCILE_AT)，
+有差異時列出各類別的差額並以非 0 結束；--repair 則以差額修正 trash_totals
+
+使用方式:
+    python check_trash_totals.py
+    python check_trash_totals.py --repair
+"""
+import argparse
+import sys
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile the global trash totals against users' trash_stats")
+    parser.add_argument('--repair', action='store_true', help="以差額修正 trash_totals")
+    args = parser.parse_args()
+
+    import utils # utils 需先於 services 載入
+    from config import Config
+    from services import DailyTrashService
+
+    result = DailyTrashService(Config.MONGO_URI).reconcile_trash_totals(repair=args.repair)
+
+    print(f"{'type':12s} {'totals':>10s} {'expected':>10s} {'drift':>8s}")
+    for trash_type, total in result["totals"].items():
+        print(f"{trash_type:12s} {total:>10d} {result['expected'].get(trash_type, 0):>10d} {result['drift'].get(trash_type, 0):>8d}")
+
+    if result["drift"] and not result["repaired"]:
+        print("FAIL: trash totals drifted, run with --repair to fix")
+        sys.exit(1)
+
+    print("REPAIRED" if result["repaired"] else "OK")
+
+if __name__ == "__main__":
+    main()
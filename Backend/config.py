@@ -12,6 +12,19 @@ class Config:
     MONGO_PASSWORD = os.getenv("MONGO_PASSWORD")
     MONGO_HOST = os.getenv("MONGO_HOST")
     MONGO_OPTIONS = os.getenv("MONGO_OPTIONS", "")
+    
+    # MongoDB 連線池設定 (整個程序共用一個 MongoClient)
+    MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+    MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+    MONGO_MAX_IDLE_TIME_MS = os.getenv("MONGO_MAX_IDLE_TIME_MS")
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS")
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "20000"))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "30000"))
+    MONGO_SOCKET_TIMEOUT_MS = os.getenv("MONGO_SOCKET_TIMEOUT_MS")
+    MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "") # e.g. "zstd,zlib"
+    
+    # 超過此時間 (ms) 的 MongoDB 指令會記錄查詢條件的結構，0 表示不記錄
+    MONGO_SLOW_COMMAND_MS = float(os.getenv("MONGO_SLOW_COMMAND_MS", "100"))
     SECRET_KEY = os.getenv("SECRET_KEY")
     DB_NAME = os.getenv("DB_NAME")
 
@@ -22,6 +35,9 @@ class Config:
 
     ADMIN_PATH = os.getenv("AdminPath")
     
+    # 程序角色 (api / realtime / scheduler)，可分開部署並各自擴展
+    APP_ROLES = [role.strip() for role in os.getenv("APP_ROLES", "api,realtime,scheduler").split(",") if role.strip()]
+    
     # Cloudinary 設定
     CLOUD_NAME = os.getenv('CLOUD_NAME')
     CLOUD_KEY = os.getenv('CLOUD_KEY')
@@ -30,6 +46,57 @@ class Config:
     # Socket 設定
     SOCKET_PORT = int(os.getenv("SOCKET_PORT"))
     
+    # Rate limit 設定 (token bucket)
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory") # memory / mongo
+    # 反向代理的 IP / CIDR (逗號分隔)，只有直接連線來自這些代理時才採用 X-Forwarded-For
+    TRUSTED_PROXIES = [proxy.strip() for proxy in os.getenv("TRUSTED_PROXIES", "").split(",") if proxy.strip()]
+    RATE_LIMIT_USER_CAPACITY = int(os.getenv("RATE_LIMIT_USER_CAPACITY", "60"))
+    RATE_LIMIT_USER_REFILL_RATE = float(os.getenv("RATE_LIMIT_USER_REFILL_RATE", "1"))
+    RATE_LIMIT_IP_CAPACITY = int(os.getenv("RATE_LIMIT_IP_CAPACITY", "120"))
+    RATE_LIMIT_IP_REFILL_RATE = float(os.getenv("RATE_LIMIT_IP_REFILL_RATE", "2"))
+    RATE_LIMIT_DETECT_CAPACITY = int(os.getenv("RATE_LIMIT_DETECT_CAPACITY", "10"))
+    RATE_LIMIT_DETECT_REFILL_RATE = float(os.getenv("RATE_LIMIT_DETECT_REFILL_RATE", "5"))
+    # 未登入的認證端點 (登入、註冊、驗證碼、忘記密碼) 依 IP 另外限制，預設每分鐘補充 6 次
+    RATE_LIMIT_AUTH_CAPACITY = int(os.getenv("RATE_LIMIT_AUTH_CAPACITY", "10"))
+    RATE_LIMIT_AUTH_REFILL_RATE = float(os.getenv("RATE_LIMIT_AUTH_REFILL_RATE", "0.1"))
+    
+    # 使用者活躍時間批次寫入間隔 (秒)
+    ACTIVITY_FLUSH_INTERVAL = float(os.getenv("ACTIVITY_FLUSH_INTERVAL", "30"))
+    
+    # 驗證用使用者資料快取 (秒 / 筆數)，TTL 為 0 表示不快取
+    PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "30"))
+    PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+    
+    # 全體垃圾統計 (trash_totals) 的每日核對時間，有差異時是否自動修正
+    TRASH_TOTALS_RECONCILE_AT = os.getenv("TRASH_TOTALS_RECONCILE_AT", "03:00")
+    TRASH_TOTALS_AUTO_REPAIR = os.getenv("TRASH_TOTALS_AUTO_REPAIR", "true").lower() == "true"
+    
+    # 辨識 / 回收事件批次寫入間隔 (秒) 與記憶體中最多保留的筆數 (超過時捨棄)
+    DETECTION_EVENT_FLUSH_INTERVAL = float(os.getenv("DETECTION_EVENT_FLUSH_INTERVAL", "5"))
+    DETECTION_EVENT_BUFFER_SIZE = int(os.getenv("DETECTION_EVENT_BUFFER_SIZE", "10000"))
+    
+    # GET /metrics 的 Bearer token，未設定時不需驗證
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+    
+    # 辨識幀保存設定 (供重新標註)
+    ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "false").lower() == "true"
+    ARCHIVE_PATH = os.getenv("ArchivePath", "archive")
+    # 任一辨識框的置信度落在此區間即保存 (包含未達 confidence_threshold 的框)
+    ARCHIVE_CONFIDENCE_LOW = float(os.getenv("ARCHIVE_CONFIDENCE_LOW", "0.5"))
+    ARCHIVE_CONFIDENCE_HIGH = float(os.getenv("ARCHIVE_CONFIDENCE_HIGH", "0.85"))
+    ARCHIVE_CATEGORIES = [c for c in os.getenv("ARCHIVE_CATEGORIES", "").split(",") if c]
+    ARCHIVE_SAMPLE_RATE = float(os.getenv("ARCHIVE_SAMPLE_RATE", "0.01"))
+    ARCHIVE_QUEUE_SIZE = int(os.getenv("ARCHIVE_QUEUE_SIZE", "64"))
+    ARCHIVE_MAX_MB = int(os.getenv("ARCHIVE_MAX_MB", "4096"))
+    
+    # 辨識模型 (detect_models/{DETECTION_MODEL_VERSION}.pt)
+    DETECTION_MODEL_VERSION = os.getenv("DETECTION_MODEL_VERSION", "yolov11l")
+    
+    # 辨識推論精度 (fp32 / bf16 / int8_dynamic / int8_static)
+    DETECTION_PRECISION = os.getenv("DETECTION_PRECISION", "fp32")
+    PRECISION_CALIBRATION_PATH = os.getenv("CalibrationPath")
+    PRECISION_MIN_AGREEMENT = float(os.getenv("PRECISION_MIN_AGREEMENT", "0.95"))
+    
     # MongoDB 連接 URI
     MONGO_URI = (
         f"mongodb://{MONGO_USERNAME}:{MONGO_PASSWORD}"
@@ -46,11 +113,34 @@ class Config:
             'secure': True
         }
 
+    @staticmethod
+    def get_mongo_client_options() -> dict:
+        """取得 MongoClient 連線池設定 (未設定的項目使用 pymongo 預設值)"""
+        options = {
+            'maxPoolSize': Config.MONGO_MAX_POOL_SIZE,
+            'minPoolSize': Config.MONGO_MIN_POOL_SIZE,
+            'connectTimeoutMS': Config.MONGO_CONNECT_TIMEOUT_MS,
+            'serverSelectionTimeoutMS': Config.MONGO_SERVER_SELECTION_TIMEOUT_MS
+        }
+        
+        optional = {
+            'maxIdleTimeMS': Config.MONGO_MAX_IDLE_TIME_MS,
+            'waitQueueTimeoutMS': Config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            'socketTimeoutMS': Config.MONGO_SOCKET_TIMEOUT_MS
+        }
+        options.update({key: int(value) for key, value in optional.items() if value})
+        
+        if Config.MONGO_COMPRESSORS:
+            options['compressors'] = Config.MONGO_COMPRESSORS
+        
+        return options
+    
     @staticmethod
     def init_db() -> MongoClient:
-        """初始化 MongoDB 連接"""
+        """初始化 MongoDB 連接 (共用 services 的 MongoClient)"""
         try:
-            client = MongoClient(Config.MONGO_URI)
+            from services.db_service import get_client
+            client = get_client(Config.MONGO_URI)
             db = client[Config.DB_NAME]
             return db
         except Exception as e:
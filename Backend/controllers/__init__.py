@@ -13,6 +13,7 @@ from .feedback_controller import FeedbackController
 from .voucher_controller import VoucherController
 from .system_controller import SystemController
 from .station_controller import StationController
+from .detection_controller import DetectionController
 
 __all__ = [
     'AuthController',
@@ -30,5 +31,6 @@ __all__ = [
     'FeedbackController',
     'VoucherController',
     'SystemController',
-    'StationController'
+    'StationController',
+    'DetectionController'
 ]
\ No newline at end of file
@@ -1,8 +1,7 @@
-import bcrypt
 from flask import request
 from services import AuthService, PurchaseService, UserService, UserLevelService, VerificationService, ThemeService, DailyTrashService
 from config import Config
-from utils import verify_token
+from utils import verify_token, hash_password
 
 auth_service = AuthService(Config.MONGO_URI)
 user_service = UserService(Config.MONGO_URI)
@@ -41,7 +40,7 @@ class AuthController:
             # 創建驗證記錄並發送郵件
             success, message = verification_service.create_verification(
                 email=data['email'],
-                password=bcrypt.hashpw(data['password'].encode('utf-8'), bcrypt.gensalt()).decode('utf-8'),
+                password=hash_password(data['password']),
                 user_role=data['userRole']
             )
             
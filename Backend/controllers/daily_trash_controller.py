@@ -1,8 +1,9 @@
 from flask import request
 from config import Config
-from services import DailyTrashService
+from services import DailyTrashService, DetectionEventService
 
 daily_trash_service = DailyTrashService(Config.MONGO_URI)
+detection_event_service = DetectionEventService(Config.MONGO_URI)
 
 class DailyTrashController:
     # @staticmethod
@@ -59,14 +60,49 @@ class DailyTrashController:
     @staticmethod
     def get_all_trash():
         try:
-            result = daily_trash_service.get_all_trash()
+            start_date = request.args.get("start_date") # YYYY-MM-DD
+            end_date = request.args.get("end_date") # YYYY-MM-DD
+            granularity = request.args.get("granularity", "day") # day / week / month / year
+            
+            result = daily_trash_service.get_all_trash(start_date, end_date, granularity)
             
             return {
                 "message": f"成功獲取共 {result['summary']['total_days']} 天的統計數據",
                 "body": result
             }, 200
             
+        except ValueError as e:
+            return {
+                "message": str(e)
+            }, 400
         except Exception as e:
             return {
                 "message": f"伺服器錯誤(get_all_trash) {str(e)}"
-            }, 500
\ No newline at end of file
+            }, 500
+            
+    @staticmethod
+    def get_trash_events():
+        """辨識 / 回收事件的小時或每日分布"""
+        try:
+            result = detection_event_service.get_histogram(
+                start_date=request.args.get("start_date"), # YYYY-MM-DD
+                end_date=request.args.get("end_date"), # YYYY-MM-DD
+                interval=request.args.get("interval", "hour"), # hour / day
+                category=request.args.get("category"),
+                user_id=request.args.get("user_id"),
+                station_id=request.args.get("station_id")
+            )
+            
+            return {
+                "message": f"成功獲取共 {result['totals']['count']} 筆回收事件的統計",
+                "body": result
+            }, 200
+            
+        except ValueError as e:
+            return {
+                "message": str(e)
+            }, 400
+        except Exception as e:
+            return {
+                "message": f"伺服器錯誤(get_trash_events) {str(e)}"
+            }, 500
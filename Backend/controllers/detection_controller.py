@@ -0,0 +1,62 @@
+from flask import request
+from config import Config
+from models import DetectionConfig
+from services import DetectionConfigService
+from utils import verify_token
+
+detection_config_service = DetectionConfigService(Config.MONGO_URI)
+
+class DetectionController:
+    @staticmethod
+    def get_detection_config():
+        try:
+            config = detection_config_service.get_latest() or DetectionConfig()
+
+            return {
+                "message": "成功獲取辨識參數",
+                "body": {
+                    "current": config.to_dict(),
+                    "history": detection_config_service.get_history()
+                }
+            }, 200
+
+        except Exception as e:
+            return {
+                "message": f"伺服器錯誤(get_detection_config) {str(e)}"
+            }, 500
+
+    @staticmethod
+    def update_detection_config():
+        try:
+            data = request.get_json() or {}
+
+            updates = {field: data[field] for field in DetectionConfig.FIELDS if field in data}
+            if not updates:
+                return {
+                    "message": f"缺少參數: {', '.join(DetectionConfig.FIELDS)}"
+                }, 400
+
+            if isinstance(updates.get('aggregation_mode'), str) and updates['aggregation_mode'].lower() == 'none':
+                updates['aggregation_mode'] = None
+
+            auth_header = request.headers.get('Authorization')
+            token = auth_header.split(' ')[1]
+            token_data = verify_token(token)
+            admin_id = token_data['user_id']
+
+            try:
+                config = detection_config_service.publish(updates, admin_id)
+            except (ValueError, TypeError) as e:
+                return {
+                    "message": f"參數錯誤: {str(e)}"
+                }, 400
+
+            return {
+                "message": f"成功更新辨識參數 (v{config.version})",
+                "body": config.to_dict()
+            }, 200
+
+        except Exception as e:
+            return {
+                "message": f"伺服器錯誤(update_detection_config) {str(e)}"
+            }, 500
@@ -1,11 +1,17 @@
-from services import SystemInfo
+from config import Config
+from services import SystemInfo, DetectionConfigService, get_pool_stats, get_command_stats, get_principal_cache_stats
+
+detection_config_service = DetectionConfigService(Config.MONGO_URI)
 
 class SystemController:    
     @staticmethod
     def get_system_info():
         """獲取系統資訊"""
         try:
-            system_info = SystemInfo.get_all_system_info()
+            system_info = SystemInfo.get_all_system_info(
+                detection_config_service.get_latest(),
+                detection_config_service.get_runtimes()
+            )
             
             return {
                 "message": "成功獲取系統資訊",
@@ -15,4 +21,22 @@ class SystemController:
         except Exception as e:
             return {
                 "message": f"伺服器錯誤(get_system_info) {str(e)}"
-            }, 500
\ No newline at end of file
+            }, 500
+    
+    @staticmethod
+    def get_db_stats():
+        """獲取此 API 程序的 MongoDB 連線池、各路由指令統計與驗證快取命中率"""
+        try:
+            return {
+                "message": "成功獲取資料庫統計",
+                "body": {
+                    "pool": get_pool_stats(),
+                    "commands": get_command_stats(),
+                    "principals": get_principal_cache_stats()
+                }
+            }, 200
+            
+        except Exception as e:
+            return {
+                "message": f"伺服器錯誤(get_db_stats) {str(e)}"
+            }, 500
@@ -1,4 +1,5 @@
-from services import UserService, AuthService, DailyTrashService, VerificationService, ImageService
+import atexit
+from services import UserService, AuthService, DailyTrashService, VerificationService, ImageService, DetectionEventService
 from config import Config
 from bson import ObjectId
 from flask import request
@@ -8,6 +9,10 @@ image_service = ImageService(Config.get_cloudinary_config())
 user_service = UserService(Config.MONGO_URI, image_service)
 daily_trash_service = DailyTrashService(Config.MONGO_URI)
 verification_service= VerificationService(Config.MONGO_URI)
+detection_event_service = DetectionEventService(
+    Config.MONGO_URI, Config.DETECTION_EVENT_FLUSH_INTERVAL, Config.DETECTION_EVENT_BUFFER_SIZE
+)
+atexit.register(detection_event_service.stop) # 關閉前寫入尚未 flush 的回收事件
 
 class UserController:
     @staticmethod
@@ -325,6 +330,9 @@ class UserController:
             result = user_service.add_user_trash_stats(user_id, trash_type, count)
             
             if result:
+                detection_event_service.record(
+                    user_id, trash_type, station_id=data.get('station_id'), source='submission', count=count
+                )
                 daily_update_success = daily_trash_service._update_daily_trash(trash_type, count)
                 
                 if daily_update_success:
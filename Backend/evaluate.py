@@ -0,0 +1,289 @@
+"""辨識模型離線評估
+
+以 YOLO 格式的標註資料集執行實際的辨識流程 (DetectionService)，
+比較不同聚合模式與閾值組合的準確度 (各父類別 precision / recall / AP50) 與每幀耗時。
+每張圖像的模型推論只執行一次並快取，參數組合只重新執行聚合與過濾。
+
+使用方式:
+    python evaluate.py --images datasets/images/val --output eval_results
+    python evaluate.py --images datasets/images/val --modes noisy_or,max,none --conf 0.5,0.7,0.85 --agg-iou 0.3,0.4
+    python evaluate.py --images datasets/images/val --precision int8_static --calibration datasets/images/calib
+"""
+import argparse
+import csv
+import itertools
+import time
+from pathlib import Path
+from typing import Dict, List
+import cv2
+import numpy as np
+from utils import logger, box_iou
+from services import DetectionService
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
+MATCH_IOU = 0.5
+
+def parse_list(value: str, cast=float) -> list:
+    return [cast(item) for item in value.split(',') if item]
+
+def parse_mode(mode: str):
+    return None if mode.lower() == 'none' else mode
+
+def load_ground_truth(label_path: Path, image_shape, detection_service: DetectionService, label_space: str) -> List[tuple]:
+    """讀取 YOLO 標註，回傳 [(父類別 id, xyxy)]"""
+    if not label_path.exists():
+        return []
+
+    height, width = image_shape[:2]
+    ground_truth = []
+
+    for line in label_path.read_text(encoding='utf-8').splitlines():
+        parts = line.split()
+        if len(parts) < 5:
+            continue
+
+        cls_id = int(parts[0])
+        x, y, w, h = (float(value) for value in parts[1:5])
+
+        parent_id = cls_id if label_space == 'parent' else detection_service.child_to_parent_id_map.get(cls_id)
+        if parent_id is None:
+            continue
+
+        ground_truth.append((parent_id, [
+            (x - w / 2) * width, (y - h / 2) * height,
+            (x + w / 2) * width, (y + h / 2) * height
+        ]))
+
+    return ground_truth
+
+def label_path_for(image_path: Path, labels_dir) -> Path:
+    """YOLO 資料集慣例: .../images/... 對應 .../labels/..."""
+    if labels_dir:
+        return Path(labels_dir) / f"{image_path.stem}.txt"
+
+    parts = list(image_path.parts)
+    if 'images' in parts:
+        index = len(parts) - 1 - parts[::-1].index('images')
+        parts[index] = 'labels'
+
+    return Path(*parts).with_suffix('.txt')
+
+def average_precision(recalls: np.ndarray, precisions: np.ndarray) -> float:
+    """all-point interpolation AP"""
+    recalls = np.concatenate(([0.0], recalls, [1.0]))
+    precisions = np.concatenate(([0.0], precisions, [0.0]))
+
+    for i in range(len(precisions) - 2, -1, -1):
+        precisions[i] = max(precisions[i], precisions[i + 1])
+
+    changed = np.where(recalls[1:] != recalls[:-1])[0]
+    return float(np.sum((recalls[changed + 1] - recalls[changed]) * precisions[changed + 1]))
+
+def cache_forward_passes(detection_service: DetectionService, image_paths: List[Path], conf: float, predict_ious: set, label_space: str, labels_dir=None):
+    """每張圖像對每個需要的 predict iou 只執行一次模型推論"""
+    cache = []
+
+    for image_path in image_paths:
+        image = cv2.imread(str(image_path))
+        if image is None:
+            logger.warning(f"Skip unreadable image: {image_path}")
+            continue
+
+        label_path = label_path_for(image_path, labels_dir)
+
+        entry = {
+            'name': image_path.name,
+            'shape': image.shape,
+            'ground_truth': load_ground_truth(label_path, image.shape, detection_service, label_space),
+            'boxes': {},
+            'forward_ms': {}
+        }
+
+        for iou in predict_ious:
+            start = time.perf_counter()
+            results = detection_service._predict(image, conf, iou)
+            entry['forward_ms'][iou] = (time.perf_counter() - start) * 1000
+            entry['boxes'][iou] = results[0].boxes
+
+        cache.append(entry)
+
+    return cache
+
+def evaluate_config(detection_service: DetectionService, cache: List[dict], config: dict) -> Dict:
+    detection_config = detection_service.config.updated(
+        {key: value for key, value in config.items() if value is not None or key == 'aggregation_mode'},
+        detection_service.config.version + 1
+    )
+    detection_service.apply_config(detection_config)
+
+    predict_iou = detection_service._predict_iou()
+    num_classes = len(detection_service.parent_names)
+
+    scores = {cls_id: [] for cls_id in range(num_classes)} # cls_id -> [(confidence, is_tp)]
+    positives = {cls_id: 0 for cls_id in range(num_classes)}
+    forward_ms, post_ms = [], []
+
+    for entry in cache:
+        boxes = entry['boxes'][predict_iou]
+        boxes = boxes[boxes.conf >= config['confidence_threshold']]
+
+        start = time.perf_counter()
+        detections = detection_service._process_boxes(boxes, entry['shape'])
+        post_ms.append((time.perf_counter() - start) * 1000)
+        forward_ms.append(entry['forward_ms'][predict_iou])
+
+        for parent_id, _ in entry['ground_truth']:
+            positives[parent_id] += 1
+
+        matched = set()
+        for det in sorted(detections, key=lambda det: -det.confidence):
+            cls_id = detection_service.parent_names.index(det.category)
+
+            best_iou, best_index = 0.0, None
+            for gt_index, (gt_cls, gt_box) in enumerate(entry['ground_truth']):
+                if gt_cls != cls_id or gt_index in matched:
+                    continue
+
+                iou = box_iou(det.bbox, gt_box)
+                if iou > best_iou:
+                    best_iou, best_index = iou, gt_index
+
+            is_tp = best_iou >= MATCH_IOU
+            if is_tp:
+                matched.add(best_index)
+
+            scores[cls_id].append((det.confidence, is_tp))
+
+    per_class = {}
+    for cls_id, name in enumerate(detection_service.parent_names):
+        ranked = sorted(scores[cls_id], key=lambda score: -score[0])
+        tp = np.cumsum([is_tp for _, is_tp in ranked]) if ranked else np.array([])
+        fp = np.cumsum([not is_tp for _, is_tp in ranked]) if ranked else np.array([])
+
+        if positives[cls_id] == 0:
+            per_class[name] = {'precision': None, 'recall': None, 'ap50': None, 'support': 0}
+            continue
+
+        recalls = tp / positives[cls_id] if len(tp) else np.array([0.0])
+        precisions = tp / np.maximum(tp + fp, 1) if len(tp) else np.array([0.0])
+
+        per_class[name] = {
+            'precision': float(precisions[-1]),
+            'recall': float(recalls[-1]),
+            'ap50': average_precision(recalls, precisions),
+            'support': positives[cls_id]
+        }
+
+    evaluated = [metrics['ap50'] for metrics in per_class.values() if metrics['ap50'] is not None]
+
+    return {
+        **config,
+        'map50': float(np.mean(evaluated)) if evaluated else 0.0,
+        'forward_ms': float(np.mean(forward_ms)) if forward_ms else 0.0,
+        'post_ms': float(np.mean(post_ms)) if post_ms else 0.0,
+        'per_class': per_class
+    }
+
+def build_grid(modes: list, agg_ious: list, lse_rs: list, confs: list) -> List[dict]:
+    """建立參數組合，略過對該模式沒有影響的參數"""
+    grid, seen = [], set()
+
+    for mode, agg_iou, lse_r, conf in itertools.product(modes, agg_ious, lse_rs, confs):
+        if mode is None:
+            agg_iou, lse_r = None, None
+        elif mode != 'lse':
+            lse_r = None
+
+        key = (mode, agg_iou, lse_r, conf)
+        if key in seen:
+            continue
+        seen.add(key)
+
+        grid.append({
+            'aggregation_mode': mode,
+            'agg_iou_threshold': agg_iou,
+            'agg_lse_r': lse_r,
+            'confidence_threshold': conf
+        })
+
+    return grid
+
+def format_value(value, digits: int = 3) -> str:
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f"{value:.{digits}f}"
+    return str(value)
+
+def write_report(results: List[dict], parent_names: List[str], output_dir: Path):
+    output_dir.mkdir(parents=True, exist_ok=True)
+    results = sorted(results, key=lambda result: -result['map50'])
+
+    config_columns = ['aggregation_mode', 'agg_iou_threshold', 'agg_lse_r', 'confidence_threshold']
+    summary_columns = config_columns + ['map50', 'forward_ms', 'post_ms']
+    class_columns = [f"{name}_{metric}" for name in parent_names for metric in ('precision', 'recall', 'ap50')]
+
+    with open(output_dir / 'evaluation.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(summary_columns + class_columns)
+        for result in results:
+            writer.writerow(
+                [result[column] for column in summary_columns] +
+                [result['per_class'][name][metric] for name in parent_names for metric in ('precision', 'recall', 'ap50')]
+            )
+
+    lines = [
+        '| ' + ' | '.join(summary_columns) + ' |',
+        '|' + '---|' * len(summary_columns)
+    ]
+    for result in results:
+        lines.append('| ' + ' | '.join(format_value(result[column]) for column in summary_columns) + ' |')
+
+    table = '\n'.join(lines)
+    (output_dir / 'evaluation.md').write_text(table + '\n', encoding='utf-8')
+
+    return table
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate detection aggregation modes and thresholds")
+    parser.add_argument('--images', required=True, help="圖像資料夾")
+    parser.add_argument('--labels', default=None, help="標註資料夾 (預設將路徑中的 images 換成 labels)")
+    parser.add_argument('--label-space', choices=['child', 'parent'], default='child', help="標註類別為模型的子類別或父類別")
+    parser.add_argument('--modes', default='noisy_or,max,lse,sum,none')
+    parser.add_argument('--agg-iou', default='0.3,0.4,0.5')
+    parser.add_argument('--lse-r', default='4.0')
+    parser.add_argument('--conf', default='0.5,0.7,0.85')
+    parser.add_argument('--precision', default='fp32', help="fp32 / bf16 / int8_dynamic / int8_static")
+    parser.add_argument('--calibration', default=None, help="低精度模式的校正與比對圖像資料夾")
+    parser.add_argument('--output', default='eval_results')
+    args = parser.parse_args()
+
+    modes = [parse_mode(mode) for mode in parse_list(args.modes, str)]
+    grid = build_grid(modes, parse_list(args.agg_iou), parse_list(args.lse_r), parse_list(args.conf))
+
+    detection_service = DetectionService(precision=args.precision, calibration_dir=args.calibration)
+    if detection_service.precision != args.precision:
+        logger.warning(f"Precision {args.precision} was not enabled, evaluating {detection_service.precision}")
+    predict_ious = {0.95 if mode else detection_service.config.iou_threshold for mode in modes}
+
+    image_paths = sorted(path for path in Path(args.images).iterdir() if path.suffix.lower() in IMAGE_EXTENSIONS)
+    logger.info(f"Caching forward passes for {len(image_paths)} images")
+    cache = cache_forward_passes(
+        detection_service,
+        image_paths,
+        min(config['confidence_threshold'] for config in grid),
+        predict_ious,
+        args.label_space,
+        args.labels
+    )
+
+    results = []
+    for config in grid:
+        results.append(evaluate_config(detection_service, cache, config))
+        logger.info(f"Evaluated {config}: mAP50={results[-1]['map50']:.3f}")
+
+    table = write_report(results, detection_service.parent_names, Path(args.output))
+    print(table)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 from .auth_middleware import token_required, admin_required
-from .log_middleware import log_request
+from .log_middleware import log_request, register_command_tracking, track_socket_commands
+from .rate_limit_middleware import rate_limit, auth_rate_limit, socket_rate_limit
+from .metrics_middleware import register_metrics
 
 __all__ = [
     'token_required',
     'admin_required',
-    'log_request'
+    'log_request', 'register_command_tracking', 'track_socket_commands',
+    'rate_limit', 'auth_rate_limit', 'socket_rate_limit',
+    'register_metrics'
 ]
\ No newline at end of file
@@ -1,10 +1,13 @@
+import atexit
 from functools import wraps
-from flask import request, jsonify
-from services import UserService
+from flask import request, jsonify, g
+from services import UserService, DailyTrashService, ActivityService
 from config import Config
 from utils import verify_token
 
 user_service = UserService(Config.MONGO_URI)
+activity_service = ActivityService(user_service, DailyTrashService(Config.MONGO_URI), Config.ACTIVITY_FLUSH_INTERVAL)
+atexit.register(activity_service.stop) # 關閉前寫入尚未 flush 的活躍時間
 
 def token_required(f):
     @wraps(f)
@@ -25,12 +28,13 @@ def token_required(f):
         if not token_data:
             return jsonify({"message": "Token 無效或已過期"}), 401
 
-        user = user_service.get_user(token_data['user_id'])
+        user = user_service.get_principal(token_data['user_id'])
         if not user:
             return jsonify({"message": "使用者不存在"}), 401
         
-        user_service.update_last_active(token_data['user_id'])
+        activity_service.record(token_data['user_id'])
         
+        g.user_id = token_data['user_id'] # 存取紀錄使用
         user['userRole'] = token_data['userRole']
         return f(user, *args, **kwargs)
     
@@ -58,10 +62,11 @@ def admin_required(f):
         if token_data['userRole'] != 'admin':
             return jsonify({"message": "權限不足"}), 403
 
-        user = user_service.get_user(token_data['user_id'])
+        user = user_service.get_principal(token_data['user_id'])
         if not user:
             return jsonify({"message": "使用者不存在"}), 401
 
+        g.user_id = token_data['user_id'] # 存取紀錄使用
         user['userRole'] = token_data['userRole']
         return f(*args, **kwargs)
     
@@ -1,38 +1,42 @@
+import time
 from functools import wraps
-from flask import request
-from datetime import datetime
-from utils import logger
+from flask import Flask, request, g
+from utils import logger, log_access
+from utils.metrics import socket_events_total, socket_event_duration_seconds
+from services import start_command_scope, end_command_scope, current_command_scope, command_scope
+from .rate_limit_middleware import get_client_ip
+
+def _log_access(status_code: int, start_ns: int):
+    """存取紀錄 (JSON 格式化與寫檔都在日誌執行緒，請求端只組出欄位)"""
+    scope = current_command_scope()
+    log_access(
+        status_code,
+        method=request.method,
+        route=request.url_rule.rule if request.url_rule is not None else None,
+        path=request.path,
+        latency_us=(time.perf_counter_ns() - start_ns) // 1000,
+        user_id=g.get('user_id'),
+        ip=get_client_ip(),
+        db_commands=scope.commands if scope else None,
+        db_ms=round(scope.duration_ms, 1) if scope else None
+    )
 
 def log_request(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        start_time = datetime.now()
+        start_ns = time.perf_counter_ns()
         
         try:
             response = f(*args, **kwargs)
             
             status_code = response[1] if isinstance(response, tuple) else 200
             
-            timestamp = start_time.strftime('%d/%b/%Y %H:%M:%S')
-            
-            client_ip = request.environ.get('HTTP_X_FORWARDED_FOR', request.remote_addr)
-            if client_ip and ',' in client_ip:
-                client_ip = client_ip.split(',')[0].strip()
-            
-            log_msg = f'{client_ip} - - [{timestamp}] "{request.method} {request.path} HTTP/1.1" {status_code} -'
-            
-            logger.info(log_msg)
+            _log_access(status_code, start_ns)
             
             return response
             
         except Exception as e:
-            timestamp = start_time.strftime('%d/%b/%Y %H:%M:%S')
-            client_ip = request.environ.get('HTTP_X_FORWARDED_FOR', request.remote_addr)
-            if client_ip and ',' in client_ip:
-                client_ip = client_ip.split(',')[0].strip()
-                
-            log_msg = f'{client_ip} - - [{timestamp}] "{request.method} {request.path} HTTP/1.1" 500 -'
-            logger.info(log_msg)
+            _log_access(500, start_ns)
             
             logger.error(f"Error in {request.method} {request.path}: {str(e)}", exc_info=True)
             
@@ -41,4 +45,36 @@ def log_request(f):
                 "error": str(e)
             }, 500
     
-    return decorated
\ No newline at end of file
+    return decorated
+
+def register_command_tracking(app: Flask):
+    """將每個請求發出的 MongoDB 指令歸屬到對應的路由 (以路由規則命名，例如 GET /api/v1/users/<user_id>)"""
+    @app.before_request
+    def _start_command_scope():
+        if request.url_rule is not None:
+            g.command_scope_token = start_command_scope(f"{request.method} {request.url_rule.rule}")
+
+    @app.teardown_request
+    def _end_command_scope(exc=None):
+        token = g.pop('command_scope_token', None)
+        if token is not None:
+            end_command_scope(token)
+
+def track_socket_commands(f):
+    """將 socket 事件發出的 MongoDB 指令歸屬到該事件 (例如 socket:detect_image)，並記錄事件次數與耗時"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        event = request.event['message']
+        start_ns = time.perf_counter_ns()
+        outcome = 'error'
+        
+        try:
+            with command_scope(f"socket:{event}"):
+                result = f(*args, **kwargs)
+            outcome = 'ok'
+            return result
+        finally:
+            socket_events_total.inc(event, outcome)
+            socket_event_duration_seconds.observe((time.perf_counter_ns() - start_ns) / 1e9, event)
+
+    return decorated
@@ -0,0 +1,40 @@
+import hmac
+import time
+from flask import Flask, Response, request, g
+from config import Config
+from utils import render_metrics
+from utils.metrics import http_requests_total, http_request_duration_seconds
+
+def _authorized() -> bool:
+    """設定 METRICS_TOKEN 時需以 Bearer token 存取 /metrics"""
+    if not Config.METRICS_TOKEN:
+        return True
+
+    auth_header = request.headers.get('Authorization', '')
+    return hmac.compare_digest(auth_header, f"Bearer {Config.METRICS_TOKEN}")
+
+def register_metrics(app: Flask):
+    """依路由規則與狀態碼記錄請求次數與耗時 (例如 GET /api/v1/users/<user_id>)，並提供 GET /metrics"""
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_start_ns = time.perf_counter_ns()
+
+    @app.after_request
+    def _record_request(response):
+        start_ns = g.pop('metrics_start_ns', None)
+        if start_ns is not None:
+            # 沒有對應路由的請求合併為一組，避免 label 數量隨路徑無限增加
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            status = str(response.status_code)
+
+            http_requests_total.inc(request.method, route, status)
+            http_request_duration_seconds.observe((time.perf_counter_ns() - start_ns) / 1e9, request.method, route, status)
+
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        if not _authorized():
+            return {"message": "Token 無效"}, 401
+
+        return Response(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,139 @@
+import ipaddress
+from functools import wraps
+from flask import request
+from flask_socketio import emit
+from config import Config
+from services import DatabaseService
+from utils import RateLimiter, MemoryBucketStore, MongoBucketStore, rate_limit_headers, most_restrictive, verify_token, logger
+
+def _create_bucket_store():
+    if Config.RATE_LIMIT_BACKEND == 'mongo':
+        collection = DatabaseService(Config.MONGO_URI).get_collection('rate_limits')
+        return MongoBucketStore(collection)
+
+    return MemoryBucketStore()
+
+bucket_store = _create_bucket_store()
+
+user_limiter = RateLimiter(bucket_store, Config.RATE_LIMIT_USER_CAPACITY, Config.RATE_LIMIT_USER_REFILL_RATE, prefix="user")
+ip_limiter = RateLimiter(bucket_store, Config.RATE_LIMIT_IP_CAPACITY, Config.RATE_LIMIT_IP_REFILL_RATE, prefix="ip")
+detect_limiter = RateLimiter(bucket_store, Config.RATE_LIMIT_DETECT_CAPACITY, Config.RATE_LIMIT_DETECT_REFILL_RATE, prefix="detect")
+# 同一 IP 下可能有多支手機 (NAT)，給予 4 倍額度
+detect_ip_limiter = RateLimiter(bucket_store, Config.RATE_LIMIT_DETECT_CAPACITY * 4, Config.RATE_LIMIT_DETECT_REFILL_RATE * 4, prefix="detect_ip")
+auth_ip_limiter = RateLimiter(bucket_store, Config.RATE_LIMIT_AUTH_CAPACITY, Config.RATE_LIMIT_AUTH_REFILL_RATE, prefix="auth_ip")
+
+trusted_proxies = [ipaddress.ip_network(proxy, strict=False) for proxy in Config.TRUSTED_PROXIES]
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+
+    return any(ip in network for network in trusted_proxies)
+
+def get_client_ip():
+    """取得客戶端 IP
+
+    直接連線的對象不是 TRUSTED_PROXIES 中的代理時一律使用 remote_addr (X-Forwarded-For 可由客戶端任意設定)；
+    經由受信任的代理時由右往左略過代理位址，第一個不受信任的位址即為客戶端
+    """
+    client_ip = request.remote_addr
+    if not _is_trusted_proxy(client_ip):
+        return client_ip
+
+    forwarded = [address.strip() for address in request.headers.get('X-Forwarded-For', '').split(',') if address.strip()]
+    for address in reversed(forwarded):
+        client_ip = address
+        if not _is_trusted_proxy(address):
+            break
+
+    return client_ip
+
+def _get_token_user_id():
+    """只解析 JWT 取得 user_id，不查詢資料庫"""
+    auth_header = request.headers.get('Authorization', '')
+    parts = auth_header.split(" ")
+    if len(parts) != 2:
+        return None
+
+    token_data = verify_token(parts[1])
+    return token_data.get('user_id') if token_data else None
+
+def _with_headers(response, headers):
+    if isinstance(response, tuple):
+        if len(response) == 3:
+            body, status, response_headers = response
+            return body, status, {**dict(response_headers), **headers}
+        if len(response) == 2:
+            return response[0], response[1], headers
+
+    return response, 200, headers
+
+def rate_limit(f):
+    """依使用者與 IP 的 token bucket 限制請求頻率
+
+    需放在 token_required / admin_required 之前，避免被限制的請求仍查詢資料庫
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        user_id = _get_token_user_id()
+
+        results = [ip_limiter.consume(get_client_ip())]
+        if user_id:
+            results.append(user_limiter.consume(user_id))
+
+        result = most_restrictive(results)
+        headers = rate_limit_headers(result)
+
+        if not result.allowed:
+            return {
+                "message": "請求過於頻繁，請稍後再試"
+            }, 429, headers
+
+        return _with_headers(f(*args, **kwargs), headers)
+
+    return decorated
+
+def auth_rate_limit(f):
+    """未登入的認證端點 (登入、註冊、驗證碼、忘記密碼) 依 IP 限制頻率，避免暴力破解與大量寄送驗證信"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        result = most_restrictive([
+            ip_limiter.consume(get_client_ip()),
+            auth_ip_limiter.consume(get_client_ip())
+        ])
+        headers = rate_limit_headers(result)
+
+        if not result.allowed:
+            return {
+                "message": "請求過於頻繁，請稍後再試"
+            }, 429, headers
+
+        return _with_headers(f(*args, **kwargs), headers)
+
+    return decorated
+
+def socket_rate_limit(limiter: RateLimiter = detect_limiter, ip_limiter: RateLimiter = detect_ip_limiter, error_event: str = 'error'):
+    """Socket 事件的頻率限制 (依 sid 與 IP)，超過時發送 error_event 並略過該事件"""
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            result = most_restrictive([
+                limiter.consume(f"sid:{request.sid}"),
+                ip_limiter.consume(get_client_ip())
+            ])
+
+            if not result.allowed:
+                logger.warning(f"Socket rate limited: {request.sid} ({request.event['message']})")
+                emit(error_event, {
+                    'message': '請求過於頻繁，請稍後再試',
+                    'retry_after': rate_limit_headers(result)['Retry-After']
+                })
+                return
+
+            return f(*args, **kwargs)
+
+        return decorated
+
+    return decorator
@@ -8,6 +8,7 @@ from .level_model import Level
 from .question_model import Question
 from .question_category_model import QuestionCategory
 from .detection_model import DetectionResult, DetectionResponse
+from .detection_config_model import DetectionConfig
 from .email_model import EmailVerification
 from .image_model import Image
 from .daily_trash_model import DailyTrash
@@ -26,6 +27,7 @@ __all__ = [
     'Question',
     'QuestionCategory',
     'DetectionResult', 'DetectionResponse',
+    'DetectionConfig',
     'EmailVerification',
     'Image',
     'DailyTrash',
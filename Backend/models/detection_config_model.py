@@ -0,0 +1,73 @@
+from datetime import datetime
+
+class DetectionConfig:
+    """辨識參數 (不可變，更新時建立新版本)"""
+    AGGREGATION_MODES = ('noisy_or', 'max', 'lse', 'sum', None)
+
+    FIELDS = ('confidence_threshold', 'iou_threshold', 'aggregation_mode', 'agg_iou_threshold', 'agg_lse_r', 'imgsz')
+
+    DEFAULTS = {
+        'confidence_threshold': 0.85,
+        'iou_threshold': 0.7,
+        'aggregation_mode': 'noisy_or',
+        'agg_iou_threshold': 0.4,
+        'agg_lse_r': 4.0,
+        'imgsz': 896
+    }
+
+    def __init__(self, version: int = 0, confidence_threshold: float = 0.85, iou_threshold: float = 0.7,
+                 aggregation_mode='noisy_or', agg_iou_threshold: float = 0.4, agg_lse_r: float = 4.0,
+                 imgsz: int = 896, created_by=None, created_at=None):
+        self.version = version
+        self.confidence_threshold = float(confidence_threshold)
+        self.iou_threshold = float(iou_threshold)
+        self.aggregation_mode = aggregation_mode
+        self.agg_iou_threshold = float(agg_iou_threshold)
+        self.agg_lse_r = float(agg_lse_r)
+        self.imgsz = int(imgsz)
+        self.created_by = created_by
+        self.created_at = created_at or datetime.now()
+
+        self.validate()
+
+    def validate(self):
+        for field in ('confidence_threshold', 'iou_threshold', 'agg_iou_threshold'):
+            if not 0 < getattr(self, field) <= 1:
+                raise ValueError(f"{field} 必須介於 0 ~ 1")
+
+        if self.aggregation_mode not in self.AGGREGATION_MODES:
+            raise ValueError(f"無效的聚合模式: {self.aggregation_mode}")
+
+        if self.agg_lse_r <= 0:
+            raise ValueError("agg_lse_r 必須大於 0")
+
+        if self.imgsz % 32 != 0 or not 320 <= self.imgsz <= 1280:
+            raise ValueError("imgsz 必須是 32 的倍數且介於 320 ~ 1280")
+
+    def params(self) -> dict:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def updated(self, updates: dict, version: int, created_by=None) -> 'DetectionConfig':
+        """以目前參數為基礎建立新版本"""
+        unknown = set(updates) - set(self.FIELDS)
+        if unknown:
+            raise ValueError(f"未知的參數: {', '.join(sorted(unknown))}")
+
+        return DetectionConfig(version=version, created_by=created_by, **{**self.params(), **updates})
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'DetectionConfig':
+        return cls(
+            version=data.get('version', 0),
+            created_by=data.get('created_by'),
+            created_at=data.get('created_at'),
+            **{field: data.get(field, cls.DEFAULTS[field]) for field in cls.FIELDS}
+        )
+
+    def to_dict(self):
+        return {
+            "version": self.version,
+            **self.params(),
+            "created_by": self.created_by,
+            "created_at": self.created_at
+        }
@@ -1,24 +1,42 @@
 class DetectionResult:
-    def __init__(self, category, confidence, bbox):
+    def __init__(self, category, confidence, bbox, track_id=None):
         self.category = category
         self.confidence = confidence
         self.bbox = bbox
+        self.track_id = track_id
 
     def to_dict(self):
-        return {
+        result = {
             "category": self.category,
             "confidence": self.confidence,
             "bbox": self.bbox
         }
 
+        if self.track_id is not None:
+            result["track_id"] = self.track_id
+
+        return result
+
 
 class DetectionResponse:
-    def __init__(self, detections, image_size):
+    def __init__(self, detections, image_size, inferred=None, config_version=None):
         self.detections = detections
         self.image_size = image_size
+        # 追蹤模式下，標記此幀是否有執行模型推論 (None 表示未啟用追蹤)
+        self.inferred = inferred
+        # 產生此結果的辨識參數版本
+        self.config_version = config_version
 
     def to_dict(self):
-        return {
+        result = {
             "detections": [d.to_dict() for d in self.detections],
             "image_size": self.image_size
-        }
\ No newline at end of file
+        }
+
+        if self.inferred is not None:
+            result["inferred"] = self.inferred
+        
+        if self.config_version is not None:
+            result["config_version"] = self.config_version
+
+        return result
@@ -1,30 +1,62 @@
 from flask import Blueprint
 
-from middlewares import admin_required, log_request
-from controllers import UserController, DailyTrashController, SystemController
+from middlewares import admin_required, log_request, rate_limit
+from controllers import UserController, DailyTrashController, SystemController, DetectionController
 
 admin_blueprint = Blueprint('admin', __name__)
 
 @admin_blueprint.route('users/all', methods=['GET'])
+@rate_limit
 @admin_required
 @log_request
 def get_all_users_info():
     return UserController.get_all_users_info()
 
 @admin_blueprint.route('users/delete_user', methods=['DELETE'])
+@rate_limit
 @admin_required
 @log_request
 def delete_user():
     return UserController.delete_user()
 
 @admin_blueprint.route('trash/all', methods=["GET"])
+@rate_limit
 @admin_required
 @log_request
 def get_all_trash():
     return DailyTrashController.get_all_trash()
 
+@admin_blueprint.route('trash/events', methods=["GET"])
+@rate_limit
+@admin_required
+@log_request
+def get_trash_events():
+    return DailyTrashController.get_trash_events()
+
 @admin_blueprint.route('/system/info', methods=['GET'])
+@rate_limit
 @admin_required
 @log_request
 def get_system_info():
-    return SystemController.get_system_info()
\ No newline at end of file
+    return SystemController.get_system_info()
+
+@admin_blueprint.route('/system/db', methods=['GET'])
+@rate_limit
+@admin_required
+@log_request
+def get_db_stats():
+    return SystemController.get_db_stats()
+
+@admin_blueprint.route('/detection/config', methods=['GET'])
+@rate_limit
+@admin_required
+@log_request
+def get_detection_config():
+    return DetectionController.get_detection_config()
+
+@admin_blueprint.route('/detection/config', methods=['PUT'])
+@rate_limit
+@admin_required
+@log_request
+def update_detection_config():
+    return DetectionController.update_detection_config()
\ No newline at end of file
@@ -1,24 +1,27 @@
 from flask import Blueprint
 
-from middlewares import token_required, log_request
+from middlewares import token_required, log_request, rate_limit
 from controllers import PurchaseController
 
 purchase_blueprint = Blueprint('purchase', __name__)
 
 @purchase_blueprint.route('/purchase_product', methods=['POST'])
 @log_request
+@rate_limit
 @token_required
 def purchase_product(user):
     return PurchaseController.purchase_product(user)
 
 @purchase_blueprint.route('/type', methods=['GET'])
 @log_request
+@rate_limit
 @token_required
 def get_purchase_product_by_type(user):
     return PurchaseController.get_purchase_product_by_type(user)
 
 @purchase_blueprint.route('/', methods=['GET'])
 @log_request
+@rate_limit
 @token_required
 def get_purchase_by_user(user):
     return PurchaseController.get_purchase_by_user(user['_id'])
\ No newline at end of file
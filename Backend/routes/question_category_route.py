@@ -1,30 +1,34 @@
 from flask import Blueprint
 
-from middlewares import token_required, log_request, admin_required
+from middlewares import token_required, log_request, admin_required, rate_limit
 from controllers import QuestionCategoryController
 
 question_category_blueprint = Blueprint('question/category', __name__)
 
 @question_category_blueprint.route('/add_category', methods=['POST'])
 @log_request
+@rate_limit
 @admin_required
 def add_category():
     return QuestionCategoryController.add_category()
 
 @question_category_blueprint.route('/all', methods=['GET'])
 @log_request
+@rate_limit
 @token_required
 def get_categories(user):
     return QuestionCategoryController.get_categories(user)
 
 @question_category_blueprint.route('/delete_category', methods=['DELETE'])
 @log_request
+@rate_limit
 @admin_required
 def delete_category():
     return QuestionCategoryController.delete_category()
 
 @question_category_blueprint.route('/update_category', methods=['PUT'])
 @log_request
+@rate_limit
 @admin_required
 def update_category():
     return QuestionCategoryController.update_category()
\ No newline at end of file
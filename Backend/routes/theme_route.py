@@ -1,36 +1,41 @@
 from flask import Blueprint
 
-from middlewares import admin_required, token_required, log_request
+from middlewares import admin_required, token_required, log_request, rate_limit
 from controllers import ThemeController
 
 theme_blueprint = Blueprint('theme', __name__)
 
 @theme_blueprint.route('/add_theme', methods=['POST'])
 @log_request
+@rate_limit
 @admin_required
 def add_theme():
     return ThemeController.add_theme()
 
 @theme_blueprint.route('/all', methods=['GET'])
 @log_request
+@rate_limit
 @token_required
 def get_all_themes(user):
     return ThemeController.get_all_themes_with_products(user)
 
 @theme_blueprint.route('/<theme_name>', methods=['GET'])
 @log_request
+@rate_limit
 @token_required
 def get_theme(user, theme_name):
     return ThemeController.get_theme(user, theme_name)
 
 @theme_blueprint.route('/delete_theme', methods=['DELETE'])
 @log_request
+@rate_limit
 @admin_required
 def delete_theme():
     return ThemeController.delete_theme()
 
 @theme_blueprint.route('/update_theme', methods=["PUT"])
 @log_request
+@rate_limit
 @admin_required
 def update_theme():
     return ThemeController.update_theme()
\ No newline at end of file
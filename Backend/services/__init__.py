@@ -1,4 +1,7 @@
-from .db_service import DatabaseService
+import importlib
+from .db_service import DatabaseService, get_client, get_pool_stats, close_clients
+from .command_monitor import command_scope, start_command_scope, end_command_scope, current_command_scope, get_command_stats
+from .principal_cache import PrincipalCache, principal_cache, get_principal_cache_stats
 from .auth_service import AuthService
 from .product_service import ProductService
 from .purchase_service import PurchaseService
@@ -10,16 +13,43 @@ from .theme_service import ThemeService
 from .level_service import LevelService
 from .question_service import QuestionService
 from .question_category_service import QuestionCategoryService
-from .detection_service import DetectionService
+from .detection_config_service import DetectionConfigService
 from .email_service import VerificationService
 from .daliy_trash_service import DailyTrashService
 from .system_service import SystemInfo, SystemService
 from .feedback_service import FeedbackService
 from .voucher_service import VoucherService
 from .station_service import StationService
+from .trash_credit_service import TrashCreditService
+from .activity_service import ActivityService
+from .detection_event_service import DetectionEventService
+
+# 辨識相關服務依賴 torch / ultralytics / cv2，只在第一次使用時載入，
+# 只提供 REST API 的程序不會載入這些套件
+_LAZY_IMPORTS = {
+    'DetectionService': '.detection_service',
+    'load_shared_model': '.model_store',
+    'preload_models': '.model_store',
+    'PrecisionService': '.precision_service',
+    'PrecisionModel': '.precision_service',
+    'TrackingService': '.tracking_service',
+    'FrameArchiver': '.frame_archive_service',
+    'ArchivePolicy': '.frame_archive_service'
+}
+
+def __getattr__(name):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
 
 __all__ = [
-    'DatabaseService',
+    'DatabaseService', 'get_client', 'get_pool_stats', 'close_clients',
+    'command_scope', 'start_command_scope', 'end_command_scope', 'current_command_scope', 'get_command_stats',
+    'PrincipalCache', 'principal_cache', 'get_principal_cache_stats',
     'AuthService',
     'PurchaseService',
     'UserService',
@@ -33,10 +63,18 @@ __all__ = [
     'QuestionService',
     'QuestionCategoryService',
     'DetectionService',
+    'DetectionConfigService',
+    'load_shared_model', 'preload_models',
+    'PrecisionService', 'PrecisionModel',
+    'TrackingService',
+    'FrameArchiver', 'ArchivePolicy',
     'VerificationService',
     'DailyTrashService',
     'SystemInfo', 'SystemService',
     'FeedbackService',
     'VoucherService',
-    'StationService'
+    'StationService',
+    'TrashCreditService',
+    'ActivityService',
+    'DetectionEventService'
 ]
\ No newline at end of file
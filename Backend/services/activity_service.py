@@ -0,0 +1,63 @@
+from collections import defaultdict
+from datetime import datetime
+from utils import logger
+from .user_service import UserService
+from .daliy_trash_service import DailyTrashService
+from .background_flusher import BackgroundFlusher
+
+class ActivityService(BackgroundFlusher):
+    """記錄使用者活躍狀態 (write-behind)
+
+    請求只寫入記憶體，定期以 bulk_write 更新 users.last_active；
+    當天第一次活躍的使用者數量由資料庫中的 last_active 判斷後累加到 daily_trash.active_users，
+    不需在請求中掃描 users 重新計算
+    """
+    KEEP_DAYS = 2 # 只保留今天與昨天的已活躍使用者
+
+    def __init__(self, user_service: UserService, daily_trash_service: DailyTrashService, flush_interval: float = 30.0):
+        self._init_flusher(flush_interval)
+        self.user_service = user_service
+        self.daily_trash_service = daily_trash_service
+
+        self.pending = defaultdict(dict) # date -> {user_id: 最後活躍時間}
+        self.active_users = defaultdict(set) # date -> 已計入 active_users 的 user_id
+
+    def record(self, user_id: str):
+        """記錄使用者活躍 (第一次呼叫時啟動背景寫入，多 worker 部署時於 fork 後才建立執行緒)"""
+        now = datetime.now()
+        with self.lock:
+            self.pending[now.strftime("%Y-%m-%d")][str(user_id)] = now
+
+        self._ensure_started()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, defaultdict(dict)
+
+        for date, last_active in sorted(pending.items()):
+            with self.lock:
+                known_active = set(self.active_users.get(date, ()))
+
+            try:
+                first_active = self.user_service.bulk_update_last_active(date, last_active, known_active)
+            except Exception as e:
+                logger.error(f"Flush last active error: {str(e)}")
+                self._requeue(date, last_active)
+                continue
+
+            with self.lock:
+                self.active_users[date].update(last_active)
+                for old_date in sorted(self.active_users)[:-self.KEEP_DAYS]:
+                    del self.active_users[old_date]
+
+            if first_active:
+                try:
+                    self.daily_trash_service._update_active_users(first_active, date)
+                except Exception as e:
+                    logger.error(f"Flush active users error ({date} +{first_active}): {str(e)}")
+
+    def _requeue(self, date: str, last_active: dict):
+        with self.lock:
+            pending = self.pending[date]
+            for user_id, active_at in last_active.items():
+                pending[user_id] = max(active_at, pending.get(user_id, active_at))
@@ -1,6 +1,5 @@
-import bcrypt
 from models import User
-from utils import generate_token, logger
+from utils import generate_token, logger, hash_password, check_password, needs_rehash
 from services import DatabaseService
 
 class AuthService(DatabaseService):
@@ -17,6 +16,10 @@ class AuthService(DatabaseService):
         if not self.verify_password(password, user['password']):
             return None, None
         
+        # BCRYPT_ROUNDS 調整後，以登入時的明文密碼重新計算舊 cost 的雜湊
+        if needs_rehash(user['password']):
+            self._rehash_password(user, password)
+        
         try:
             user_role = user['userRole']
             token = generate_token(str(user['_id']), user_role)
@@ -54,11 +57,20 @@ class AuthService(DatabaseService):
             print(f"Logout error: {str(e)}")
             return False
     def verify_password(self, plain_password, hashed_password):
-        """驗證密碼是否正確"""
-        return bcrypt.checkpw(
-            plain_password.encode('utf-8'),
-            hashed_password.encode('utf-8')
-        )
+        """驗證密碼是否正確 (在密碼執行緒計算，不阻塞其他請求)"""
+        return check_password(plain_password, hashed_password)
+    
+    def _rehash_password(self, user, plain_password):
+        """更新為目前 cost 的雜湊，失敗時保留舊雜湊 (不影響登入)"""
+        try:
+            hashed_password = hash_password(plain_password)
+            self.users.update_one(
+                {"_id": user['_id'], "password": user['password']},
+                {"$set": {"password": hashed_password}}
+            )
+            user['password'] = hashed_password
+        except Exception as e:
+            logger.error(f"Rehash password error: {str(e)}")
 
     def _check_email_exists(self, email):
         """檢查郵箱是否已存在"""
@@ -0,0 +1,52 @@
+import threading
+from abc import ABC, abstractmethod
+
+class BackgroundFlusher(ABC):
+    """先累積在記憶體、再由背景執行緒定期 flush 的服務共用的啟動 / 停止流程
+
+    子類別在 __init__ 呼叫 _init_flusher(flush_interval) 並實作 flush()；
+    stop 時立即喚醒等待中的執行緒並寫入剩餘資料，不需等待一個完整的間隔
+    """
+    def _init_flusher(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+
+        self.running = False
+        self.stop_event = threading.Event()
+        self.flush_thread = None
+
+    def start(self):
+        with self.lock:
+            if self.running:
+                return
+            self.running = True
+            self.stop_event.clear()
+
+        self.flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self.flush_thread.start()
+
+    def stop(self):
+        self.running = False
+        self.stop_event.set()
+        if self.flush_thread:
+            self.flush_thread.join(timeout=self.flush_interval)
+        self.flush()
+
+    @abstractmethod
+    def flush(self):
+        """寫入記憶體中累積的資料 (背景執行緒定期呼叫，stop 時再呼叫一次)"""
+
+    def _ensure_started(self):
+        """第一次記錄時才啟動背景寫入 (多 worker 部署時於 fork 後才建立執行緒)"""
+        if not self.running:
+            self.start()
+
+    def _on_flush_thread_start(self):
+        """背景執行緒開始時執行一次 (子類別可覆寫)"""
+
+    def _flush_loop(self):
+        self._on_flush_thread_start()
+
+        while self.running:
+            self.stop_event.wait(self.flush_interval)
+            self.flush()
@@ -0,0 +1,186 @@
+import contextvars
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from pymongo import monitoring
+from config import Config
+from utils import Histogram, logger, metrics
+
+# 目前的 Flask 請求 / socket 事件 (每個 greenlet / 執行緒各自獨立)
+_current_scope = contextvars.ContextVar('mongo_command_scope', default=None)
+
+class CommandScope:
+    """單一 Flask 請求或 socket 事件中發出的 MongoDB 指令"""
+    __slots__ = ('name', 'commands', 'failures', 'duration_ms', 'collections')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.commands = 0
+        self.failures = 0
+        self.duration_ms = 0.0
+        self.collections = defaultdict(int)
+
+def _filter_shape(value):
+    """將查詢條件中的值以 ? 取代，只保留欄位與運算子 (慢查詢日誌使用，避免記錄使用者資料)"""
+    if isinstance(value, dict):
+        return {key: _filter_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_filter_shape(item) for item in value[:3]]
+
+    return "?"
+
+def _command_filter(command_name: str, command: dict):
+    """取出指令的查詢條件 (update / delete 取第一筆，aggregate 取第一個 stage)"""
+    if command_name == 'find':
+        return command.get('filter')
+    if command_name in ('update', 'delete'):
+        statements = command.get(f"{command_name}s") or [{}]
+        return statements[0].get('q')
+    if command_name in ('findAndModify', 'count', 'distinct'):
+        return command.get('query')
+    if command_name == 'aggregate':
+        return command.get('pipeline', [])[:1]
+
+    return None
+
+class CommandStatsListener(monitoring.CommandListener):
+    """依請求 / socket 事件統計 MongoDB 指令次數與耗時，並記錄慢查詢"""
+    ROUND_TRIP_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+    DB_TIME_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000)
+
+    def __init__(self, slow_ms: float = 0):
+        self.slow_ms = slow_ms
+        self.lock = threading.Lock()
+        self.pending = {} # request_id -> (collection, command)
+        self.routes = defaultdict(self._new_route)
+        self.unattributed = {"commands": 0, "failures": 0, "duration_ms": 0.0, "collections": defaultdict(int)}
+
+    def _new_route(self) -> dict:
+        return {
+            "requests": 0,
+            "commands": 0,
+            "failures": 0,
+            "round_trips": Histogram(self.ROUND_TRIP_BUCKETS),
+            "db_ms": Histogram(self.DB_TIME_BUCKETS_MS),
+            "collections": defaultdict(int)
+        }
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if event.command_name == 'getMore':
+            collection = event.command.get('collection')
+
+        self.pending[event.request_id] = (collection if isinstance(collection, str) else None, event.command)
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed: bool):
+        collection, command = self.pending.pop(event.request_id, (None, {}))
+        duration_ms = event.duration_micros / 1000
+        scope = _current_scope.get()
+
+        if scope is not None:
+            scope.commands += 1
+            scope.failures += int(failed)
+            scope.duration_ms += duration_ms
+            if collection:
+                scope.collections[collection] += 1
+        else:
+            with self.lock:
+                self.unattributed["commands"] += 1
+                self.unattributed["failures"] += int(failed)
+                self.unattributed["duration_ms"] += duration_ms
+                if collection:
+                    self.unattributed["collections"][collection] += 1
+
+        if self.slow_ms and duration_ms >= self.slow_ms:
+            logger.warning(
+                f"Slow MongoDB command: {event.command_name} {event.database_name}.{collection or '-'} "
+                f"{duration_ms:.1f}ms [{scope.name if scope else 'background'}] "
+                f"filter={_filter_shape(_command_filter(event.command_name, command))}"
+            )
+
+    def record(self, scope: CommandScope):
+        with self.lock:
+            route = self.routes[scope.name]
+            route["requests"] += 1
+            route["commands"] += scope.commands
+            route["failures"] += scope.failures
+            for collection, count in scope.collections.items():
+                route["collections"][collection] += count
+
+        route["round_trips"].observe(scope.commands)
+        route["db_ms"].observe(scope.duration_ms)
+
+    def collect_metrics(self) -> list:
+        with self.lock:
+            routes = {name: dict(route) for name, route in self.routes.items()}
+            background = dict(self.unattributed)
+
+        def samples(key):
+            return [({"route": name}, route[key]) for name, route in routes.items()]
+
+        return [
+            ('mongo_route_requests_total', 'counter', "Requests and socket events with MongoDB command tracking", samples("requests")),
+            ('mongo_commands_total', 'counter', "MongoDB commands by route or socket event",
+             samples("commands") + [({"route": "background"}, background["commands"])]),
+            ('mongo_command_failures_total', 'counter', "Failed MongoDB commands by route or socket event",
+             samples("failures") + [({"route": "background"}, background["failures"])]),
+            ('mongo_round_trips_per_request', 'histogram', "MongoDB round trips per request", samples("round_trips")),
+            ('mongo_request_db_seconds', 'histogram', "MongoDB time per request", samples("db_ms"), 0.001)
+        ]
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            routes = {
+                name: {**route, "collections": dict(route["collections"])}
+                for name, route in self.routes.items()
+            }
+            background = {**self.unattributed, "collections": dict(self.unattributed["collections"])}
+
+        return {
+            "slow_ms": self.slow_ms,
+            "routes": {
+                name: {
+                    **route,
+                    "round_trips": route["round_trips"].to_dict(),
+                    "db_ms": route["db_ms"].to_dict()
+                }
+                for name, route in routes.items()
+            },
+            "background": background
+        }
+
+command_stats_listener = CommandStatsListener(Config.MONGO_SLOW_COMMAND_MS)
+metrics.register_collector(command_stats_listener.collect_metrics)
+
+def start_command_scope(name: str):
+    """開始統計目前請求的指令，回傳給 end_command_scope 的 token"""
+    scope = CommandScope(name)
+    return scope, _current_scope.set(scope)
+
+def end_command_scope(token) -> CommandScope:
+    scope, context_token = token
+    _current_scope.reset(context_token)
+    command_stats_listener.record(scope)
+
+    return scope
+
+def current_command_scope():
+    return _current_scope.get()
+
+@contextmanager
+def command_scope(name: str):
+    token = start_command_scope(name)
+    try:
+        yield token[0]
+    finally:
+        end_command_scope(token)
+
+def get_command_stats() -> dict:
+    """各路由 / socket 事件的 MongoDB round trip 次數與耗時分布"""
+    return command_stats_listener.get_stats()
@@ -1,16 +1,89 @@
 from .db_service import DatabaseService
-from typing import Optional
-from datetime import datetime
+from typing import Iterable, Optional, Tuple
+from collections import defaultdict
+from datetime import datetime, date, timedelta
+from pymongo import ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
 from models import DailyTrash
 
+TRASH_TYPES = ('plastic', 'paper', 'cans', 'bottles', 'containers')
+COUNTER_FIELDS = TRASH_TYPES + ('total', 'active_users', 'new_registered')
+# trash_totals 中全體垃圾統計文件的 _id (與 users.trash_stats 同步累加)
+TRASH_TOTALS_ID = "global"
+GRANULARITIES = ('day', 'week', 'month', 'year')
+
+def _parse_date(value: str) -> date:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        raise ValueError(f"日期格式錯誤 (YYYY-MM-DD): {value}")
+
+def _period_start(day: date, granularity: str) -> date:
+    """day 所在區間的第一天 (week 以週一開始)"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    if granularity == 'year':
+        return day.replace(month=1, day=1)
+    return day
+
+def _next_period(start: date, granularity: str) -> date:
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    if granularity == 'month':
+        return (start + timedelta(days=32)).replace(day=1)
+    if granularity == 'year':
+        return start.replace(year=start.year + 1)
+    return start + timedelta(days=1)
+
+def _period_label(start: date, granularity: str) -> str:
+    """區間名稱: 2025-01-06 / 2025-W02 / 2025-01 / 2025"""
+    if granularity == 'week':
+        year, week, _ = start.isocalendar()
+        return f"{year}-W{week:02d}"
+    if granularity == 'month':
+        return start.strftime("%Y-%m")
+    if granularity == 'year':
+        return str(start.year)
+    return start.isoformat()
+
+def _period_boundaries(start: date, end: date, granularity: str) -> list:
+    """$bucket 的邊界 (涵蓋 start ~ end 的每個區間第一天，最後再加上結束後的下一個區間)"""
+    boundary = _period_start(start, granularity)
+    boundaries = [boundary.isoformat()]
+    while boundary <= end:
+        boundary = _next_period(boundary, granularity)
+        boundaries.append(boundary.isoformat())
+    return boundaries
+
+def _empty_bucket() -> dict:
+    return {"days": 0, "start_date": None, "end_date": None, **{field: 0 for field in COUNTER_FIELDS}}
+
+def _merge_bucket(bucket: dict, stats: dict):
+    """將 stats (daily_trash 的 $bucket 結果或月份彙總) 累加到 bucket"""
+    bucket["days"] += stats.get("days", 0)
+    for field in COUNTER_FIELDS:
+        bucket[field] += stats.get(field, 0)
+    
+    if stats.get("start_date") and (bucket["start_date"] is None or stats["start_date"] < bucket["start_date"]):
+        bucket["start_date"] = stats["start_date"]
+    if stats.get("end_date") and (bucket["end_date"] is None or stats["end_date"] > bucket["end_date"]):
+        bucket["end_date"] = stats["end_date"]
+
 class DailyTrashService(DatabaseService):
     def __init__(self, mongo_uri):
         super().__init__(mongo_uri)
         self.users = self.collections['users']
         self.daily_trash = self.collections['daily_trash']
+        self.trash_totals = self.collections['trash_totals']
+        self.rollups = self.collections['daily_trash_rollups']
         
     def _create_daily_trash(self, target_date: Optional[str] = None):
-        """生成指定日期的每日垃圾統計
+        """生成指定日期的每日垃圾統計，並記錄當下的全體垃圾統計 (cumulative)
+        
+        全體統計讀取 trash_totals 的單一文件，不需彙整所有使用者；
+        當天紀錄已由累加建立時只補上 cumulative
         
         Args:
             target_date: 目標日期 (YYYY-MM-DD)，如果為 None 則使用今天
@@ -24,27 +97,25 @@ class DailyTrashService(DatabaseService):
                 target_date = datetime.now().strftime("%Y-%m-%d")
             
             existing_stats = self.daily_trash.find_one({"date": target_date})
-            if existing_stats:
+            if existing_stats and "cumulative" in existing_stats:
                 existing_stats["_id"] = str(existing_stats["_id"])
                 return existing_stats
             
-            total_trash = self._calculate_all_users_trash()
+            daily_trash = DailyTrash(date = target_date).to_dict()
+            daily_trash.pop("date")
             
-            daily_trash = DailyTrash(
-                date = target_date,
-                plastic = total_trash.get("plastic"),
-                paper = total_trash.get("paper"),
-                cans = total_trash.get("cans"),
-                bottles = total_trash.get("bottles"),
-                containers = total_trash.get("containers"),
+            created_stats = self.daily_trash.find_one_and_update(
+                {"date": target_date},
+                {
+                    "$set": {"cumulative": self.get_trash_totals()},
+                    "$setOnInsert": daily_trash
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER
             )
             
-            result = self.daily_trash.insert_one(daily_trash.to_dict())
-            
-            if result.inserted_id:
-                created_stats = self.daily_trash.find_one({"_id": result.inserted_id})
+            if created_stats:
                 created_stats["_id"] = str(created_stats["_id"])
-                
                 return created_stats
 
             return None
@@ -53,8 +124,21 @@ class DailyTrashService(DatabaseService):
             print(f"Create Daily Trash Error: {str(e)}")
             raise
         
+    def _daily_increment(self, date: str, increments: dict) -> tuple:
+        """單一 upsert 的 filter / update：不存在時建立當天紀錄 (其他計數為 0)，並以 $inc 累加
+        
+        date 有 unique 索引，同時 upsert 同一天時由資料庫重試，不會建立重複紀錄
+        """
+        return (
+            {"date": date},
+            {
+                "$inc": increments,
+                "$setOnInsert": {field: 0 for field in COUNTER_FIELDS if field not in increments}
+            }
+        )
+        
     def _update_daily_trash(self, trash_type:str, count: int, target_date: Optional[str] = None):
-        """更新每日垃圾統計中的特定類別數量
+        """更新每日垃圾統計中的特定類別數量 (類別與 total 在同一個 upsert 中累加)
         
         Args:
             trash_type: 垃圾類型 (plastic, paper, cans, bottles, containers)
@@ -68,54 +152,67 @@ class DailyTrashService(DatabaseService):
             if not target_date:
                 target_date = datetime.now().strftime("%Y-%m-%d")
                 
-            valid_types = ['plastic', 'paper', 'cans', 'bottles', 'containers']
-            if trash_type not in valid_types:
+            if trash_type not in TRASH_TYPES:
                 raise ValueError(f"無效的垃圾類型: {trash_type}")
             
-            if not self.daily_trash.find_one({"date": target_date}):
-                self._create_daily_trash(target_date)
-            
             update_result = self.daily_trash.update_one(
-                {"date": target_date},
-                {
-                    "$inc": {trash_type: count},
-                }
+                *self._daily_increment(target_date, {trash_type: count, "total": count}),
+                upsert=True
             )
             
-            if update_result.modified_count > 0:
-                updated_record = self.daily_trash.find_one({"date": target_date})
-                new_total = (
-                    updated_record.get("plastic", 0) +
-                    updated_record.get("paper", 0) +
-                    updated_record.get("cans", 0) +
-                    updated_record.get("bottles", 0) +
-                    updated_record.get("containers", 0)
-                )
-                
-                self.daily_trash.update_one(
-                    {"date": target_date},
-                    {"$set": {"total": new_total}}
-                )
+            return update_result.modified_count > 0 or update_result.upserted_id is not None
+        
+        except Exception as e:
+            print(f"Update Daily Trash Error: {str(e)}")
+            raise
+        
+    def bulk_update_daily_trash(self, increments: Iterable[Tuple[str, str, int]]) -> list:
+        """批次累加多筆 (date, trash_type, count)，同一天合併為一個 upsert，全部以一次 bulk_write 送出
+        
+        Returns:
+            list: 寫入失敗、需重試的 [(date, trash_type, count)] (部分失敗時只包含失敗的日期)
+        """
+        try:
+            by_date = defaultdict(lambda: defaultdict(int))
+            for date, trash_type, count in increments:
+                if trash_type not in TRASH_TYPES:
+                    raise ValueError(f"無效的垃圾類型: {trash_type}")
                 
-                return True
+                by_date[date][trash_type] += count
+                by_date[date]["total"] += count
+            
+            if not by_date:
+                return []
             
-            return False
+            dates = list(by_date)
+            try:
+                self.daily_trash.bulk_write([
+                    UpdateOne(*self._daily_increment(date, dict(by_date[date])), upsert=True)
+                    for date in dates
+                ], ordered=False)
+                return []
+            except BulkWriteError as e:
+                failed_dates = [dates[error["index"]] for error in e.details.get("writeErrors", [])]
+                print(f"Bulk Update Daily Trash Error: {len(failed_dates)} of {len(dates)} days failed")
+                return [
+                    (date, trash_type, count)
+                    for date in failed_dates
+                    for trash_type, count in by_date[date].items()
+                    if trash_type != "total"
+                ]
         
         except Exception as e:
-            print(f"Update Daily Trash Error: {str(e)}")
+            print(f"Bulk Update Daily Trash Error: {str(e)}")
             raise
         
     def _calculate_all_users_trash(self):
+        """彙整所有使用者的 trash_stats (掃描整個 users，只用於核對 trash_totals)"""
         try:
             pipeline = [
                 {
                     "$group": {
                         "_id": None,
-                        "plastic": {"$sum": "$total_trash.plastic"},
-                        "paper": {"$sum": "$total_trash.paper"},
-                        "cans": {"$sum": "$total_trash.cans"},
-                        "bottles": {"$sum": "$total_trash.bottles"},
-                        "containers": {"$sum": "$total_trash.containers"}
+                        **{trash_type: {"$sum": f"$trash_stats.{trash_type}"} for trash_type in TRASH_TYPES}
                     }
                 }
             ]
@@ -127,16 +224,63 @@ class DailyTrashService(DatabaseService):
                 stats.pop("_id", None)
                 return stats
             
+            return {trash_type: 0 for trash_type in TRASH_TYPES}
+        
+        except Exception as e:
+            print(f"Calculate All Users Trash Stats Error: {str(e)}")
+            raise
+        
+    def get_trash_totals(self):
+        """取得全體垃圾統計 (trash_totals 的單一文件)
+        
+        Returns:
+            dict: {trash_type: count}
+        """
+        try:
+            totals = self.trash_totals.find_one({"_id": TRASH_TOTALS_ID}) or {}
+            return {trash_type: totals.get(trash_type, 0) for trash_type in TRASH_TYPES}
+        
+        except Exception as e:
+            print(f"Get Trash Totals Error: {str(e)}")
+            raise
+        
+    def reconcile_trash_totals(self, repair: bool = False):
+        """以所有使用者的 trash_stats 核對 trash_totals
+        
+        repair 時以 $inc 補上差額 (不覆寫核對期間其他請求的累加)；
+        核對期間仍有累加時可能回報短暫的差異，下次核對會再修正
+        
+        Returns:
+            dict: {"totals", "expected", "drift": {trash_type: expected - totals}, "repaired"}
+        """
+        try:
+            totals = self.get_trash_totals()
+            expected = self._calculate_all_users_trash()
+            
+            drift = {
+                trash_type: expected.get(trash_type, 0) - totals[trash_type]
+                for trash_type in TRASH_TYPES
+                if expected.get(trash_type, 0) != totals[trash_type]
+            }
+            
+            repaired = False
+            if drift and repair:
+                self.trash_totals.update_one(
+                    {"_id": TRASH_TOTALS_ID},
+                    {"$inc": drift, "$set": {"updated_at": datetime.now(), "reconciled_at": datetime.now()}},
+                    upsert=True
+                )
+                repaired = True
+            
             return {
-                "plastic": 0,
-                "paper": 0,
-                "cans": 0,
-                "bottles": 0,
-                "containers": 0
+                "totals": totals,
+                "expected": expected,
+                "drift": drift,
+                "repaired": repaired
             }
         
         except Exception as e:
-            print(f"Calculate All Users Trash Stats Error: {str(e)}")
+            print(f"Reconcile Trash Totals Error: {str(e)}")
             raise
         
     def get_daily_trash(self, target_date: str):
@@ -168,77 +312,224 @@ class DailyTrashService(DatabaseService):
             print(f"Auto Generate Daily Stats Error: {str(e)}")
             raise
         
-    def get_all_trash(self):
-        """取得全部統計數據"""
+    # 月份結束後再等待的天數才視為已結束並建立月份彙總 (讓跨日批次寫入的前一天計數先寫完)
+    ROLLUP_GRACE_DAYS = 1
+    MAX_BUCKETS = 2000 # get_all_trash 單次查詢最多的分組數量 (day 約 5 年)
+    
+    def _bucket_stage(self, boundaries: list) -> dict:
+        return {
+            "$bucket": {
+                "groupBy": "$date",
+                "boundaries": boundaries,
+                "output": {
+                    "days": {"$sum": 1},
+                    "start_date": {"$min": "$date"},
+                    "end_date": {"$max": "$date"},
+                    **{field: {"$sum": f"${field}"} for field in COUNTER_FIELDS}
+                }
+            }
+        }
+        
+    def _closed_months(self, start: date, end: date) -> list:
+        """start ~ end 之間完整涵蓋且已結束的月份 (YYYY-MM)"""
+        cutoff = date.today() - timedelta(days=self.ROLLUP_GRACE_DAYS)
+        months = []
+        
+        month = _period_start(start, 'month')
+        if month < start:
+            month = _next_period(month, 'month')
+            
+        while True:
+            month_end = _next_period(month, 'month') - timedelta(days=1)
+            if month_end > end or month_end >= cutoff:
+                break
+            
+            months.append(month.strftime("%Y-%m"))
+            month = _next_period(month, 'month')
+        
+        return months
+    
+    def _get_month_rollups(self, months: list) -> dict:
+        """取得月份彙總，缺少的月份以一次 aggregation 計算後寫入 daily_trash_rollups
+        
+        Returns:
+            dict: {YYYY-MM: 彙總}
+        """
+        if not months:
+            return {}
+        
+        rollups = {rollup["_id"]: rollup for rollup in self.rollups.find({"_id": {"$in": months}})}
+        missing = [month for month in months if month not in rollups]
+        if not missing:
+            return rollups
+        
+        first = _parse_date(f"{missing[0]}-01")
+        last = _next_period(_parse_date(f"{missing[-1]}-01"), 'month') - timedelta(days=1)
+        computed = {
+            bucket["_id"][:7]: bucket
+            for bucket in self.daily_trash.aggregate([
+                {"$match": {"date": {"$gte": first.isoformat(), "$lte": last.isoformat()}}},
+                self._bucket_stage(_period_boundaries(first, last, 'month'))
+            ])
+        }
+        
+        now = datetime.now()
+        operations = []
+        for month in missing:
+            rollup = _empty_bucket()
+            _merge_bucket(rollup, computed.get(month, {}))
+            rollup.update({"_id": month, "computed_at": now})
+            
+            rollups[month] = rollup
+            # 沒有紀錄的月份不寫入，之後有紀錄時仍會重新計算
+            if rollup["days"]:
+                operations.append(ReplaceOne({"_id": month}, rollup, upsert=True))
+        
+        if operations:
+            self.rollups.bulk_write(operations, ordered=False)
+        return rollups
+    
+    def build_month_rollups(self):
+        """建立所有已結束月份的彙總 (已存在的月份不重新計算)
+        
+        Returns:
+            int: 已結束的月份數量
+        """
         try:
-            all_trash = list(self.daily_trash.find().sort("date", 1))
+            # 移除先前寫入的空月份彙總
+            self.rollups.delete_many({"days": 0})
             
-            for trash in all_trash:
-                trash["_id"] = str(trash["_id"])
+            first = self.daily_trash.find_one({}, {"date": 1}, sort=[("date", 1)])
+            if not first:
+                return 0
             
-            if not all_trash:
-                return {
-                    "daily_trash": [],
-                    "summary": {
-                        "total_days": 0,
-                        "date_range": {},
-                        "totals": {
-                            "plastic": 0,
-                            "paper": 0,
-                            "cans": 0,
-                            "bottles": 0,
-                            "containers": 0,
-                            "active_users": 0,
-                            "new_registered": 0
-                        }
-                    }
-                }
-                
-            total_days = len(all_trash)
-            
-            totals = {
-                "plastic": sum(stat.get("plastic", 0) for stat in all_trash),
-                "paper": sum(stat.get("paper", 0) for stat in all_trash),
-                "cans": sum(stat.get("cans", 0) for stat in all_trash),
-                "bottles": sum(stat.get("bottles", 0) for stat in all_trash),
-                "containers": sum(stat.get("containers", 0) for stat in all_trash),
-                "active_users": sum(stat.get("active_users", 0) for stat in all_trash),
-                "new_registered": sum(stat.get("new_registered", 0) for stat in all_trash)
-            }
+            months = self._closed_months(_parse_date(first["date"]), date.today())
+            self._get_month_rollups(months)
             
-            date_range = {
-                "start_date": all_trash[0]["date"],
-                "end_date": all_trash[-1]["date"]
-            }
+            return len(months)
+        
+        except Exception as e:
+            print(f"Build Month Rollups Error: {str(e)}")
+            raise
+        
+    def get_all_trash(self, start_date: Optional[str] = None, end_date: Optional[str] = None, granularity: str = "day"):
+        """取得日期區間內依 granularity (day / week / month / year) 分組的統計與總計
+        
+        以 date 索引篩選後由 aggregation ($bucket) 分組加總，總計由各分組相加；
+        month / year 分組時，區間內完整且已結束的月份直接使用 daily_trash_rollups 的月份彙總；
+        區間先縮小至最早與最新的紀錄之間，分組數量超過 MAX_BUCKETS 時 raise ValueError
+        
+        Args:
+            start_date: 起始日期 (YYYY-MM-DD)，未指定時從最早的紀錄開始
+            end_date: 結束日期 (YYYY-MM-DD，包含)，未指定時到最新的紀錄
+            granularity: 分組單位
+        """
+        try:
+            if granularity not in GRANULARITIES:
+                raise ValueError(f"無效的 granularity: {granularity} (day / week / month / year)")
             
-            summary = {
-                "total_days": total_days,
-                "date_range": date_range,
-                "totals": totals
-            }
+            start = _parse_date(start_date) if start_date else None
+            end = _parse_date(end_date) if end_date else None
             
-            return {
-                "daily_stats": all_trash,
-                "summary": summary
-            }
+            if start and end and start > end:
+                raise ValueError("start_date 不可晚於 end_date")
+            
+            first = self.daily_trash.find_one({}, {"date": 1}, sort=[("date", 1)])
+            last = self.daily_trash.find_one({}, {"date": 1}, sort=[("date", -1)])
+            if not first or not last:
+                return self._trash_stats_result(granularity, [], _empty_bucket())
+            
+            start = max(start, _parse_date(first["date"])) if start else _parse_date(first["date"])
+            end = min(end, _parse_date(last["date"])) if end else _parse_date(last["date"])
+            if start > end:
+                # 區間內沒有紀錄
+                return self._trash_stats_result(granularity, [], _empty_bucket())
+            
+            boundaries = _period_boundaries(start, end, granularity)
+            if len(boundaries) - 1 > self.MAX_BUCKETS:
+                raise ValueError(
+                    f"查詢區間過長 ({len(boundaries) - 1} 個 {granularity}，上限 {self.MAX_BUCKETS})，請縮小區間或使用較大的 granularity"
+                )
+            
+            series_match = {"date": {"$gte": start.isoformat(), "$lte": end.isoformat()}}
+            buckets = {}
+            
+            if granularity in ('month', 'year'):
+                # 完整且已結束的月份使用月份彙總，只彙整其餘日期 (區間頭尾不完整或尚未結束的月份)
+                months = self._closed_months(start, end)
+                for month, rollup in self._get_month_rollups(months).items():
+                    if rollup["days"]:
+                        key = _period_start(_parse_date(f"{month}-01"), granularity).isoformat()
+                        _merge_bucket(buckets.setdefault(key, _empty_bucket()), rollup)
+                
+                if months:
+                    rolled_start = f"{months[0]}-01"
+                    rolled_end = (_next_period(_parse_date(f"{months[-1]}-01"), 'month') - timedelta(days=1)).isoformat()
+                    series_match = {"$or": [
+                        {"date": {"$gte": start.isoformat(), "$lt": rolled_start}},
+                        {"date": {"$gt": rolled_end, "$lte": end.isoformat()}}
+                    ]}
+            
+            for bucket in self.daily_trash.aggregate([
+                {"$match": series_match},
+                self._bucket_stage(boundaries)
+            ]):
+                _merge_bucket(buckets.setdefault(bucket["_id"], _empty_bucket()), bucket)
+            
+            totals = _empty_bucket()
+            for bucket in buckets.values():
+                _merge_bucket(totals, bucket)
+                
+            series = [
+                {"period": _period_label(_parse_date(key), granularity), **buckets[key]}
+                for key in sorted(buckets)
+            ]
+                
+            return self._trash_stats_result(granularity, series, totals)
+        
         except Exception as e:
             print(f"Get All Trash Error: {str(e)}")
             raise
         
+    def _trash_stats_result(self, granularity: str, series: list, totals: dict) -> dict:
+        return {
+            "granularity": granularity,
+            "series": series,
+            "summary": {
+                "total_days": totals["days"],
+                "date_range": {
+                    "start_date": totals["start_date"],
+                    "end_date": totals["end_date"]
+                } if totals["days"] else {},
+                "totals": {field: totals[field] for field in COUNTER_FIELDS}
+            }
+        }
+        
     def _update_new_registered(self):
         try:
             date = datetime.now().strftime("%Y-%m-%d")
             
-            if not self.daily_trash.find_one({"date": date}):
-                self._create_daily_trash(date)
-            
             update_result = self.daily_trash.update_one(
-                {"date": date},
-                {"$inc": {"new_registered": 1}}
+                *self._daily_increment(date, {"new_registered": 1}),
+                upsert=True
             )
             
-            return update_result.modified_count > 0
+            return update_result.modified_count > 0 or update_result.upserted_id is not None
         
         except Exception as e:
             print(f"Update New Registered Error: {str(e)}")
+            raise
+        
+    def _update_active_users(self, count: int, date: str):
+        """累加當天第一次活躍的使用者數量"""
+        try:
+            update_result = self.daily_trash.update_one(
+                *self._daily_increment(date, {"active_users": count}),
+                upsert=True
+            )
+            
+            return update_result.modified_count > 0 or update_result.upserted_id is not None
+        
+        except Exception as e:
+            print(f"Update Active Users Error: {str(e)}")
             raise
\ No newline at end of file
@@ -1,9 +1,131 @@
-from pymongo import MongoClient
+import threading
+from collections import defaultdict
+from pymongo import MongoClient, monitoring
 from config import Config
+from utils import Histogram, metrics
+from .command_monitor import command_stats_listener
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """統計連線池使用狀況 (依伺服器位址)"""
+    WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pools = defaultdict(self._new_pool)
+
+    def _new_pool(self) -> dict:
+        return {
+            "open": 0,
+            "in_use": 0,
+            "checkouts": 0,
+            "checkout_failures": 0,
+            "cleared": 0,
+            "wait_ms": Histogram(self.WAIT_BUCKETS_MS)
+        }
+
+    def _update(self, address, **changes):
+        with self.lock:
+            pool = self.pools[f"{address[0]}:{address[1]}"]
+            for key, value in changes.items():
+                pool[key] += value
+            return pool
+
+    def pool_created(self, event):
+        self._update(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._update(event.address, cleared=1)
+
+    def pool_closed(self, event):
+        with self.lock:
+            self.pools.pop(f"{event.address[0]}:{event.address[1]}", None)
+
+    def connection_created(self, event):
+        self._update(event.address, open=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._update(event.address, open=-1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._update(event.address, checkout_failures=1)
+
+    def connection_checked_out(self, event):
+        pool = self._update(event.address, in_use=1, checkouts=1)
+        if event.duration is not None:
+            pool["wait_ms"].observe(event.duration * 1000)
+
+    def connection_checked_in(self, event):
+        self._update(event.address, in_use=-1)
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            pools = {address: dict(pool) for address, pool in self.pools.items()}
+
+        return {
+            address: {**pool, "wait_ms": pool["wait_ms"].to_dict()}
+            for address, pool in pools.items()
+        }
+
+    def collect_metrics(self) -> list:
+        with self.lock:
+            pools = {address: dict(pool) for address, pool in self.pools.items()}
+
+        def samples(key):
+            return [({"address": address}, pool[key]) for address, pool in pools.items()]
+
+        return [
+            ('mongo_pool_connections_open', 'gauge', "Open connections in the MongoDB pool", samples("open")),
+            ('mongo_pool_connections_in_use', 'gauge', "Checked out connections in the MongoDB pool", samples("in_use")),
+            ('mongo_pool_checkouts_total', 'counter', "Connection checkouts", samples("checkouts")),
+            ('mongo_pool_checkout_failures_total', 'counter', "Failed connection checkouts", samples("checkout_failures")),
+            ('mongo_pool_cleared_total', 'counter', "Times the pool was cleared", samples("cleared")),
+            ('mongo_pool_checkout_wait_seconds', 'histogram', "Time waited for a pooled connection", samples("wait_ms"), 0.001)
+        ]
+
+# 整個程序共用的 MongoClient (mongo_uri -> MongoClient)，每個 client 各自維護連線池與監控執行緒
+_clients = {}
+_clients_lock = threading.Lock()
+pool_stats_listener = PoolStatsListener()
+metrics.register_collector(pool_stats_listener.collect_metrics)
+
+def get_client(mongo_uri: str) -> MongoClient:
+    with _clients_lock:
+        client = _clients.get(mongo_uri)
+        if client is None:
+            client = MongoClient(mongo_uri, event_listeners=[pool_stats_listener, command_stats_listener], **Config.get_mongo_client_options())
+            _clients[mongo_uri] = client
+
+        return client
+
+def get_pool_stats() -> dict:
+    """連線池設定與使用狀況 (提供給系統監控)"""
+    with _clients_lock:
+        clients = len(_clients)
+
+    return {
+        "clients": clients,
+        "options": Config.get_mongo_client_options(),
+        "pools": pool_stats_listener.get_stats()
+    }
+
+def close_clients():
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
 
 class DatabaseService:
     def __init__(self, mongo_uri, db_name=Config.DB_NAME):
-        self.client = MongoClient(mongo_uri)
+        self.client = get_client(mongo_uri)
         self.db = self.client[db_name]
         
         self.collections = {
@@ -18,12 +140,18 @@ class DatabaseService:
             'question_categories': self.db.question_categories,
             'verifications': self.db.verifications,
             'daily_trash': self.db.daily_trash,
+            'trash_totals': self.db.trash_totals,
+            'daily_trash_rollups': self.db.daily_trash_rollups,
             'feedbacks': self.db.feedbacks,
             'voucher_types': self.db.voucher_types,
             'vouchers': self.db.vouchers,
             'station_types': self.db.station_types,
-            'stations': self.db.stations
+            'stations': self.db.stations,
+            'rate_limits': self.db.rate_limits,
+            'detection_configs': self.db.detection_configs,
+            'detection_runtimes': self.db.detection_runtimes,
+            'detection_events': self.db.detection_events
         }
     
     def get_collection(self, collection_name):
-        return self.collections.get(collection_name)
\ No newline at end of file
+        return self.collections.get(collection_name)
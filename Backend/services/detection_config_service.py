@@ -0,0 +1,165 @@
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from pymongo import DESCENDING
+from pymongo.errors import DuplicateKeyError
+from models import DetectionConfig
+from utils import logger
+from .db_service import DatabaseService
+
+class DetectionConfigService(DatabaseService):
+    """辨識參數的版本紀錄，最新版本即為目前使用的參數
+
+    API 與 Socket 伺服器可能在不同程序，辨識端以輪詢最新版本的方式同步；
+    辨識端同步時一併將模型限制 (例如 int8 模型固定的 imgsz) 寫入 detection_runtimes，
+    發佈新版本前先以此檢查，目前的模型不支援的參數不會寫入
+    """
+    RUNTIME_TTL_INTERVALS = 3 # 超過幾個同步間隔未更新的辨識程序視為已停止
+
+    def __init__(self, mongo_uri: str):
+        super().__init__(mongo_uri)
+        self.detection_configs = self.collections['detection_configs']
+        self.detection_runtimes = self.collections['detection_runtimes']
+        self.index_ready = False
+        self.runtime_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self.watching = False
+        self.interval = 5.0
+        self.watch_thread = None
+        self.rejected_version = None
+
+    def get_latest(self) -> Optional[DetectionConfig]:
+        try:
+            config = self.detection_configs.find_one({}, {'_id': 0}, sort=[('version', DESCENDING)])
+            return DetectionConfig.from_dict(config) if config else None
+        except Exception as e:
+            print(f"Get latest detection config error: {str(e)}")
+            raise
+
+    def get_history(self, limit: int = 20) -> list:
+        try:
+            return list(self.detection_configs.find({}, {'_id': 0}).sort('version', DESCENDING).limit(limit))
+        except Exception as e:
+            print(f"Get detection config history error: {str(e)}")
+            raise
+
+    def publish(self, updates: dict, created_by: str = None,
+                validate: Optional[Callable[[DetectionConfig], None]] = None) -> DetectionConfig:
+        """以最新版本為基礎建立新版本 (version 唯一索引確保同時更新時不會重複)
+
+        寫入前確認執行中的辨識程序都支援新版本，不支援時 raise ValueError 且不寫入
+
+        Args:
+            validate: 與辨識服務同一程序時傳入 DetectionService.check_config，直接以目前的模型檢查
+        """
+        try:
+            # 於第一次寫入時建立索引，避免 import controller 時就連線資料庫
+            if not self.index_ready:
+                self.detection_configs.create_index('version', unique=True)
+                self.index_ready = True
+
+            for _ in range(3):
+                latest = self.get_latest() or DetectionConfig()
+                config = latest.updated(updates, latest.version + 1, created_by)
+                self.check_runtimes(config)
+                if validate:
+                    validate(config)
+
+                try:
+                    self.detection_configs.insert_one(config.to_dict())
+                    return config
+                except DuplicateKeyError:
+                    continue
+
+            raise RuntimeError("Detection config version conflict")
+        except Exception as e:
+            print(f"Publish detection config error: {str(e)}")
+            raise
+
+    def check_runtimes(self, config: DetectionConfig):
+        """確認執行中的辨識程序 (可能在其他程序) 的模型支援此參數，不支援時 raise ValueError"""
+        runtimes = self.detection_runtimes.find(
+            {"expire_at": {"$gt": datetime.now()}, "fixed_imgsz": {"$ne": None}},
+            {"precision": 1, "fixed_imgsz": 1}
+        )
+        for runtime in runtimes:
+            if config.imgsz != runtime["fixed_imgsz"]:
+                raise ValueError(f"{runtime['precision']} 模型的 imgsz 固定為 {runtime['fixed_imgsz']} ({runtime['_id']})")
+
+    def get_runtimes(self) -> list:
+        """執行中的辨識程序與實際使用的推論精度"""
+        try:
+            return [
+                {"id": runtime["_id"], "precision": runtime.get("precision"), "fixed_imgsz": runtime.get("fixed_imgsz")}
+                for runtime in self.detection_runtimes.find({"expire_at": {"$gt": datetime.now()}}).sort("_id", 1)
+            ]
+        except Exception as e:
+            print(f"Get detection runtimes error: {str(e)}")
+            raise
+
+    def start_watching(self, detection_service, interval: float = 5.0):
+        """啟動時套用最新版本，之後定期同步"""
+        if self.watching:
+            return
+
+        self.interval = interval
+        self._sync(detection_service)
+
+        self.watching = True
+        self.watch_thread = threading.Thread(target=self._watch_loop, args=(detection_service, interval), daemon=True)
+        self.watch_thread.start()
+
+    def stop_watching(self):
+        self.watching = False
+        try:
+            self.detection_runtimes.delete_one({"_id": self.runtime_id})
+        except Exception as e:
+            logger.error(f"Remove detection runtime error: {str(e)}")
+
+    def _register_runtime(self, detection_service):
+        """記錄此程序的模型限制，於 RUNTIME_TTL_INTERVALS 個同步間隔後過期 (TTL 索引刪除)"""
+        try:
+            self.detection_runtimes.update_one(
+                {"_id": self.runtime_id},
+                {"$set": {
+                    "precision": detection_service.precision,
+                    "fixed_imgsz": detection_service.fixed_imgsz,
+                    "expire_at": datetime.now() + timedelta(seconds=self.interval * self.RUNTIME_TTL_INTERVALS)
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Register detection runtime error: {str(e)}")
+
+    def _sync(self, detection_service):
+        self._register_runtime(detection_service)
+
+        try:
+            config = self.get_latest()
+        except Exception as e:
+            # 資料庫錯誤，或最新版本的內容無法通過 DetectionConfig 驗證
+            logger.error(f"Sync detection config error: {str(e)}")
+            return
+
+        if not config or config.version <= detection_service.config.version or config.version == self.rejected_version:
+            return
+
+        try:
+            detection_service.apply_config(config)
+        except ValueError as e:
+            # 目前的模型不支援此版本 (例如 int8 模型的 imgsz 固定)，同一版本只記錄一次
+            self.rejected_version = config.version
+            logger.warning(f"Detection config v{config.version} rejected: {str(e)}")
+        except Exception as e:
+            logger.error(f"Apply detection config error: {str(e)}")
+
+    def _watch_loop(self, detection_service, interval: float):
+        while self.watching:
+            time.sleep(interval)
+            try:
+                self._sync(detection_service)
+            except Exception as e:
+                logger.error(f"Watch detection config error: {str(e)}")
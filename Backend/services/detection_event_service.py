@@ -0,0 +1,204 @@
+from datetime import datetime, timedelta
+from typing import Optional
+from pymongo.errors import BulkWriteError
+from utils import logger, ensure_timeseries_collections
+from .db_service import DatabaseService
+from .daliy_trash_service import TRASH_TYPES
+from .background_flusher import BackgroundFlusher
+
+class DetectionEventService(DatabaseService, BackgroundFlusher):
+    """辨識 / 回收事件的歷史紀錄 (detection_events time-series 集合)
+
+    每次計入回收數量 (socket 辨識串流或 REST 回報) 時記錄一筆事件 (類別、信心度、使用者、回收站)，
+    事件先累積在記憶體，再定期以 insert_many 批次寫入，超過 max_pending 筆時捨棄新事件；
+    查詢以 ts 範圍 (與 meta 欄位) 篩選後依小時 / 天分組，不需掃描使用者資料
+    """
+    INTERVALS = {'hour': timedelta(hours=1), 'day': timedelta(days=1)}
+    MAX_BUCKETS = 2000 # 單次查詢最多的分組數量 (hour 約 83 天)
+
+    def __init__(self, mongo_uri, flush_interval: float = 5.0, max_pending: int = 10000):
+        super().__init__(mongo_uri)
+        self._init_flusher(flush_interval)
+        self.events = self.collections['detection_events']
+        self.max_pending = max_pending
+
+        self.pending = [] # 尚未寫入的事件
+        self.written = 0
+        self.dropped = 0
+
+    def record(self, user_id: str, category: str, confidence: Optional[float] = None,
+               station_id: Optional[str] = None, source: str = 'detection', count: int = 1):
+        """記錄一筆事件 (第一次呼叫時啟動背景寫入，多 worker 部署時於 fork 後才建立執行緒)
+
+        Args:
+            category: trash_stats 類別 (plastic, paper, cans, bottles, containers)
+            confidence: 辨識信心度 (REST 回報時為 None)
+            source: detection (辨識串流) / submission (REST 回報)
+            count: 數量 (REST 回報一次可包含多個)
+        """
+        event = {
+            "ts": datetime.now(),
+            "meta": {
+                "category": category,
+                "user_id": str(user_id),
+                "station_id": str(station_id) if station_id else None,
+                "source": source
+            },
+            "count": count,
+            "confidence": confidence
+        }
+
+        with self.lock:
+            if len(self.pending) >= self.max_pending:
+                self.dropped += 1
+            else:
+                self.pending.append(event)
+
+        self._ensure_started()
+
+    def flush(self) -> int:
+        """寫入記憶體中的事件，回傳寫入筆數 (失敗的事件放回佇列等待下次寫入)"""
+        with self.lock:
+            pending, self.pending = self.pending, []
+
+        if not pending:
+            return 0
+
+        try:
+            self.events.insert_many(pending, ordered=False)
+            written = len(pending)
+            failed = []
+        except BulkWriteError as e:
+            failed_indexes = {error["index"] for error in e.details.get("writeErrors", [])}
+            failed = [event for index, event in enumerate(pending) if index in failed_indexes]
+            written = len(pending) - len(failed)
+            logger.error(f"Flush detection events error: {len(failed)} of {len(pending)} failed")
+        except Exception as e:
+            failed = pending
+            written = 0
+            logger.error(f"Flush detection events error: {str(e)}")
+
+        with self.lock:
+            self.written += written
+            if failed:
+                # 失敗的事件排在新事件之前，超過上限的部分捨棄
+                requeued = failed + self.pending
+                self.dropped += max(len(requeued) - self.max_pending, 0)
+                self.pending = requeued[:self.max_pending]
+
+        return written
+
+    def get_histogram(self, start_date: Optional[str] = None, end_date: Optional[str] = None, interval: str = 'hour',
+                      category: Optional[str] = None, user_id: Optional[str] = None, station_id: Optional[str] = None):
+        """依小時 / 天統計事件數量 (沒有事件的區間數量為 0)
+
+        Args:
+            start_date: 起始日期 (YYYY-MM-DD)，hour 預設為 end_date 當天，day 預設為 end_date 前 29 天
+            end_date: 結束日期 (YYYY-MM-DD，包含)，預設為今天
+            interval: hour / day
+            category / user_id / station_id: 篩選條件
+
+        Returns:
+            dict: {"interval", "series": [{"start", "count", "events", "avg_confidence", 各類別數量}], "totals"}
+        """
+        try:
+            if interval not in self.INTERVALS:
+                raise ValueError(f"無效的 interval: {interval} (hour / day)")
+
+            if category is not None and category not in TRASH_TYPES:
+                raise ValueError(f"無效的垃圾類型: {category}")
+
+            end = self._parse_date(end_date) if end_date else datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            if start_date:
+                start = self._parse_date(start_date)
+            else:
+                start = end if interval == 'hour' else end - timedelta(days=29)
+
+            if start > end:
+                raise ValueError("start_date 不可晚於 end_date")
+
+            step = self.INTERVALS[interval]
+            end = end + timedelta(days=1)
+            buckets = int((end - start) / step)
+            if buckets > self.MAX_BUCKETS:
+                raise ValueError(f"查詢區間過長 ({buckets} 個 {interval}，上限 {self.MAX_BUCKETS})")
+
+            boundaries = [start + step * index for index in range(buckets + 1)]
+
+            query = {"ts": {"$gte": start, "$lt": end}}
+            if user_id:
+                query["meta.user_id"] = str(user_id)
+            if station_id:
+                query["meta.station_id"] = str(station_id)
+            if category:
+                query["meta.category"] = category
+
+            results = {
+                bucket["_id"]: bucket
+                for bucket in self.events.aggregate([
+                    {"$match": query},
+                    {"$bucket": {
+                        "groupBy": "$ts",
+                        "boundaries": boundaries,
+                        "output": {
+                            "count": {"$sum": "$count"},
+                            "events": {"$sum": 1},
+                            "avg_confidence": {"$avg": "$confidence"},
+                            **{
+                                trash_type: {"$sum": {"$cond": [{"$eq": ["$meta.category", trash_type]}, "$count", 0]}}
+                                for trash_type in TRASH_TYPES
+                            }
+                        }
+                    }}
+                ])
+            }
+
+            series = []
+            totals = {"count": 0, "events": 0, **{trash_type: 0 for trash_type in TRASH_TYPES}}
+            for boundary in boundaries[:-1]:
+                bucket = results.get(boundary, {})
+                point = {
+                    "start": boundary.isoformat(),
+                    "count": bucket.get("count", 0),
+                    "events": bucket.get("events", 0),
+                    "avg_confidence": round(bucket["avg_confidence"], 4) if bucket.get("avg_confidence") is not None else None,
+                    **{trash_type: bucket.get(trash_type, 0) for trash_type in TRASH_TYPES}
+                }
+                series.append(point)
+
+                for field in totals:
+                    totals[field] += point[field]
+
+            return {
+                "interval": interval,
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                "series": series,
+                "totals": totals
+            }
+
+        except Exception as e:
+            print(f"Get Detection Event Histogram Error: {str(e)}")
+            raise
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                "pending": len(self.pending),
+                "written": self.written,
+                "dropped": self.dropped
+            }
+
+    @staticmethod
+    def _parse_date(value: str) -> datetime:
+        try:
+            return datetime.strptime(value, "%Y-%m-%d")
+        except (TypeError, ValueError):
+            raise ValueError(f"日期格式錯誤 (YYYY-MM-DD): {value}")
+
+    def _on_flush_thread_start(self):
+        # 寫入前確認集合已建立為 time-series (只提供即時辨識的程序不會執行 ensure_indexes)
+        try:
+            ensure_timeseries_collections(self.db)
+        except Exception as e:
+            logger.error(f"Ensure detection events collection error: {str(e)}")
@@ -1,23 +1,33 @@
-from typing import Any, Dict, List
+import threading
+import time
+from typing import Any, Dict, List, Optional, Union
 import cv2
 import numpy as np
-from ultralytics import YOLO
-from models import DetectionResult, DetectionResponse
+from config import Config
+from models import DetectionResult, DetectionResponse, DetectionConfig
+from utils import logger, Histogram, box_iou
+from .precision_service import PrecisionService
+from .model_store import load_shared_model
 import base64
 from pathlib import Path
 
 class DetectionService:
-    def __init__(self):
+    LATENCY_BUCKETS_MS = (25, 50, 100, 200, 400, 800, 1600)
+    DETECTION_BUCKETS = (0, 1, 2, 3, 5, 8)
+    MAX_STATS_VERSIONS = 10
+    
+    def __init__(self, frame_archiver=None, precision: str = 'fp32', calibration_dir=None, min_agreement: float = 0.95):
         self.model = None
-        self.confidence_threshold = 0.85
-        self.iou_threshold = 0.7
         
-        self.aggregation_mode = 'noisy_or' # Options: 'noisy_or', 'max', 'lse', 'sum', or None
-        self.agg_iou_threshold = 0.4
-        self.agg_lse_r = 4.0
+        # 辨識參數 (confidence / iou / aggregation_mode / agg_iou / agg_lse_r / imgsz)
+        # 以 apply_config 整組替換，每次辨識開始時取用當下的版本
+        # aggregation_mode options: 'noisy_or', 'max', 'lse', 'sum', or None
+        self.config = DetectionConfig()
+        self.config_lock = threading.Lock()
+        self.stats = {} # config version -> {"latency_ms": Histogram, "detections": Histogram}
         
         self.dir = Path(__file__).resolve().parent
-        self.model_version = "yolov11l"
+        self.model_version = Config.DETECTION_MODEL_VERSION
         
         self.child_to_parent_name_map = {
             'can': 'can',
@@ -34,19 +44,67 @@ class DetectionService:
         }
         
         self.parent_names = ['plastic', 'paper', 'can', 'container', 'plasticbottle']
+        
+        # 保存低置信度等樣本以供重新標註 (FrameArchiver，非阻塞)
+        self.frame_archiver = frame_archiver
+        if frame_archiver and frame_archiver.parent_names is None:
+            frame_archiver.parent_names = self.parent_names
        
         self._load_model()
         self._build_class_mapping()
         
+        # 低精度推論 (bf16 / int8)，需通過與 fp32 的一致率檢查才會啟用
+        self.precision = 'fp32'
+        self.precision_report = None
+        self.fixed_imgsz = None # int8 的 ONNX 模型為固定輸入尺寸
+        if precision != 'fp32':
+            self._enable_precision(precision, calibration_dir, min_agreement)
+        
+    @staticmethod
+    def model_path_for(model_version: str) -> Path:
+        return Path(__file__).resolve().parent.parent / "detect_models" / f"{model_version}.pt"
+    
     def _load_model(self):
         """載入YOLO模型"""
         try:
-            model_path = self.dir.parent / "detect_models" / f"{self.model_version}.pt"
-            self.model = YOLO(model_path)
+            self.model = load_shared_model(self.model_path_for(self.model_version))
         except Exception as e:
             print(f"Error loading YOLO model: {str(e)}")
             raise e
     
+    def _enable_precision(self, precision: str, calibration_dir, min_agreement: float):
+        """建立低精度模型並與 fp32 比對，一致率不足時維持 fp32"""
+        precision_service = PrecisionService(
+            model_path=self.model_path_for(self.model_version),
+            imgsz=self.config.imgsz,
+            calibration_dir=calibration_dir,
+            min_agreement=min_agreement
+        )
+        
+        try:
+            candidate = precision_service.build(precision)
+            report = precision_service.verify(self, candidate)
+        except Exception as e:
+            logger.error(f"Precision {precision} not enabled: {str(e)}")
+            return
+        
+        self.precision_report = report
+        if report["agreement"] < min_agreement:
+            logger.warning(
+                f"Precision {precision} refused: agreement {report['agreement']:.3f} < {min_agreement} "
+                f"on {report['frames']} frames"
+            )
+            return
+        
+        self.model = candidate
+        self.precision = precision
+        if precision.startswith('int8'):
+            self.fixed_imgsz = self.config.imgsz
+        logger.info(
+            f"Precision {precision} enabled: agreement {report['agreement']:.3f}, "
+            f"{report['fp32_ms']:.1f}ms -> {report['candidate_ms']:.1f}ms per frame"
+        )
+    
     def _build_class_mapping(self):
         """建立類別映射表 (11 -> 5)"""
         try:
@@ -66,42 +124,148 @@ class DetectionService:
             print(f"Error building class mapping: {str(e)}")
             raise e
     
-    def detect_objects(self, image_base64: str) -> DetectionResponse:
+    def detect_objects(self, image_data: Union[str, bytes]) -> DetectionResponse:
         """
         辨識圖像中的物體
         Args:
-            image_base64: base64編碼的圖像
+            image_data: base64編碼的圖像，或原始圖檔 bytes (msgpack 連線)
         Returns:
             DetectionResponse: 辨識結果
         """
         try:
-            # 解碼base64圖像
-            image = self._decode_base64_image(image_base64)
+            config = self.config
+            start = time.perf_counter()
+            
+            # 解碼圖像
+            image = self._decode_image(image_data)
+            
+            # 保存幀的策略需要未達 confidence_threshold 的框 (模型不確定的樣本)，推論時改用策略區間的下限，
+            # 回傳結果仍只由達到門檻的框聚合而成
+            predict_conf = config.confidence_threshold
+            if self.frame_archiver:
+                predict_conf = min(predict_conf, self.frame_archiver.policy.confidence_band[0])
             
             # 執行辨識
-            iou_for_predict = 0.95 if self.aggregation_mode else self.iou_threshold # 聚合模式 iou 調整至 95 %
-            results = self.model.predict(
-                source=image, 
-                verbose=False,
-                augment=False,
-                imgsz=896,
-                conf=self.confidence_threshold,
-                iou=iou_for_predict
-            )
+            results = self._predict(image, predict_conf, self._predict_iou(config), config.imgsz)
+            boxes = results[0].boxes if results else []
+            
+            uncertain = []
+            if predict_conf < config.confidence_threshold and len(boxes):
+                accepted = boxes.conf >= config.confidence_threshold
+                uncertain = self._uncertain_results(boxes[~accepted])
+                boxes = boxes[accepted]
             
             # 處理結果
-            detections = self._process_and_aggregate_results(results, image.shape)
+            detections = self._process_boxes(boxes, image.shape, config)
             
             # 獲取圖像尺寸
             height, width = image.shape[:2]
             image_size = {"width": width, "height": height}
             
-            return DetectionResponse(detections, image_size)
+            detection_response = DetectionResponse(detections, image_size, config_version=config.version)
+            self._record_stats(config.version, (time.perf_counter() - start) * 1000, len(detections))
+            
+            if self.frame_archiver:
+                self.frame_archiver.submit(image, detection_response, uncertain)
+            
+            return detection_response
         
         except Exception as e:
             print(f"Detection error: {str(e)}")
             raise e
         
+    def check_config(self, config: DetectionConfig):
+        """確認目前的模型支援此參數，不支援時 raise ValueError"""
+        if self.fixed_imgsz and config.imgsz != self.fixed_imgsz:
+            raise ValueError(f"{self.precision} 模型的 imgsz 固定為 {self.fixed_imgsz}")
+    
+    def apply_config(self, config: DetectionConfig) -> bool:
+        """替換辨識參數，進行中的辨識繼續使用原本的版本；忽略不比目前新的版本"""
+        self.check_config(config)
+        
+        with self.config_lock:
+            if config.version <= self.config.version:
+                return False
+            
+            self.config = config
+        
+        logger.info(f"Detection config v{config.version} applied: {config.params()}")
+        return True
+    
+    def _record_stats(self, version: int, latency_ms: float, detection_count: int):
+        with self.config_lock:
+            stats = self.stats.get(version)
+            if stats is None:
+                stats = self.stats[version] = {
+                    "latency_ms": Histogram(self.LATENCY_BUCKETS_MS),
+                    "detections": Histogram(self.DETECTION_BUCKETS)
+                }
+                
+                # 只保留最近幾個版本
+                for old_version in sorted(self.stats)[:-self.MAX_STATS_VERSIONS]:
+                    del self.stats[old_version]
+        
+        stats["latency_ms"].observe(latency_ms)
+        stats["detections"].observe(detection_count)
+    
+    def collect_metrics(self) -> list:
+        """metrics collector: 各參數版本的辨識延遲與每幀辨識數量"""
+        with self.config_lock:
+            stats = dict(self.stats)
+        
+        return [
+            ('detection_latency_seconds', 'histogram', "Detection latency per frame by config version",
+             [({"version": str(version)}, histograms["latency_ms"]) for version, histograms in stats.items()], 0.001),
+            ('detection_objects_per_frame', 'histogram', "Detections per frame by config version",
+             [({"version": str(version)}, histograms["detections"]) for version, histograms in stats.items()])
+        ]
+        
+    def get_stats(self) -> dict:
+        """各參數版本的延遲與每幀辨識數量分布"""
+        with self.config_lock:
+            stats = dict(self.stats)
+        
+        configs = {}
+        for version, histograms in sorted(stats.items()):
+            detections = histograms["detections"].to_dict()
+            frames = detections["count"]
+            
+            configs[str(version)] = {
+                "frames": frames,
+                "latency_ms": histograms["latency_ms"].to_dict(),
+                "detections": detections,
+                # 至少有一個辨識結果的幀比例
+                "detection_rate": 1 - detections["counts"][0] / frames if frames else 0.0
+            }
+        
+        return {
+            "current_version": self.config.version,
+            "configs": configs
+        }
+        
+    def _predict_iou(self, config: Optional[DetectionConfig] = None) -> float:
+        """聚合模式 iou 調整至 95 %，保留重疊框交給聚合處理"""
+        config = config or self.config
+        return 0.95 if config.aggregation_mode else config.iou_threshold
+        
+    def _predict(self, image, conf: float, iou: float, imgsz: Optional[int] = None):
+        """執行模型推論"""
+        return self.model.predict(
+            source=image, 
+            verbose=False,
+            augment=False,
+            imgsz=imgsz or self.config.imgsz,
+            conf=conf,
+            iou=iou
+        )
+        
+    def _decode_image(self, image_data: Union[str, bytes]):
+        """解碼圖像 (base64 字串或原始 bytes)"""
+        if isinstance(image_data, (bytes, bytearray, memoryview)):
+            return self._decode_image_bytes(image_data)
+        
+        return self._decode_base64_image(image_data)
+        
     def _decode_base64_image(self, image_base64: str):
         """解碼base64圖像"""
         try:
@@ -111,28 +275,41 @@ class DetectionService:
             
             # 解碼
             image_data = base64.b64decode(image_base64)
-            nparr = np.frombuffer(image_data, np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            return image
+            return self._decode_image_bytes(image_data)
         except Exception as e:
             raise ValueError(f"Invalid base64 image: {str(e)}")
         
-    def _process_and_aggregate_results(self, results, image_shape) -> List[DetectionResult]:
+    def _decode_image_bytes(self, image_data: bytes):
+        """解碼原始圖檔 bytes"""
+        nparr = np.frombuffer(image_data, np.uint8)
+        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        
+        if image is None:
+            raise ValueError("Invalid image data")
+        
+        return image
+        
+    def _process_and_aggregate_results(self, results, image_shape, config: Optional[DetectionConfig] = None) -> List[DetectionResult]:
         """處理並聚合YOLO辨識結果"""
-        if not results or len(results[0].boxes) == 0:
+        if not results:
             return []
         
-        boxes = results[0].boxes
+        return self._process_boxes(results[0].boxes, image_shape, config)
+    
+    def _process_boxes(self, boxes, image_shape, config: Optional[DetectionConfig] = None) -> List[DetectionResult]:
+        """聚合並過濾單張圖像的辨識框"""
+        if len(boxes) == 0:
+            return []
         
-        aggregated_results = self._aggregate_boxes(boxes)
+        config = config or self.config
+        aggregated_results = self._aggregate_boxes(boxes, config)
         
         detections = []
         for box_data in aggregated_results:
             conf = float(box_data["conf"])
             
             # 過濾低置信度結果
-            if conf < self.confidence_threshold:
+            if conf < config.confidence_threshold:
                 continue
             
             # 檢查面積閾值
@@ -157,9 +334,33 @@ class DetectionService:
         
         return detections
     
-    def _aggregate_boxes(self, boxes) -> List[Dict[str, Any]]:
-        if self.aggregation_mode is None or not len(boxes):
-            return [{"xyxy": box.xyxy[0], "conf": box.conf[0], "cls": box.cls[0]} for box in boxes]
+    def _uncertain_results(self, boxes) -> List[DetectionResult]:
+        """未達 confidence_threshold 的原始框 (子類別映射為父類別，不聚合)，只供 FrameArchiver 判斷是否保存"""
+        uncertain = []
+        for box in boxes:
+            parent_cls_id = self.child_to_parent_id_map.get(int(box.cls[0]))
+            if parent_cls_id is None:
+                continue
+            
+            uncertain.append(DetectionResult(
+                category=self.parent_names[parent_cls_id],
+                confidence=round(float(box.conf[0]), 2),
+                bbox=list(map(int, box.xyxy[0]))
+            ))
+        
+        return uncertain
+    
+    def _aggregate_boxes(self, boxes, config: DetectionConfig) -> List[Dict[str, Any]]:
+        if config.aggregation_mode is None or not len(boxes):
+            # 未知的子類別映射到超出範圍的 id，之後會被過濾
+            return [
+                {
+                    "xyxy": box.xyxy[0],
+                    "conf": box.conf[0],
+                    "cls": self.child_to_parent_id_map.get(int(box.cls[0]), len(self.parent_names))
+                }
+                for box in boxes
+            ]
 
         dets = sorted(
             [{"xywh": b.xywh[0].cpu().numpy(), "conf": float(b.conf[0]), "cls": int(b.cls[0])} for b in boxes],
@@ -194,13 +395,13 @@ class DetectionService:
 
                 if parent_i_id == parent_j_id:
                     iou = self._box_iou(dets[i]["xywh"], dets[j]["xywh"])
-                    if iou > self.agg_iou_threshold:
+                    if iou > config.agg_iou_threshold:
                         cluster.append(dets[j])
                         taken.add(j)
             
             # 聚合分數
             scores = [d["conf"] for d in cluster]
-            new_score = self._agg_scores(scores, self.aggregation_mode, self.agg_lse_r) if len(cluster) > 1 else scores[0]
+            new_score = self._agg_scores(scores, config.aggregation_mode, config.agg_lse_r) if len(cluster) > 1 else scores[0]
             
             # 使用分數最高的那個為檢測框的位置
             final_box_pos = cluster[0] 
@@ -220,13 +421,7 @@ class DetectionService:
             x, y, w, h = box
             return np.array([x, y, x + w, y + h])
         
-        b1, b2 = to_xyxy(box1), to_xyxy(box2)
-        inter_x1, inter_y1 = max(b1[0], b2[0]), max(b1[1], b2[1])
-        inter_x2, inter_y2 = min(b1[2], b2[2]), min(b1[3], b2[3])
-        inter_area = max(0, inter_x2 - inter_x1) * max(0, inter_y2 - inter_y1)
-        b1_area = (b1[2] - b1[0]) * (b1[3] - b1[1])
-        b2_area = (b2[2] - b2[0]) * (b2[3] - b2[1])
-        return inter_area / (b1_area + b2_area - inter_area + 1e-6)
+        return box_iou(to_xyxy(box1), to_xyxy(box2))
 
     def _agg_scores(self, scores: List[float], mode: str, r: float) -> float:
         scores_np = np.asarray(scores, dtype=float)
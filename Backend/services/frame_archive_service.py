@@ -0,0 +1,201 @@
+import json
+import queue
+import random
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+import cv2
+from utils import logger, box_iou
+from models import DetectionResponse, DetectionResult
+
+class ArchivePolicy:
+    """決定哪些幀需要保存以供重新標註"""
+    def __init__(self, confidence_band: tuple = (0.5, 0.85), categories: Optional[List[str]] = None,
+                 sample_rate: float = 0.0, disagreement_iou: float = 0.5):
+        """
+        Args:
+            confidence_band: 任一辨識框的置信度落在此區間即保存 (模型不確定的樣本)；
+                包含未達 confidence_threshold 而未回傳的框，DetectionService 推論時以區間下限為門檻
+            categories: 包含指定類別即保存
+            sample_rate: 其餘幀的隨機抽樣比例
+            disagreement_iou: 不同類別的框重疊超過此 iou 時視為模型判斷不一致
+        """
+        self.confidence_band = confidence_band
+        self.categories = set(categories or [])
+        self.sample_rate = sample_rate
+        self.disagreement_iou = disagreement_iou
+
+    def reason(self, detection_response: DetectionResponse, uncertain: Optional[List[DetectionResult]] = None) -> Optional[str]:
+        """
+        Args:
+            uncertain: 未達 confidence_threshold 的辨識框 (不在 detection_response 中)
+        """
+        low, high = self.confidence_band
+
+        for det in uncertain or []:
+            if low <= det.confidence <= high:
+                return "low_confidence"
+
+        for det in detection_response.detections:
+            if low <= det.confidence <= high:
+                return "low_confidence"
+
+            if det.category in self.categories:
+                return "category"
+
+        if self._has_disagreement(detection_response.detections):
+            return "disagreement"
+
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "random"
+
+        return None
+
+    def _has_disagreement(self, detections) -> bool:
+        for i, det_i in enumerate(detections):
+            for det_j in detections[i + 1:]:
+                if det_i.category != det_j.category and box_iou(det_i.bbox, det_j.bbox) > self.disagreement_iou:
+                    return True
+
+        return False
+
+class FrameArchiver:
+    """非阻塞的辨識幀保存 (YOLO 標註格式)
+
+    呼叫端只做 put_nowait，佇列滿時直接丟棄；
+    影像編碼與寫檔都在背景執行緒完成
+    """
+    def __init__(self, archive_dir: str, policy: ArchivePolicy, parent_names: Optional[List[str]] = None,
+                 queue_size: int = 64, max_batch_bytes: int = 256 * 1024 * 1024, max_total_bytes: int = 4 * 1024 * 1024 * 1024):
+        self.archive_dir = Path(archive_dir)
+        self.parent_names = parent_names
+        self.policy = policy
+        self.max_batch_bytes = max_batch_bytes
+        self.max_total_bytes = max_total_bytes
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.archived = 0
+
+        self.batch_dir = None
+        self.batch_bytes = 0
+
+        self.running = False
+        self.writer_thread = None
+
+    def start(self):
+        if self.running:
+            return
+
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        self._new_batch()
+
+        self.running = True
+        self.writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self.writer_thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.writer_thread:
+            self.writer_thread.join(timeout=5)
+
+    def submit(self, image, detection_response: DetectionResponse, uncertain: Optional[List[DetectionResult]] = None) -> bool:
+        """依策略決定是否保存，不會阻塞呼叫端
+
+        Args:
+            uncertain: 未達 confidence_threshold 的辨識框，一併寫入 predictions 供標註時參考
+        """
+        if not self.running:
+            return False
+
+        reason = self.policy.reason(detection_response, uncertain)
+        if not reason:
+            return False
+
+        try:
+            self.queue.put_nowait((image, detection_response, uncertain or [], reason, time.time()))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _writer_loop(self):
+        while self.running or not self.queue.empty():
+            try:
+                item = self.queue.get(timeout=1)
+            except queue.Empty:
+                continue
+
+            try:
+                self._write(*item)
+            except Exception as e:
+                logger.error(f"Frame archive write error: {str(e)}")
+
+    def _write(self, image, detection_response: DetectionResponse, uncertain: List[DetectionResult], reason: str, created_at: float):
+        success, encoded = cv2.imencode(".jpg", image)
+        if not success:
+            return
+
+        name = f"{datetime.fromtimestamp(created_at).strftime('%Y%m%d-%H%M%S-%f')}"
+        width, height = detection_response.image_size['width'], detection_response.image_size['height']
+
+        labels = []
+        for det in detection_response.detections:
+            if det.category not in self.parent_names:
+                continue
+
+            x1, y1, x2, y2 = det.bbox
+            labels.append(
+                f"{self.parent_names.index(det.category)} "
+                f"{(x1 + x2) / 2 / width:.6f} {(y1 + y2) / 2 / height:.6f} "
+                f"{(x2 - x1) / width:.6f} {(y2 - y1) / height:.6f}"
+            )
+
+        prediction = {
+            "reason": reason,
+            "created_at": datetime.fromtimestamp(created_at).isoformat(),
+            **detection_response.to_dict(),
+            "uncertain": [det.to_dict() for det in uncertain]
+        }
+
+        image_bytes = encoded.tobytes()
+        label_text = "".join(f"{label}\n" for label in labels)
+        prediction_text = json.dumps(prediction, ensure_ascii=False)
+
+        (self.batch_dir / "images" / f"{name}.jpg").write_bytes(image_bytes)
+        (self.batch_dir / "labels" / f"{name}.txt").write_text(label_text, encoding="utf-8")
+        (self.batch_dir / "predictions" / f"{name}.json").write_text(prediction_text, encoding="utf-8")
+
+        self.archived += 1
+        self.batch_bytes += len(image_bytes) + len(label_text) + len(prediction_text)
+        if self.batch_bytes >= self.max_batch_bytes:
+            self._new_batch()
+
+    def _new_batch(self):
+        """輪換批次資料夾，並刪除超過總容量的舊批次"""
+        self.batch_dir = self.archive_dir / datetime.now().strftime("%Y%m%d-%H%M%S")
+        for sub_dir in ("images", "labels", "predictions"):
+            (self.batch_dir / sub_dir).mkdir(parents=True, exist_ok=True)
+        self.batch_bytes = 0
+
+        batches = sorted(path for path in self.archive_dir.iterdir() if path.is_dir())
+        sizes = {batch: sum(f.stat().st_size for f in batch.rglob("*") if f.is_file()) for batch in batches}
+        total = sum(sizes.values())
+
+        for batch in batches:
+            if total <= self.max_total_bytes or batch == self.batch_dir:
+                break
+
+            shutil.rmtree(batch, ignore_errors=True)
+            total -= sizes[batch]
+            logger.info(f"Frame archive rotated: removed {batch.name}")
+
+    def get_stats(self) -> dict:
+        return {
+            "archived": self.archived,
+            "dropped": self.dropped,
+            "queued": self.queue.qsize()
+        }
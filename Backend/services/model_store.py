@@ -0,0 +1,88 @@
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+import torch
+from ultralytics import YOLO
+from utils import logger
+
+# 程序內共用的模型 (model_path -> YOLO)，fork 出的子程序以 copy-on-write 繼承
+_models = {}
+_lock = threading.Lock()
+
+def mmap_path_for(model_path: Path) -> Path:
+    return model_path.with_name(f"{model_path.stem}.mmap.pt")
+
+def export_mmap_weights(model_path: Path) -> Path:
+    """將 .pt 轉為已融合 Conv+BN 的 fp32 權重，載入時不需再轉換即可直接 mmap
+
+    原始 .pt 以 fp16 保存，每次載入都要轉成 fp32 並融合 BN，
+    產生的權重都在程序私有記憶體，無法在多個 worker 間共用
+    """
+    mmap_path = mmap_path_for(model_path)
+    if mmap_path.exists() and mmap_path.stat().st_mtime >= model_path.stat().st_mtime:
+        return mmap_path
+
+    yolo = YOLO(model_path)
+    model = yolo.model.float().fuse(verbose=False).eval()
+
+    ckpt = {key: value for key, value in yolo.ckpt.items() if key not in ('optimizer', 'ema', 'model')}
+    ckpt['model'] = model
+
+    # 先寫入暫存檔再取代，避免多個 worker 同時轉換時讀到寫一半的檔案
+    tmp_path = mmap_path.with_name(f"{mmap_path.name}.{os.getpid()}.tmp")
+    torch.save(ckpt, tmp_path)
+    os.replace(tmp_path, mmap_path)
+
+    logger.info(f"Exported mmap weights: {mmap_path.name}")
+    return mmap_path
+
+@contextmanager
+def _mmap_torch_load():
+    """ultralytics 以 torch.load 讀取權重，載入期間改為唯讀 mmap
+
+    只有目前執行緒的呼叫會加上 mmap=True，其他執行緒同時呼叫 torch.load 不受影響；
+    需在 _lock 內使用，避免兩次載入互相還原對方替換的 torch.load
+    """
+    original = torch.load
+    loading_thread = threading.get_ident()
+
+    def load(*args, **kwargs):
+        if threading.get_ident() == loading_thread:
+            kwargs.setdefault('mmap', True)
+        return original(*args, **kwargs)
+
+    torch.load = load
+    try:
+        yield
+    finally:
+        torch.load = original
+
+def load_shared_model(model_path: Path) -> YOLO:
+    """載入 (或取得已載入的) 模型
+
+    權重以 mmap 對應到快取檔案，多個 worker 共用同一份 page cache；
+    同一程序內重複建立 DetectionService 也不會重新載入
+    """
+    model_path = Path(model_path)
+
+    with _lock:
+        yolo = _models.get(model_path)
+        if yolo is not None:
+            return yolo
+
+        try:
+            mmap_path = export_mmap_weights(model_path)
+            with _mmap_torch_load():
+                yolo = YOLO(mmap_path)
+        except Exception as e:
+            logger.warning(f"mmap weights unavailable, loading {model_path.name}: {str(e)}")
+            yolo = YOLO(model_path)
+
+        _models[model_path] = yolo
+        return yolo
+
+def preload_models(*model_paths: Path):
+    """於 fork worker 前在主程序預先載入模型"""
+    for model_path in model_paths:
+        load_shared_model(model_path)
@@ -0,0 +1,221 @@
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import List, Optional
+import cv2
+import numpy as np
+import torch
+from ultralytics import YOLO
+from utils import logger, box_iou
+from .model_store import load_shared_model
+
+PRECISION_MODES = ('fp32', 'bf16', 'int8_dynamic', 'int8_static')
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
+
+class PrecisionModel:
+    """包裝低精度模型，提供與 YOLO 相同的 predict / names 介面"""
+    def __init__(self, mode: str, model: YOLO):
+        self.mode = mode
+        self.model = model
+        self.names = model.names
+
+    def predict(self, **kwargs):
+        context = torch.autocast(device_type='cpu', dtype=torch.bfloat16) if self.mode == 'bf16' else nullcontext()
+        with torch.inference_mode(), context:
+            return self.model.predict(**kwargs)
+
+class PrecisionService:
+    """建立 bf16 / int8 的 CPU 推論模型，並在啟用前與 fp32 比對辨識結果
+
+    校正資料夾中的圖像依排序交錯分成兩份：
+    一份作為 int8_static 的校正資料，另一份作為與 fp32 比對的保留集；
+    保留集可讀取的圖像少於 min_frames 或 fp32 辨識數少於 min_reference_detections 時不進行比對 (不啟用)
+    """
+    def __init__(self, model_path: Path, imgsz: int = 896, calibration_dir: Optional[str] = None,
+                 min_agreement: float = 0.95, calibration_limit: int = 200, match_iou: float = 0.5,
+                 min_frames: int = 20, min_reference_detections: int = 20):
+        self.model_path = Path(model_path)
+        self.imgsz = imgsz
+        self.calibration_dir = Path(calibration_dir) if calibration_dir else None
+        self.min_agreement = min_agreement
+        self.calibration_limit = calibration_limit
+        self.match_iou = match_iou
+        self.min_frames = min_frames
+        self.min_reference_detections = min_reference_detections
+
+    @staticmethod
+    def bf16_supported() -> bool:
+        """CPU 是否支援 bf16 (AVX512-BF16 / AMX)"""
+        try:
+            return torch.backends.mkldnn.is_available() and torch.ops.mkldnn._is_mkldnn_bf16_supported()
+        except Exception:
+            return False
+
+    def build(self, mode: str) -> PrecisionModel:
+        if mode not in PRECISION_MODES:
+            raise ValueError(f"Unknown precision mode: {mode}")
+
+        if mode == 'fp32':
+            return PrecisionModel(mode, load_shared_model(self.model_path))
+
+        if mode == 'bf16':
+            if not self.bf16_supported():
+                raise RuntimeError("CPU does not support bf16")
+            # autocast 不會修改權重，可與 fp32 共用同一份模型
+            return PrecisionModel(mode, load_shared_model(self.model_path))
+
+        quantized_path = self.model_path.with_name(f"{self.model_path.stem}.{mode}.onnx")
+        if not quantized_path.exists() or quantized_path.stat().st_mtime < self.model_path.stat().st_mtime:
+            self._quantize(mode, quantized_path)
+
+        return PrecisionModel(mode, YOLO(str(quantized_path), task='detect'))
+
+    def _quantize(self, mode: str, output_path: Path):
+        """匯出 ONNX 後以 onnxruntime 量化為 int8"""
+        try:
+            from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_dynamic, quantize_static
+        except ImportError:
+            raise RuntimeError("int8 inference requires onnx and onnxruntime")
+
+        onnx_path = Path(YOLO(self.model_path).export(format='onnx', imgsz=self.imgsz, dynamic=False, simplify=True))
+        logger.info(f"Quantizing {onnx_path.name} -> {output_path.name}")
+
+        if mode == 'int8_dynamic':
+            quantize_dynamic(str(onnx_path), str(output_path), weight_type=QuantType.QUInt8)
+            return
+
+        calibration_images, _ = self._split_images()
+        if not calibration_images:
+            raise RuntimeError("int8_static requires calibration images")
+
+        import onnx
+        input_name = onnx.load(str(onnx_path)).graph.input[0].name
+        preprocess = self._preprocess
+
+        class FrameReader(CalibrationDataReader):
+            def __init__(self, image_paths):
+                self.image_paths = iter(image_paths)
+
+            def get_next(self):
+                for image_path in self.image_paths:
+                    image = cv2.imread(str(image_path))
+                    if image is not None:
+                        return {input_name: preprocess(image)}
+                return None
+
+        quantize_static(
+            str(onnx_path), str(output_path), FrameReader(calibration_images),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True
+        )
+
+    def _preprocess(self, image) -> np.ndarray:
+        """與 ultralytics 相同的 letterbox 前處理 (BGR -> RGB, CHW, 0~1)"""
+        height, width = image.shape[:2]
+        ratio = min(self.imgsz / height, self.imgsz / width)
+        new_width, new_height = round(width * ratio), round(height * ratio)
+        resized = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+
+        top = (self.imgsz - new_height) // 2
+        left = (self.imgsz - new_width) // 2
+        padded = np.full((self.imgsz, self.imgsz, 3), 114, dtype=np.uint8)
+        padded[top:top + new_height, left:left + new_width] = resized
+
+        return np.ascontiguousarray(padded[..., ::-1].transpose(2, 0, 1)[None], dtype=np.float32) / 255.0
+
+    def _split_images(self):
+        """回傳 (校正集, 保留集)"""
+        if not self.calibration_dir or not self.calibration_dir.is_dir():
+            return [], []
+
+        image_paths = sorted(
+            path for path in self.calibration_dir.iterdir()
+            if path.suffix.lower() in IMAGE_EXTENSIONS
+        )[:self.calibration_limit * 2]
+
+        return image_paths[0::2], image_paths[1::2]
+
+    def verify(self, detection_service, candidate: PrecisionModel) -> dict:
+        """以保留集比對候選模型與 fp32 的父類別辨識結果
+
+        一致率 = 2 × 配對數 / (fp32 辨識數 + 候選模型辨識數)，
+        配對條件為同父類別且 iou >= match_iou；
+        比對的圖像或 fp32 辨識數不足時 raise RuntimeError (一致率沒有意義，不可視為通過)
+        """
+        _, holdout_images = self._split_images()
+        if not holdout_images:
+            raise RuntimeError("Precision check requires held-out images (CalibrationPath)")
+
+        conf = detection_service.config.confidence_threshold
+        iou = detection_service._predict_iou()
+
+        matched, total, frames, reference_detections = 0, 0, 0, 0
+        reference_ms, candidate_ms = [], []
+
+        for image_path in holdout_images:
+            image = cv2.imread(str(image_path))
+            if image is None:
+                continue
+
+            start = time.perf_counter()
+            reference = detection_service._process_and_aggregate_results(
+                detection_service.model.predict(source=image, verbose=False, imgsz=self.imgsz, conf=conf, iou=iou),
+                image.shape
+            )
+            reference_ms.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            predicted = detection_service._process_and_aggregate_results(
+                candidate.predict(source=image, verbose=False, imgsz=self.imgsz, conf=conf, iou=iou),
+                image.shape
+            )
+            candidate_ms.append((time.perf_counter() - start) * 1000)
+
+            matched += self._match(reference, predicted)
+            total += len(reference) + len(predicted)
+            reference_detections += len(reference)
+            frames += 1
+
+        if frames < self.min_frames:
+            raise RuntimeError(f"Precision check decoded {frames} held-out frames (requires {self.min_frames})")
+
+        if reference_detections < self.min_reference_detections:
+            raise RuntimeError(
+                f"Precision check found {reference_detections} fp32 detections on {frames} frames "
+                f"(requires {self.min_reference_detections})"
+            )
+
+        return {
+            "mode": candidate.mode,
+            "frames": frames,
+            "reference_detections": reference_detections,
+            "agreement": 2 * matched / total,
+            "fp32_ms": float(np.mean(reference_ms)) if reference_ms else 0.0,
+            "candidate_ms": float(np.mean(candidate_ms)) if candidate_ms else 0.0
+        }
+
+    def _match(self, reference: List, predicted: List) -> int:
+        """同類別間以 iou 由大到小貪婪配對，回傳配對數"""
+        candidates = []
+        for i, ref in enumerate(reference):
+            for j, det in enumerate(predicted):
+                if ref.category != det.category:
+                    continue
+
+                iou = box_iou(ref.bbox, det.bbox)
+                if iou >= self.match_iou:
+                    candidates.append((iou, i, j))
+
+        candidates.sort(key=lambda candidate: -candidate[0])
+
+        used_reference, used_predicted = set(), set()
+        for _, i, j in candidates:
+            if i in used_reference or j in used_predicted:
+                continue
+
+            used_reference.add(i)
+            used_predicted.add(j)
+
+        return len(used_reference)
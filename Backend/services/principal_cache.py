@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+from utils import Histogram, metrics
+
+class PrincipalCache:
+    """token_required / admin_required 使用的使用者資料快取 (每個程序各自一份)
+
+    只保存驗證需要的欄位 (PRINCIPAL_FIELDS)，以 user_id 為 key，超過 ttl 秒或超過 max_size 筆時淘汰；
+    UserService 修改這些欄位或刪除使用者時會呼叫 invalidate，
+    其他程序的快取不會收到通知，最多在 ttl 秒後才讀到新資料
+    """
+    PRINCIPAL_FIELDS = ('username', 'userRole')
+    FETCH_BUCKETS_MS = (0.5, 1, 2, 5, 10, 50, 100)
+
+    def __init__(self, ttl: float = 30, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries = OrderedDict() # user_id -> (到期時間, principal)
+        # 查詢中的使用者: user_id -> 查詢數 / 查詢期間的 invalidate 次數，避免查詢期間被 invalidate 的舊資料寫回快取；
+        # 只記錄有查詢進行中的使用者，查詢全部結束時移除 (大小不超過同時查詢的數量)
+        self.fetching = {}
+        self.versions = {}
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.fetch_ms = Histogram(self.FETCH_BUCKETS_MS)
+
+    def get(self, user_id: str, fetch):
+        """取得使用者資料，未命中時以 fetch(user_id) 查詢資料庫
+
+        Returns:
+            dict | None: principal 的複本 (呼叫端可直接修改)，使用者不存在時為 None
+        """
+        user_id = str(user_id)
+        now = time.monotonic()
+
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry and entry[0] > now:
+                self.entries.move_to_end(user_id)
+                self.hits += 1
+                return dict(entry[1])
+
+            self.misses += 1
+            self.fetching[user_id] = self.fetching.get(user_id, 0) + 1
+            version = self.versions.get(user_id, 0)
+
+        principal = None
+        try:
+            start = time.perf_counter()
+            principal = fetch(user_id)
+            self.fetch_ms.observe((time.perf_counter() - start) * 1000)
+        finally:
+            with self.lock:
+                if principal is not None and self.ttl > 0 and self.versions.get(user_id, 0) == version:
+                    self.entries[user_id] = (now + self.ttl, principal)
+                    self.entries.move_to_end(user_id)
+                    while len(self.entries) > self.max_size:
+                        self.entries.popitem(last=False)
+
+                self.fetching[user_id] -= 1
+                if not self.fetching[user_id]:
+                    del self.fetching[user_id]
+                    self.versions.pop(user_id, None)
+
+        return dict(principal) if principal is not None else None
+
+    def invalidate(self, user_id):
+        user_id = str(user_id)
+        with self.lock:
+            self.entries.pop(user_id, None)
+            if user_id in self.fetching:
+                self.versions[user_id] = self.versions.get(user_id, 0) + 1
+            self.invalidations += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            # 進行中的查詢結果一律不寫回
+            for user_id in self.fetching:
+                self.versions[user_id] = self.versions.get(user_id, 0) + 1
+
+    def collect_metrics(self) -> list:
+        with self.lock:
+            hits, misses, size = self.hits, self.misses, len(self.entries)
+
+        return [
+            ('auth_principal_cache_hits_total', 'counter', "Auth principal cache hits", [({}, hits)]),
+            ('auth_principal_cache_misses_total', 'counter', "Auth principal cache misses", [({}, misses)]),
+            ('auth_principal_cache_entries', 'gauge', "Auth principal cache entries", [({}, size)]),
+            ('auth_principal_fetch_seconds', 'histogram', "User lookup time on principal cache misses", [({}, self.fetch_ms)], 0.001)
+        ]
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            hits, misses, size, invalidations = self.hits, self.misses, len(self.entries), self.invalidations
+
+        fetch_ms = self.fetch_ms.to_dict()
+        lookups = hits + misses
+
+        return {
+            "ttl": self.ttl,
+            "max_size": self.max_size,
+            "size": size,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "invalidations": invalidations,
+            "fetch_ms": fetch_ms,
+            # 以未命中時的平均查詢時間估計命中省下的資料庫時間
+            "saved_ms": round(hits * fetch_ms["mean"], 1)
+        }
+
+principal_cache = PrincipalCache(Config.PRINCIPAL_CACHE_TTL, Config.PRINCIPAL_CACHE_SIZE)
+metrics.register_collector(principal_cache.collect_metrics)
+
+def get_principal_cache_stats() -> dict:
+    """驗證用使用者資料快取的命中率與省下的查詢時間"""
+    return principal_cache.get_stats()
@@ -5,12 +5,14 @@ import psutil
 import platform
 from datetime import datetime
 from config import Config
-import GPUtil
-from .detection_service import DetectionService
+from models import DetectionConfig
+from .db_service import get_pool_stats
+from .command_monitor import get_command_stats
 
 class SystemService:
-    def __init__(self, socketio):
+    def __init__(self, socketio, detection_service=None):
         self.socketio = socketio
+        self.detection_service = detection_service
         self.monitoring = False
         self.monitor_thread = None
         self.connected_admins = set()
@@ -67,7 +69,7 @@ class SystemService:
             
             gpu_info = self._get_gpu_info()
             
-            return {
+            data = {
                 "cpu": {
                     "count": cpu_count,
                     "usage": round(cpu_percent, 1),
@@ -87,6 +89,21 @@ class SystemService:
                 },
                 "gpu": gpu_info
             }
+            
+            # MongoDB 連線池使用狀況
+            data["mongo"] = get_pool_stats()
+            
+            # 各 socket 事件的 MongoDB round trip 次數與耗時
+            data["mongo_commands"] = get_command_stats()
+            
+            # 實際使用的推論精度，與各辨識參數版本的延遲與辨識數量分布
+            if self.detection_service:
+                data["detection"] = {
+                    "precision": self.detection_service.precision,
+                    **self.detection_service.get_stats()
+                }
+            
+            return data
         except Exception as e:
             return {
                 "error": f"Failed to get system data: {str(e)}",
@@ -95,6 +112,8 @@ class SystemService:
     def _get_gpu_info(self):
         """獲取 GPU 使用率資訊"""
         try:
+            import GPUtil # 只有監控時才需要
+            
             gpus = GPUtil.getGPUs()
             
             if not gpus:
@@ -157,16 +176,23 @@ class SystemInfo:
             return {"error": f"Failed to get application info: {str(e)}"}
     
     @staticmethod
-    def _get_model_info():
-        """獲取模型資訊"""
+    def _get_model_info(detection_config: DetectionConfig = None, runtimes: list = None):
+        """獲取模型資訊 (不載入模型，參數為目前發佈的辨識參數版本)
+        
+        requested_precision 為設定的精度，低精度未通過一致率檢查時辨識伺服器會維持 fp32；
+        實際使用的精度見 runtimes (執行中的辨識伺服器)
+        """
         try:
-            detection_service = DetectionService()
+            detection_config = detection_config or DetectionConfig()
             
             model_info = {
                 "yolo_model": {
-                    "model_version": detection_service.model_version,
-                    "confidence_threshold": detection_service.confidence_threshold,
-                    "iou_threshold": detection_service.iou_threshold
+                    "model_version": Config.DETECTION_MODEL_VERSION,
+                    "requested_precision": Config.DETECTION_PRECISION,
+                    "runtimes": runtimes or [],
+                    "config_version": detection_config.version,
+                    "confidence_threshold": detection_config.confidence_threshold,
+                    "iou_threshold": detection_config.iou_threshold
                 },
             }
             
@@ -175,9 +201,9 @@ class SystemInfo:
             return {"error": f"Failed to get model info: {str(e)}"}
     
     @staticmethod
-    def get_all_system_info():
+    def get_all_system_info(detection_config: DetectionConfig = None, runtimes: list = None):
         return {
             "system": SystemInfo._get_system_info(),
             "application": SystemInfo._get_application_info(),
-            "models": SystemInfo._get_model_info(),
+            "models": SystemInfo._get_model_info(detection_config, runtimes),
         }
\ No newline at end of file
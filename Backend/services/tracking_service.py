@@ -0,0 +1,205 @@
+import threading
+from itertools import count
+from typing import List, Optional, Union
+import numpy as np
+from models import DetectionResult, DetectionResponse
+from utils import box_iou
+
+class Track:
+    def __init__(self, track_id: int, detection: DetectionResult):
+        self.track_id = track_id
+        self.category = detection.category
+        self.confidence = detection.confidence
+        self.bbox = np.asarray(detection.bbox, dtype=float)
+        self.velocity = np.zeros(4) # 每幀的 bbox 位移 (x1, y1, x2, y2)
+        self.hits = 1
+        self.misses = 0
+        self.frames_since_update = 0
+
+    def predict(self) -> np.ndarray:
+        """以等速模型推估目前幀的位置"""
+        return self.bbox + self.velocity * self.frames_since_update
+
+    def update(self, detection: DetectionResult):
+        new_bbox = np.asarray(detection.bbox, dtype=float)
+        frames = max(1, self.frames_since_update)
+        measured_velocity = (new_bbox - self.bbox) / frames
+
+        # 平滑速度，避免單次抖動造成預測偏移
+        self.velocity = measured_velocity if self.hits == 1 else 0.5 * self.velocity + 0.5 * measured_velocity
+        self.bbox = new_bbox
+        self.confidence = detection.confidence
+        self.hits += 1
+        self.misses = 0
+        self.frames_since_update = 0
+
+    def is_uncertain(self) -> bool:
+        """速度未知、上次推論未出現，或推估位移超過框大小一半時視為不確定"""
+        if self.hits < 2 or self.misses > 0:
+            return True
+
+        width = max(1.0, self.bbox[2] - self.bbox[0])
+        height = max(1.0, self.bbox[3] - self.bbox[1])
+        dx, dy = np.abs(self.velocity[:2] * self.frames_since_update)
+
+        return dx > width / 2 or dy > height / 2
+
+    def to_detection(self, image_size: dict) -> DetectionResult:
+        x1, y1, x2, y2 = self.predict()
+        width, height = image_size['width'], image_size['height']
+
+        return DetectionResult(
+            category=self.category,
+            confidence=self.confidence,
+            bbox=[
+                int(np.clip(x1, 0, width)), int(np.clip(y1, 0, height)),
+                int(np.clip(x2, 0, width)), int(np.clip(y2, 0, height))
+            ],
+            track_id=self.track_id
+        )
+
+class SessionTracker:
+    """單一連線 (sid) 的多物件追蹤 (IoU 配對 + 等速預測)"""
+    def __init__(self, id_generator, detect_interval: int = 5, iou_threshold: float = 0.3, max_misses: int = 2):
+        self.id_generator = id_generator
+        self.detect_interval = detect_interval
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+
+        self.tracks: List[Track] = []
+        self.image_size: Optional[dict] = None
+        self.config_version: Optional[int] = None
+        self.frames_since_inference = 0
+        self.lock = threading.Lock()
+
+    def needs_inference(self) -> bool:
+        if self.image_size is None or not self.tracks:
+            return True
+
+        if self.frames_since_inference + 1 >= self.detect_interval:
+            return True
+
+        return any(track.is_uncertain() for track in self.tracks)
+
+    def update(self, detection_response: DetectionResponse) -> DetectionResponse:
+        """以推論結果更新追蹤，回傳帶有 track_id 的結果"""
+        self.image_size = detection_response.image_size
+        self.config_version = detection_response.config_version
+        self.frames_since_inference = 0
+
+        for track in self.tracks:
+            track.frames_since_update += 1
+
+        detections = detection_response.detections
+        matches = self._match(detections)
+        matched_tracks = set()
+
+        for det_index, track in matches:
+            track.update(detections[det_index])
+            detections[det_index].track_id = track.track_id
+            matched_tracks.add(track.track_id)
+
+        matched_detections = {det_index for det_index, _ in matches}
+        for det_index, detection in enumerate(detections):
+            if det_index in matched_detections:
+                continue
+
+            track = Track(next(self.id_generator), detection)
+            detection.track_id = track.track_id
+            self.tracks.append(track)
+            matched_tracks.add(track.track_id)
+
+        for track in self.tracks:
+            if track.track_id not in matched_tracks:
+                track.misses += 1
+
+        self.tracks = [track for track in self.tracks if track.misses <= self.max_misses]
+
+        return DetectionResponse(detections, detection_response.image_size, inferred=True, config_version=self.config_version)
+
+    def predict(self) -> DetectionResponse:
+        """不執行推論，以追蹤結果推估本幀的物件位置"""
+        self.frames_since_inference += 1
+
+        for track in self.tracks:
+            track.frames_since_update += 1
+
+        detections = [
+            track.to_detection(self.image_size)
+            for track in self.tracks
+            if track.misses == 0
+        ]
+
+        return DetectionResponse(detections, self.image_size, inferred=False, config_version=self.config_version)
+
+    def _match(self, detections: List[DetectionResult]):
+        """同類別間以 IoU 由大到小貪婪配對"""
+        candidates = []
+        for det_index, detection in enumerate(detections):
+            for track in self.tracks:
+                if track.category != detection.category:
+                    continue
+
+                iou = box_iou(track.predict(), np.asarray(detection.bbox, dtype=float))
+                if iou >= self.iou_threshold:
+                    candidates.append((iou, det_index, track))
+
+        candidates.sort(key=lambda candidate: -candidate[0])
+
+        matches = []
+        used_detections, used_tracks = set(), set()
+        for _, det_index, track in candidates:
+            if det_index in used_detections or track.track_id in used_tracks:
+                continue
+
+            matches.append((det_index, track))
+            used_detections.add(det_index)
+            used_tracks.add(track.track_id)
+
+        return matches
+
+class TrackingService:
+    """依 sid 管理追蹤狀態，只在需要時執行完整推論"""
+    def __init__(self, detection_service, detect_interval: int = 5, iou_threshold: float = 0.3, max_misses: int = 2):
+        self.detection_service = detection_service
+        self.detect_interval = detect_interval
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+
+        self.sessions = {}
+        self.lock = threading.Lock()
+        # track_id 於整個程序內唯一
+        self.id_generator = count(1)
+
+    def _get_session(self, sid: str) -> SessionTracker:
+        with self.lock:
+            session = self.sessions.get(sid)
+            if session is None:
+                session = SessionTracker(self.id_generator, self.detect_interval, self.iou_threshold, self.max_misses)
+                self.sessions[sid] = session
+
+            return session
+
+    def detect_objects(self, sid: str, image_data: Union[str, bytes]) -> DetectionResponse:
+        session = self._get_session(sid)
+
+        with session.lock:
+            if not session.needs_inference():
+                return session.predict()
+
+            detection_response = self.detection_service.detect_objects(image_data)
+            return session.update(detection_response)
+
+    def get_tracks(self, sid: str) -> List[Track]:
+        with self.lock:
+            session = self.sessions.get(sid)
+
+        if session is None:
+            return []
+
+        with session.lock:
+            return list(session.tracks)
+
+    def remove_session(self, sid: str):
+        with self.lock:
+            self.sessions.pop(sid, None)
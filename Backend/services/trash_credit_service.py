@@ -0,0 +1,114 @@
+from collections import defaultdict
+from datetime import datetime
+from utils import logger
+from .user_service import UserService
+from .daliy_trash_service import DailyTrashService
+from .detection_event_service import DetectionEventService
+from .background_flusher import BackgroundFlusher
+
+class TrashCreditService(BackgroundFlusher):
+    """由辨識串流在伺服器端累計使用者回收數量
+
+    追蹤中的物件在多次推論中確認後，每個 track 只計算一次，
+    計數先累積在記憶體，再定期批次寫入 users.trash_stats 與 daily_trash，
+    有 detection_event_service 時每次計入也記錄一筆辨識事件
+    """
+    # 辨識父類別 -> trash_stats 類別
+    CATEGORY_TO_TRASH_TYPE = {
+        'plastic': 'plastic',
+        'paper': 'paper',
+        'can': 'cans',
+        'container': 'containers',
+        'plasticbottle': 'bottles'
+    }
+
+    def __init__(self, user_service: UserService, daily_trash_service: DailyTrashService,
+                 min_hits: int = 3, min_confidence: float = 0.85, flush_interval: float = 5.0,
+                 detection_event_service: DetectionEventService = None):
+        self._init_flusher(flush_interval)
+        self.user_service = user_service
+        self.daily_trash_service = daily_trash_service
+        self.detection_event_service = detection_event_service
+        self.min_hits = min_hits
+        self.min_confidence = min_confidence
+
+        self.credited_tracks = defaultdict(set) # sid -> 已計算的 track_id
+        self.pending_users = defaultdict(lambda: defaultdict(int)) # user_id -> {trash_type: count}
+        self.pending_daily = defaultdict(int) # (date, trash_type) -> count
+
+    def observe(self, sid: str, user_id: str, tracks, station_id: str = None) -> list:
+        """記錄本幀已確認的 track，回傳新計入的 [(track_id, trash_type)]"""
+        today = datetime.now().strftime("%Y-%m-%d")
+        credited = []
+        events = []
+
+        with self.lock:
+            credited_tracks = self.credited_tracks[sid]
+
+            for track in tracks:
+                if track.track_id in credited_tracks:
+                    continue
+
+                if track.hits < self.min_hits or track.misses > 0 or track.confidence < self.min_confidence:
+                    continue
+
+                trash_type = self.CATEGORY_TO_TRASH_TYPE.get(track.category)
+                if not trash_type:
+                    continue
+
+                credited_tracks.add(track.track_id)
+                self.pending_users[user_id][trash_type] += 1
+                self.pending_daily[(today, trash_type)] += 1
+                credited.append((track.track_id, trash_type))
+                events.append((trash_type, track.confidence))
+
+        if self.detection_event_service:
+            for trash_type, confidence in events:
+                self.detection_event_service.record(user_id, trash_type, float(confidence), station_id)
+
+        return credited
+
+    def remove_session(self, sid: str):
+        with self.lock:
+            self.credited_tracks.pop(sid, None)
+
+    def flush(self):
+        with self.lock:
+            pending_users, self.pending_users = self.pending_users, defaultdict(lambda: defaultdict(int))
+            pending_daily, self.pending_daily = self.pending_daily, defaultdict(int)
+
+        if not pending_users and not pending_daily:
+            return
+
+        try:
+            # 只重試寫入失敗的使用者，已寫入的部分再送一次會重複累加
+            failed_users = self.user_service.bulk_add_user_trash_stats(pending_users)
+        except Exception as e:
+            logger.error(f"Flush user trash credits error: {str(e)}")
+            failed_users = pending_users
+
+        if failed_users:
+            self._requeue(failed_users, {})
+
+        try:
+            failed_daily = {
+                (date, trash_type): count
+                for date, trash_type, count in self.daily_trash_service.bulk_update_daily_trash(
+                    (date, trash_type, count) for (date, trash_type), count in pending_daily.items()
+                )
+            }
+        except Exception as e:
+            logger.error(f"Flush daily trash credits error: {str(e)}")
+            failed_daily = pending_daily
+
+        if failed_daily:
+            self._requeue({}, failed_daily)
+
+    def _requeue(self, pending_users: dict, pending_daily: dict):
+        with self.lock:
+            for user_id, stats in pending_users.items():
+                for trash_type, count in stats.items():
+                    self.pending_users[user_id][trash_type] += count
+
+            for key, count in pending_daily.items():
+                self.pending_daily[key] += count
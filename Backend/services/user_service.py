@@ -1,8 +1,12 @@
 from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 from services import DatabaseService
-from datetime import datetime, timedelta
-import bcrypt
+from datetime import datetime
+from utils import hash_password
 from .image_service import ImageService
+from .principal_cache import principal_cache
+from .daliy_trash_service import TRASH_TOTALS_ID
 
 class UserService(DatabaseService):
     def __init__(self, mongo_uri, image_service=None):
@@ -11,6 +15,7 @@ class UserService(DatabaseService):
         self.purchase = self.collections['purchases']
         self.user_level = self.collections['user_levels']
         self.daily_trash = self.collections['daily_trash']
+        self.trash_totals = self.collections['trash_totals']
         
         if image_service is not None and not isinstance(image_service, ImageService):
             raise TypeError("image_service 必須是 ImageService")
@@ -23,6 +28,17 @@ class UserService(DatabaseService):
         """
         user = self.users.find_one({"_id": ObjectId(user_id)})
         return user
+    
+    def get_principal(self, user_id: str):
+        """取得驗證用的使用者資料 (只含 _id / username / userRole，經由 principal_cache 快取)
+        Args:
+            user_id(str): 使用者 ID
+        """
+        return principal_cache.get(user_id, self._find_principal)
+    
+    def _find_principal(self, user_id: str):
+        projection = {field: 1 for field in principal_cache.PRINCIPAL_FIELDS}
+        return self.users.find_one({"_id": ObjectId(user_id)}, projection)
 
     def get_all_users(self):
         return list(self.users.find())
@@ -35,6 +51,7 @@ class UserService(DatabaseService):
                 {"$set": {"username": new_username}},
                 return_document=True
             )
+            principal_cache.invalidate(user_id)
             return user
         except Exception as e:
             print(f"Update username Error: {str(e)}")
@@ -44,10 +61,7 @@ class UserService(DatabaseService):
         """更新密碼"""
         try:
             # 加密新密碼
-            hashed_password = bcrypt.hashpw(
-                new_password.encode('utf-8'), 
-                bcrypt.gensalt()
-            ).decode('utf-8')
+            hashed_password = hash_password(new_password)
             
             self.users.find_one_and_update(
                 {"_id": ObjectId(user_id)},
@@ -145,8 +159,7 @@ class UserService(DatabaseService):
                 {
                     "$set": {
                         "last_check_in": now,
-                        "consecutive_check_in_days": consecutive_days,
-                        "last_active": now
+                        "consecutive_check_in_days": consecutive_days
                     }
                 }
             )
@@ -203,6 +216,7 @@ class UserService(DatabaseService):
             )
             
             if trash.modified_count > 0:
+                self._inc_trash_totals({trash_type: count})
                 return self.get_user_trash_stats(user_id)
             
             return None
@@ -211,6 +225,72 @@ class UserService(DatabaseService):
             print(f"Add user trash stats Error: {str(e)}")
             raise
         
+    def bulk_add_user_trash_stats(self, increments: dict) -> dict:
+        """批次增加多位使用者的垃圾統計 (users 一次 bulk_write，trash_totals 一次 update)
+        
+        部分寫入失敗 (BulkWriteError) 時只回傳失敗的使用者，已寫入的部分不會因重試而重複累加；
+        trash_totals 更新失敗只記錄錯誤，差異由 DailyTrashService.reconcile_trash_totals 修正
+        Args:
+            increments: {user_id: {trash_type: count}}
+        Returns:
+            dict: 寫入失敗、需重試的 {user_id: {trash_type: count}}
+        """
+        try:
+            items = [(user_id, stats) for user_id, stats in increments.items() if stats]
+            if not items:
+                return {}
+            
+            operations = [
+                UpdateOne(
+                    {"_id": ObjectId(user_id)},
+                    {"$inc": {f"trash_stats.{trash_type}": count for trash_type, count in stats.items()}}
+                )
+                for user_id, stats in items
+            ]
+            
+            failed = {}
+            try:
+                self.users.bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                for error in e.details.get("writeErrors", []):
+                    user_id, stats = items[error["index"]]
+                    failed[user_id] = stats
+                print(f"Bulk add user trash stats Error: {len(failed)} of {len(items)} failed")
+            
+            # 找不到的使用者 (已刪除) 也會計入全體統計，由 DailyTrashService.reconcile_trash_totals 修正
+            totals = {}
+            for user_id, stats in items:
+                if user_id in failed:
+                    continue
+                for trash_type, count in stats.items():
+                    totals[trash_type] = totals.get(trash_type, 0) + count
+            
+            try:
+                self._inc_trash_totals(totals)
+            except Exception as e:
+                print(f"Inc trash totals Error: {str(e)}")
+            
+            return failed
+        
+        except Exception as e:
+            print(f"Bulk add user trash stats Error: {str(e)}")
+            raise
+        
+    def _inc_trash_totals(self, increments: dict):
+        """與 users.trash_stats 同步累加全體垃圾統計 (trash_totals 單一文件)
+        Args:
+            increments: {trash_type: count}，可為負數
+        """
+        increments = {trash_type: count for trash_type, count in increments.items() if count}
+        if not increments:
+            return
+        
+        self.trash_totals.update_one(
+            {"_id": TRASH_TOTALS_ID},
+            {"$inc": increments, "$set": {"updated_at": datetime.now()}},
+            upsert=True
+        )
+        
     def _get_user_total_trash(self, user_id: str):
         try:
             user = self.get_user(user_id)
@@ -237,8 +317,13 @@ class UserService(DatabaseService):
             }
             
             user = self.users.find_one_and_delete({"_id": user_id})
+            principal_cache.invalidate(user_id)
 
             deletion_results['users'] = bool(user)
+            if user:
+                self._inc_trash_totals({
+                    trash_type: -count for trash_type, count in user.get('trash_stats', {}).items()
+                })
             
             # 刪除 user_purchase
             purchase = self.purchase.find_one_and_delete({"user_id": user_id})
@@ -299,10 +384,7 @@ class UserService(DatabaseService):
             if not user:
                 return False, "使用者不存在"
             
-            hashed_password = bcrypt.hashpw(
-                new_password.encode('utf-8'), 
-                bcrypt.gensalt()
-            ).decode('utf-8')
+            hashed_password = hash_password(new_password)
             
             result = self.users.update_one(
                 {"_id": ObjectId(user_id)},
@@ -420,50 +502,48 @@ class UserService(DatabaseService):
             print(f"Update user question stats Error: {str(e)}")
             raise
         
-    def update_last_active(self, user_id: str):
+    def bulk_update_last_active(self, date: str, last_active: dict, known_active: set = frozenset()) -> int:
+        """批次更新使用者最後活躍時間 (ActivityService 定期呼叫)
+        Args:
+            date: 活躍日期 (YYYY-MM-DD)
+            last_active: {user_id: 當天最後活躍時間}
+            known_active: 已確認當天活躍過的使用者，不需再判斷是否為當天第一次活躍
+        Returns:
+            int: 當天第一次活躍的使用者數量
+        """
         try:
-            now = datetime.now()
-            today = now.strftime("%Y-%m-%d")
-            
-            result = self.users.update_one(
-                {"_id": ObjectId(user_id)},
-                {"$set": {"last_active": now}}
-            )
+            if not last_active:
+                return 0
             
-            if result.modified_count > 0:
-                self._update_daily_active_users(today)
-                
-            return result.modified_count > 0
-        
-        except Exception as e:
-            print(f"Update last active Error: {str(e)}")
-            raise
-        
-    def _update_daily_active_users(self, date: str):
-        try:
             start_of_day = datetime.strptime(date, "%Y-%m-%d")
-            end_of_day = start_of_day + timedelta(days=1)
             
-            active_count = self.users.count_documents({
-                "last_active": {
-                    "$gte": start_of_day,
-                    "$lt": end_of_day
-                }
-            })
+            # last_active 早於當天 (或尚未設定) 才更新，modified_count 即為當天新增的活躍使用者
+            first_operations = [
+                UpdateOne(
+                    {"_id": ObjectId(user_id), "last_active": {"$not": {"$gte": start_of_day}}},
+                    {"$set": {"last_active": active_at}}
+                )
+                for user_id, active_at in last_active.items()
+                if user_id not in known_active
+            ]
             
-            self.daily_trash.update_one(
-                {"date": date},
-                {
-                    "$set": {"active_users": active_count},
-                    "$setOnInsert": {
-                        "plastic": 0, "paper": 0, "cans": 0, "bottles": 0, "containers": 0
-                    }                    
-                },
-                upsert=True
-            )
+            first_active = 0
+            if first_operations:
+                first_active = self.users.bulk_write(first_operations, ordered=False).modified_count
+            
+            self.users.bulk_write([
+                UpdateOne(
+                    {"_id": ObjectId(user_id)},
+                    {"$max": {"last_active": active_at}}
+                )
+                for user_id, active_at in last_active.items()
+            ], ordered=False)
             
+            return first_active
+        
         except Exception as e:
-            print(f"Update daily active users Error: {str(e)}")
+            print(f"Bulk update last active Error: {str(e)}")
+            raise
             
     def get_all_users_info(self):
         try:
@@ -0,0 +1,123 @@
+import msgpack
+import numpy as np
+from models import DetectionResponse
+
+JSON_FORMAT = 'json'
+MSGPACK_FORMAT = 'msgpack'
+SUPPORTED_FORMATS = (JSON_FORMAT, MSGPACK_FORMAT)
+
+PACKED_VERSION = 1
+
+class DetectionSerializer:
+    """Socket 辨識結果與影像的序列化
+
+    json: 與原本相同的 dict 格式
+    msgpack: 以 bytes 傳送 (Socket.IO binary attachment)，辨識結果壓縮為
+        k: 類別索引 (uint8)，對應連線時提供的 categories 表
+        s: 置信度 * 100 (uint16，sum 聚合時可能大於 1)
+        b: bbox x1, y1, x2, y2 (uint16 little-endian)
+        i: track_id (uint32，僅追蹤模式)
+        f: 此幀是否執行推論 (僅追蹤模式)
+        c: 辨識參數版本
+    """
+    def __init__(self, categories: list[str]):
+        self.categories = list(categories)
+        self.category_index = {name: i for i, name in enumerate(self.categories)}
+
+    def decode_frame(self, data, fmt: str) -> dict:
+        """解析 detect_image 事件資料，回傳 {'image', 'timestamp'}"""
+        if fmt == MSGPACK_FORMAT and isinstance(data, (bytes, bytearray)):
+            data = msgpack.unpackb(data, raw=False)
+
+        if not isinstance(data, dict):
+            raise ValueError("Invalid frame payload")
+
+        return data
+
+    def encode_result(self, detection_response: DetectionResponse, timestamp, fmt: str):
+        if fmt == MSGPACK_FORMAT:
+            return self._pack_result(detection_response, timestamp)
+
+        return {
+            'timestamp': timestamp,
+            **detection_response.to_dict()
+        }
+
+    def _pack_result(self, detection_response: DetectionResponse, timestamp) -> bytes:
+        detections = detection_response.detections
+
+        unknown = {det.category for det in detections} - self.category_index.keys()
+        if unknown:
+            raise ValueError(f"Categories not in the msgpack category table: {', '.join(sorted(map(str, unknown)))}")
+
+        categories = np.fromiter(
+            (self.category_index[det.category] for det in detections),
+            dtype=np.uint8,
+            count=len(detections)
+        )
+        confidences = np.fromiter(
+            (round(det.confidence * 100) for det in detections),
+            dtype='<u2',
+            count=len(detections)
+        )
+        bboxes = np.asarray(
+            [det.bbox for det in detections],
+            dtype=np.int64
+        ).reshape(-1, 4).clip(0, np.iinfo(np.uint16).max).astype('<u2')
+
+        packed = {
+            'v': PACKED_VERSION,
+            't': timestamp,
+            'n': len(detections),
+            'k': categories.tobytes(),
+            's': confidences.tobytes(),
+            'b': bboxes.tobytes(),
+            'w': detection_response.image_size['width'],
+            'h': detection_response.image_size['height'],
+        }
+
+        if detection_response.config_version is not None:
+            packed['c'] = detection_response.config_version
+
+        if detection_response.inferred is not None:
+            packed['f'] = detection_response.inferred
+            packed['i'] = np.fromiter(
+                (det.track_id or 0 for det in detections),
+                dtype='<u4',
+                count=len(detections)
+            ).tobytes()
+
+        return msgpack.packb(packed, use_bin_type=True)
+
+    def unpack_result(self, payload: bytes) -> dict:
+        """將 msgpack 結果還原成 json 格式 (除錯與 bench_serializer.py 使用)"""
+        packed = msgpack.unpackb(payload, raw=False)
+
+        categories = np.frombuffer(packed['k'], dtype=np.uint8)
+        confidences = np.frombuffer(packed['s'], dtype='<u2')
+        bboxes = np.frombuffer(packed['b'], dtype='<u2').reshape(-1, 4)
+
+        detections = [
+            {
+                'category': self.categories[int(category)],
+                'confidence': int(confidence) / 100,
+                'bbox': bbox.astype(int).tolist()
+            }
+            for category, confidence, bbox in zip(categories, confidences, bboxes)
+        ]
+
+        result = {
+            'timestamp': packed['t'],
+            'detections': detections,
+            'image_size': {'width': packed['w'], 'height': packed['h']}
+        }
+
+        if 'c' in packed:
+            result['config_version'] = packed['c']
+
+        if 'f' in packed:
+            result['inferred'] = packed['f']
+            for detection, track_id in zip(detections, np.frombuffer(packed['i'], dtype='<u4')):
+                detection['track_id'] = int(track_id)
+
+        return result
@@ -2,10 +2,14 @@ from flask import Flask, send_from_directory, request
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit, join_room, leave_room
 import uuid
-from utils import logger, verify_token
-from services import DetectionService, SystemService
+import atexit
+from utils import logger, verify_token, metrics
+from services import DetectionConfigService, SystemService, TrackingService, TrashCreditService, UserService, DailyTrashService, DetectionEventService
+from config import Config
+from middlewares import socket_rate_limit, track_socket_commands, register_metrics
+from .serializer import DetectionSerializer, SUPPORTED_FORMATS, JSON_FORMAT
 
-def start_server(port, detection_service: DetectionService=None):
+def start_server(port, detection_service=None):
     """啟動 Socket 服務器"""
     
     socket_app = Flask(__name__)
@@ -13,7 +17,35 @@ def start_server(port, detection_service: DetectionService=None):
     
     socketio = SocketIO(socket_app, cors_allowed_origins="*", logger=False, engineio_logger=False)
     
-    system_service = SystemService(socketio)
+    # 此程序的 socket 事件、辨識延遲與連線池 metrics (GET /metrics)
+    register_metrics(socket_app)
+    if detection_service:
+        metrics.register_collector(detection_service.collect_metrics)
+    
+    system_service = SystemService(socketio, detection_service)
+    
+    # 辨識參數可由管理員在執行中調整 (REST 或 socket)，並同步資料庫中的最新版本
+    detection_config_service = DetectionConfigService(Config.MONGO_URI)
+    detection_config_service.start_watching(detection_service)
+    
+    serializer = DetectionSerializer(detection_service.parent_names)
+    client_formats = {} # sid -> 傳輸格式 (json / msgpack)
+    
+    tracking_service = TrackingService(detection_service)
+    tracking_sids = set() # 啟用追蹤模式的連線
+    
+    detection_event_service = DetectionEventService(
+        Config.MONGO_URI, Config.DETECTION_EVENT_FLUSH_INTERVAL, Config.DETECTION_EVENT_BUFFER_SIZE
+    )
+    trash_credit_service = TrashCreditService(
+        UserService(Config.MONGO_URI), DailyTrashService(Config.MONGO_URI),
+        detection_event_service=detection_event_service
+    )
+    trash_credit_service.start()
+    atexit.register(detection_event_service.stop) # 關閉前寫入尚未 flush 的辨識事件
+    atexit.register(trash_credit_service.stop) # 關閉前寫入尚未 flush 的計數
+    credit_users = {} # sid -> user_id (啟用伺服器端回收計數的連線)
+    credit_stations = {} # sid -> station_id (連線指定的回收站)
     
     @socket_app.route('/')
     def test():
@@ -22,47 +54,188 @@ def start_server(port, detection_service: DetectionService=None):
         except Exception as e:
             return f"測試頁面載入失敗: {str(e)}"
     
+    def _negotiate_format(requested):
+        fmt = requested if requested in SUPPORTED_FORMATS else JSON_FORMAT
+        client_formats[request.sid] = fmt
+        
+        return {
+            'format': fmt,
+            'categories': serializer.categories
+        }
+        
+    def _set_tracking(enabled):
+        if enabled:
+            tracking_sids.add(request.sid)
+        else:
+            tracking_sids.discard(request.sid)
+            tracking_service.remove_session(request.sid)
+            
+        return {'tracking': request.sid in tracking_sids}
+    
+    def _set_crediting(enabled, token, station_id=None):
+        if enabled:
+            token_data = verify_token(token) if token else None
+            if not token_data or token_data.get('userRole') not in ('user', 'admin'):
+                return {'crediting': False, 'message': 'Token 無效或已過期'}
+            
+            # 計數依賴 track_id 去除重複，需同時啟用追蹤模式
+            credit_users[request.sid] = token_data['user_id']
+            if station_id:
+                credit_stations[request.sid] = str(station_id)
+            _set_tracking(True)
+        else:
+            credit_users.pop(request.sid, None)
+            credit_stations.pop(request.sid, None)
+            trash_credit_service.remove_session(request.sid)
+            
+        return {'crediting': request.sid in credit_users, 'tracking': request.sid in tracking_sids}
+    
+    def _verify_admin(token):
+        token_data = verify_token(token) if token else None
+        if not token_data or token_data.get('userRole') != 'admin':
+            return None
+        
+        return token_data
+    
     @socketio.on('connect')
-    def handle_connect():
+    @track_socket_commands
+    def handle_connect(auth=None):
         client_id = request.sid
         logger.info(f"Client connected: {client_id}")
-        emit('connected', {'client_id': client_id})
+        
+        # 傳輸格式可由 auth 或 query string (?format=msgpack) 指定
+        requested = (auth or {}).get('format') or request.args.get('format')
+        # 追蹤模式: 只每隔數幀執行推論，其餘幀以追蹤結果推估並提供 track_id
+        tracking = (auth or {}).get('tracking') or request.args.get('tracking') in ('1', 'true')
+        
+        connected = {
+            'client_id': client_id,
+            **_negotiate_format(requested),
+            **_set_tracking(bool(tracking))
+        }
+        
+        # 伺服器端回收計數: auth 需包含 credit 與 token (station_id 可省略)
+        if (auth or {}).get('credit'):
+            connected.update(_set_crediting(True, auth.get('token'), auth.get('station_id')))
+        
+        emit('connected', connected)
+    
+    @socketio.on('set_format')
+    @track_socket_commands
+    def handle_set_format(data):
+        emit('format_changed', _negotiate_format((data or {}).get('format')))
+        
+    @socketio.on('set_tracking')
+    @track_socket_commands
+    def handle_set_tracking(data):
+        enabled = bool((data or {}).get('enabled'))
+        if not enabled:
+            _set_crediting(False, None)
+        
+        emit('tracking_changed', _set_tracking(enabled))
+        
+    @socketio.on('set_crediting')
+    @track_socket_commands
+    def handle_set_crediting(data):
+        data = data or {}
+        emit('crediting_changed', _set_crediting(bool(data.get('enabled')), data.get('token'), data.get('station_id')))
     
     @socketio.on('disconnect')
+    @track_socket_commands
     def handle_disconnect():
         client_id = request.sid
         logger.info(f"Client disconnected: {client_id}")
+        client_formats.pop(client_id, None)
+        tracking_sids.discard(client_id)
+        tracking_service.remove_session(client_id)
+        credit_users.pop(client_id, None)
+        credit_stations.pop(client_id, None)
+        trash_credit_service.remove_session(client_id)
         if hasattr(request, 'sid'):
             system_service.remove_admin_connection(request.sid)
     
     @socketio.on('detect_image')
+    @track_socket_commands
+    @socket_rate_limit()
     def handle_detect_image(data):
         """處理圖像檢測請求"""
-        image_data = data.get('image')
-        timestamp = data.get('timestamp')
+        fmt = client_formats.get(request.sid, JSON_FORMAT)
+        
+        try:
+            frame = serializer.decode_frame(data, fmt)
+        except Exception as e:
+            emit('error', {'message': f'Invalid frame: {str(e)}'})
+            return
+        
+        image_data = frame.get('image')
+        timestamp = frame.get('timestamp')
         
         if not image_data:
             emit('error', {'message': 'No image data'})
             return
         
-        detection_response = detection_service.detect_objects(image_data)
-        
-        result = {
-            'timestamp': timestamp,
-            'detections': [
-                {
-                    'category': det.category,
-                    'confidence': det.confidence,
-                    'bbox': det.bbox
-                }
-                for det in detection_response.detections
-            ],
-            'image_size': detection_response.image_size
-        }
+        if request.sid in tracking_sids:
+            detection_response = tracking_service.detect_objects(request.sid, image_data)
+        else:
+            detection_response = detection_service.detect_objects(image_data)
+        
+        emit('detection_result', serializer.encode_result(detection_response, timestamp, fmt))
         
-        emit('detection_result', result)
+        user_id = credit_users.get(request.sid)
+        if user_id and detection_response.inferred:
+            credited = trash_credit_service.observe(
+                request.sid, user_id, tracking_service.get_tracks(request.sid), credit_stations.get(request.sid)
+            )
+            if credited:
+                emit('trash_credited', {
+                    'credits': [
+                        {'track_id': track_id, 'trash_type': trash_type}
+                        for track_id, trash_type in credited
+                    ]
+                })
+        
+    @socketio.on('get_detection_config')
+    @track_socket_commands
+    def handle_get_detection_config(data):
+        if not _verify_admin((data or {}).get('token')):
+            emit('detection_config error', {'message': '權限不足'})
+            return
         
+        emit('detection_config', {
+            'config': detection_service.config.to_dict(),
+            'precision': detection_service.precision,
+            'stats': detection_service.get_stats()
+        })
+    
+    @socketio.on('set_detection_config')
+    @track_socket_commands
+    def handle_set_detection_config(data):
+        data = data or {}
+        token_data = _verify_admin(data.get('token'))
+        if not token_data:
+            emit('detection_config error', {'message': '權限不足'})
+            return
+        
+        updates = data.get('config') or {}
+        if isinstance(updates.get('aggregation_mode'), str) and updates['aggregation_mode'].lower() == 'none':
+            updates['aggregation_mode'] = None
+        
+        try:
+            config = detection_config_service.publish(updates, token_data['user_id'], validate=detection_service.check_config)
+            detection_service.apply_config(config)
+        except (ValueError, TypeError) as e:
+            emit('detection_config error', {'message': f'參數錯誤: {str(e)}'})
+            return
+        except Exception as e:
+            emit('detection_config error', {'message': f'更新辨識參數失敗: {str(e)}'})
+            return
+        
+        changed = {'config': config.to_dict()}
+        emit('detection_config_changed', changed)
+        emit('detection_config_changed', changed, room='monitor', include_self=False)
+    
     @socketio.on('start_monitoring')
+    @track_socket_commands
     def handle_start_monitoring(data):
         try:
             token = data.get("token")
@@ -85,6 +258,7 @@ def start_server(port, detection_service: DetectionService=None):
             emit('monitoring error', {'message': f'啟動系統監控失敗: {str(e)}'})
             
     @socketio.on('stop_monitoring')
+    @track_socket_commands
     def handle_stop_monitoring():
         try:
             leave_room("monitor")
@@ -1,12 +1,25 @@
-from .token import verify_token, generate_token
-from .logger_config import logger
+from .token import verify_token, generate_token, get_token_cache_stats
+from .logger_config import logger, log_access, get_log_stats
+from .histogram import Histogram
+from .geometry import box_iou
+from .metrics import MetricsRegistry, metrics, render_metrics, LATENCY_BUCKETS
+from .password import hash_password, check_password, needs_rehash
+from .db_indexes import INDEXES, QUERY_SHAPES, TIMESERIES_COLLECTIONS, ensure_indexes, ensure_timeseries_collections
 from .scheduler import start_scheduler, stop_scheduler
 from .seeder import init_default_data
+from .rate_limiter import RateLimiter, RateLimitResult, MemoryBucketStore, MongoBucketStore, rate_limit_headers, most_restrictive
 
 __all__ = [
     'verify_token',
     'generate_token',
-    'logger',
+    'get_token_cache_stats',
+    'logger', 'log_access', 'get_log_stats',
+    'Histogram',
+    'box_iou',
+    'MetricsRegistry', 'metrics', 'render_metrics', 'LATENCY_BUCKETS',
     'start_scheduler', 'stop_scheduler',
-    'init_default_data'
+    'hash_password', 'check_password', 'needs_rehash',
+    'init_default_data',
+    'INDEXES', 'QUERY_SHAPES', 'TIMESERIES_COLLECTIONS', 'ensure_indexes', 'ensure_timeseries_collections',
+    'RateLimiter', 'RateLimitResult', 'MemoryBucketStore', 'MongoBucketStore', 'rate_limit_headers', 'most_restrictive'
 ]
\ No newline at end of file
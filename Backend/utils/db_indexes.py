@@ -0,0 +1,241 @@
+import os
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, DESCENDING, database
+from pymongo.errors import OperationFailure
+from utils import logger
+
+# 各集合需要的索引 (以資料庫中的集合名稱為 key)
+# keys: [(欄位, 方向)]，options: create_index 的參數 (unique / expireAfterSeconds)
+INDEXES = {
+    'users': [
+        {'keys': [('email', ASCENDING)], 'options': {'unique': True}},
+        {'keys': [('last_active', ASCENDING)]}
+    ],
+    'user_levels': [
+        {'keys': [('user_id', ASCENDING)]}
+    ],
+    'user_purchases': [
+        {'keys': [('user_id', ASCENDING)]},
+        {'keys': [('voucher', ASCENDING)]}
+    ],
+    'products': [
+        {'keys': [('name', ASCENDING)]}
+    ],
+    'themes': [
+        {'keys': [('name', ASCENDING)]}
+    ],
+    'chapters': [
+        {'keys': [('name', ASCENDING)]},
+        {'keys': [('sequence', ASCENDING)]}
+    ],
+    'levels': [
+        {'keys': [('name', ASCENDING)]},
+        {'keys': [('sequence', ASCENDING)]},
+        {'keys': [('chapter', ASCENDING), ('sequence', ASCENDING)]}
+    ],
+    'questions': [
+        {'keys': [('category', ASCENDING)]}
+    ],
+    'question_categories': [
+        {'keys': [('name', ASCENDING)]}
+    ],
+    'verifications': [
+        {'keys': [('email', ASCENDING)]}
+    ],
+    'daily_trash': [
+        {'keys': [('date', ASCENDING)], 'options': {'unique': True}}
+    ],
+    'feedbacks': [
+        {'keys': [('user_id', ASCENDING)]}
+    ],
+    'voucher_types': [
+        {'keys': [('name', ASCENDING)]}
+    ],
+    'vouchers': [
+        {'keys': [('voucher_code', ASCENDING)], 'options': {'unique': True}},
+        {'keys': [('voucher_type_id', ASCENDING)]}
+    ],
+    'station_types': [
+        {'keys': [('name', ASCENDING)]}
+    ],
+    'stations': [
+        {'keys': [('name', ASCENDING)]},
+        {'keys': [('station_type', ASCENDING)]}
+    ],
+    'rate_limits': [
+        {'keys': [('expire_at', ASCENDING)], 'options': {'expireAfterSeconds': 0}}
+    ],
+    'detection_configs': [
+        {'keys': [('version', ASCENDING)], 'options': {'unique': True}}
+    ],
+    'detection_runtimes': [
+        {'keys': [('expire_at', ASCENDING)], 'options': {'expireAfterSeconds': 0}}
+    ],
+    'detection_events': [
+        {'keys': [('ts', ASCENDING)]},
+        {'keys': [('meta.user_id', ASCENDING), ('ts', ASCENDING)]},
+        {'keys': [('meta.station_id', ASCENDING), ('ts', ASCENDING)]}
+    ]
+}
+
+# 以 time-series 集合建立的集合 (需在第一次寫入前建立)，保留天數由 DETECTION_EVENT_RETENTION_DAYS 設定 (0 為永久保留)
+TIMESERIES_COLLECTIONS = {
+    'detection_events': {
+        'timeseries': {'timeField': 'ts', 'metaField': 'meta', 'granularity': 'minutes'},
+        'retention_days': int(os.getenv("DETECTION_EVENT_RETENTION_DAYS", "365"))
+    }
+}
+
+# services 中以 _id 以外欄位查詢的語句 (集合, filter, sort)，供 check_indexes.py 以 explain 檢查是否使用索引
+_SAMPLE_DAY = datetime(2025, 1, 1)
+QUERY_SHAPES = [
+    ('users', {"email": "user@example.com"}, None),
+    ('users', {"last_active": {"$gte": _SAMPLE_DAY, "$lt": _SAMPLE_DAY + timedelta(days=1)}}, None),
+    ('user_levels', {"user_id": "user_id"}, None),
+    ('user_purchases', {"user_id": "user_id"}, None),
+    ('user_purchases', {"voucher": {"$in": ["voucher_id"]}}, None),
+    ('products', {"name": "name"}, None),
+    ('themes', {"name": "name"}, None),
+    ('chapters', {"name": "name"}, None),
+    ('chapters', {}, [('sequence', ASCENDING)]),
+    ('chapters', {"sequence": 1}, None),
+    ('levels', {"name": "name"}, None),
+    ('levels', {"sequence": 1}, None),
+    ('levels', {}, [('sequence', ASCENDING)]),
+    ('levels', {"chapter": "chapter"}, [('sequence', ASCENDING)]),
+    ('questions', {"category": "category"}, None),
+    ('question_categories', {"name": "name"}, None),
+    ('verifications', {"email": "user@example.com", "is_verified": False}, None),
+    ('daily_trash', {"date": "2025-01-01"}, None),
+    ('daily_trash', {}, [('date', ASCENDING)]),
+    ('daily_trash', {"date": {"$gte": "2025-01-01", "$lte": "2025-01-31"}}, None),
+    ('feedbacks', {"user_id": "user_id"}, None),
+    ('voucher_types', {"name": "name"}, None),
+    ('vouchers', {"voucher_code": "code"}, None),
+    ('vouchers', {"voucher_type_id": "voucher_type_id"}, None),
+    ('station_types', {"name": "name"}, None),
+    ('stations', {"name": "name"}, None),
+    ('stations', {"station_type": "station_type"}, None),
+    ('detection_configs', {}, [('version', DESCENDING)]),
+    ('detection_runtimes', {"expire_at": {"$gt": _SAMPLE_DAY}, "fixed_imgsz": {"$ne": None}}, None),
+    ('detection_runtimes', {"expire_at": {"$gt": _SAMPLE_DAY}}, [('_id', 1)]),
+    ('detection_events', {"ts": {"$gte": _SAMPLE_DAY, "$lt": _SAMPLE_DAY + timedelta(days=1)}}, None),
+    ('detection_events', {"meta.user_id": "user_id", "ts": {"$gte": _SAMPLE_DAY, "$lt": _SAMPLE_DAY + timedelta(days=1)}}, None),
+    ('detection_events', {"meta.station_id": "station_id", "ts": {"$gte": _SAMPLE_DAY, "$lt": _SAMPLE_DAY + timedelta(days=1)}}, None)
+]
+
+def _index_name(keys) -> str:
+    """與 pymongo 預設相同的索引名稱 (例如 chapter_1_sequence_1)"""
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+def _normalize_keys(keys) -> list:
+    return [(field, int(direction) if isinstance(direction, float) else direction) for field, direction in keys]
+
+def _options_match(info: dict, options: dict) -> bool:
+    return (
+        bool(info.get('unique', False)) == bool(options.get('unique', False))
+        and info.get('expireAfterSeconds') == options.get('expireAfterSeconds')
+    )
+
+def ensure_timeseries_collections(db: database.Database) -> list:
+    """建立 TIMESERIES_COLLECTIONS 中尚不存在的集合 (可重複執行)
+
+    MongoDB 5.0 以前 (或 mongomock) 不支援 time-series 時改用一般集合，查詢由 INDEXES 中的 ts 索引支援
+
+    Returns:
+        list: 本次建立的集合
+    """
+    existing = set(db.list_collection_names())
+    created = []
+
+    for collection_name, options in TIMESERIES_COLLECTIONS.items():
+        if collection_name in existing:
+            continue
+
+        kwargs = {'timeseries': options['timeseries']}
+        if options['retention_days'] > 0:
+            kwargs['expireAfterSeconds'] = options['retention_days'] * 86400
+
+        try:
+            db.create_collection(collection_name, **kwargs)
+            created.append(collection_name)
+        except (OperationFailure, NotImplementedError) as e:
+            logger.warning(f"Time-series collection {collection_name} not supported, using a regular collection: {str(e)}")
+
+    if created:
+        logger.info(f"Time-series collections created: {', '.join(created)}")
+
+    return created
+
+def ensure_indexes(db: database.Database, drop_extra: bool = False, apply: bool = True) -> dict:
+    """依 INDEXES 建立缺少的索引 (可重複執行)，回傳各集合的比對結果
+
+    已存在但選項不同 (例如缺少 unique) 的索引只回報為 conflicts，不會自動刪除重建；
+    unique 索引因資料重複而建立失敗時回報為 failed，不影響啟動
+
+    Args:
+        db: 資料庫
+        drop_extra: 是否刪除不在清單中的索引 (預設只回報)
+        apply: False 時只比對不建立 (check_indexes.py 使用)
+    """
+    report = {"created": [], "missing": [], "existing": [], "conflicts": [], "failed": [], "extra": [], "dropped": []}
+
+    if apply:
+        ensure_timeseries_collections(db)
+
+    for collection_name, indexes in INDEXES.items():
+        collection = db[collection_name]
+        current = {
+            name: {**info, "key": _normalize_keys(info["key"])}
+            for name, info in collection.index_information().items()
+        }
+        declared = set()
+
+        for index in indexes:
+            keys = index['keys']
+            options = index.get('options', {})
+            label = f"{collection_name}.{_index_name(keys)}"
+
+            found = next((name for name, info in current.items() if info["key"] == keys), None)
+            if found:
+                declared.add(found)
+                if _options_match(current[found], options):
+                    report["existing"].append(label)
+                else:
+                    report["conflicts"].append(label)
+                continue
+
+            if not apply:
+                report["missing"].append(label)
+                continue
+
+            try:
+                declared.add(collection.create_index(keys, **options))
+                report["created"].append(label)
+            except OperationFailure as e:
+                report["failed"].append(f"{label}: {str(e)}")
+
+        for name in current:
+            if name == '_id_' or name in declared:
+                continue
+
+            if drop_extra and apply:
+                collection.drop_index(name)
+                report["dropped"].append(f"{collection_name}.{name}")
+            else:
+                report["extra"].append(f"{collection_name}.{name}")
+
+    if report["created"]:
+        logger.info(f"Indexes created: {', '.join(report['created'])}")
+    if report["missing"]:
+        logger.warning(f"Indexes missing: {', '.join(report['missing'])}")
+    if report["conflicts"]:
+        logger.warning(f"Indexes with different options (rebuild manually): {', '.join(report['conflicts'])}")
+    if report["failed"]:
+        logger.error(f"Indexes failed: {'; '.join(report['failed'])}")
+    if report["extra"]:
+        logger.info(f"Indexes not in manifest: {', '.join(report['extra'])}")
+    if report["dropped"]:
+        logger.info(f"Indexes dropped: {', '.join(report['dropped'])}")
+
+    return report
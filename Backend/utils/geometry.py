@@ -0,0 +1,8 @@
+def box_iou(box1, box2) -> float:
+    """計算兩個 xyxy 框的 iou"""
+    inter_x1, inter_y1 = max(box1[0], box2[0]), max(box1[1], box2[1])
+    inter_x2, inter_y2 = min(box1[2], box2[2]), min(box1[3], box2[3])
+    inter_area = max(0, inter_x2 - inter_x1) * max(0, inter_y2 - inter_y1)
+    box1_area = (box1[2] - box1[0]) * (box1[3] - box1[1])
+    box2_area = (box2[2] - box2[0]) * (box2[3] - box2[1])
+    return inter_area / (box1_area + box2_area - inter_area + 1e-6)
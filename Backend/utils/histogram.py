@@ -0,0 +1,54 @@
+import bisect
+import threading
+from typing import Optional, Sequence
+
+class Histogram:
+    """固定區間的累計直方圖 (bucket 為上界，最後一個為 +inf)"""
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """以 bucket 上界估計分位數，落在最後一個區間時回傳 None (+inf)"""
+        with self.lock:
+            counts, count = list(self.counts), self.count
+
+        if count == 0:
+            return 0.0
+
+        target = q * count
+        cumulative = 0
+        for index, bucket_count in enumerate(counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return self.buckets[index] if index < len(self.buckets) else None
+
+        return None
+
+    def snapshot(self) -> tuple:
+        """(buckets, 各區間數量, 總數, 總和)，供 metrics 輸出累計 bucket"""
+        with self.lock:
+            return self.buckets, list(self.counts), self.count, self.sum
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            counts, count, total = list(self.counts), self.count, self.sum
+
+        return {
+            "buckets": [*self.buckets, "+inf"],
+            "counts": counts,
+            "count": count,
+            "mean": total / count if count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95)
+        }
@@ -1,6 +1,11 @@
 import logging
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import TimedRotatingFileHandler, QueueHandler, QueueListener
 import os
+import json
+import queue
+import random
+import atexit
+import threading
 from datetime import datetime
 import colorama
 from dotenv import load_dotenv
@@ -12,6 +17,14 @@ load_dotenv()
 # 初始化顏色支援
 colorama.init()
 
+# 佇列上限 (超過時丟棄新紀錄，不阻塞請求)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# 每批最多處理的紀錄數，每批只 flush 一次檔案
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "256"))
+# 佇列累積超過此數量時視為高負載，2xx 存取紀錄只保留 ACCESS_LOG_SAMPLE_RATE 的比例
+ACCESS_LOG_SAMPLE_QUEUE = int(os.getenv("ACCESS_LOG_SAMPLE_QUEUE", "1000"))
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1"))
+
 class ColorFormatter(logging.Formatter):
     colors = {
         'ERROR': colorama.Fore.RED,
@@ -23,14 +36,95 @@ class ColorFormatter(logging.Formatter):
 
     def format(self, record):
         # 自定義時間格式
-        record.timestamp = datetime.fromtimestamp(record.created).strftime("%b-%d-%Y %H:%M:%S")
-        
+        timestamp = datetime.fromtimestamp(record.created).strftime("%b-%d-%Y %H:%M:%S")
+
+        # 存取紀錄輸出為一行 JSON
+        access = getattr(record, 'access', None)
+        if access is not None:
+            return json.dumps({"time": timestamp, "level": record.levelname, "type": "access", **access}, ensure_ascii=False, default=str)
+
+        levelname = record.levelname
         # 如果是控制台輸出，添加顏色
         if hasattr(self, 'use_color') and self.use_color:
-            record.levelname = f"{self.colors.get(record.levelname, '')}{record.levelname}{colorama.Style.RESET_ALL}"
-        
-        return f"{record.levelname}: [{record.timestamp}]: {record.getMessage()}"
-    
+            levelname = f"{self.colors.get(levelname, '')}{levelname}{colorama.Style.RESET_ALL}"
+
+        message = f"{levelname}: [{timestamp}]: {record.getMessage()}"
+        if record.exc_text:
+            message = f"{message}\n{record.exc_text}"
+
+        return message
+
+class BatchedTimedRotatingFileHandler(TimedRotatingFileHandler):
+    """寫入後不立即 flush，由 BatchingQueueListener 在每批紀錄寫完後統一 flush"""
+    def emit(self, record):
+        self._batching = True
+        try:
+            super().emit(record)
+        finally:
+            self._batching = False
+
+    def flush(self):
+        if not getattr(self, '_batching', False):
+            super().flush()
+
+class DroppingQueueHandler(QueueHandler):
+    """佇列已滿時丟棄紀錄並計數 (請求不會因寫入日誌而阻塞)"""
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # 例外堆疊在請求端先轉為字串 (traceback 物件不能跨執行緒保存)
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class BatchingQueueListener(QueueListener):
+    """一次取出佇列中累積的紀錄 (最多 batch_size 筆) 交給各 handler，整批處理後才 flush"""
+    def __init__(self, log_queue, *handlers, batch_size: int = 256):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+
+    def _monitor(self):
+        while True:
+            batch = [self.dequeue(True)]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.dequeue(False))
+                except queue.Empty:
+                    break
+
+            stopped = False
+            for record in batch:
+                if record is self._sentinel:
+                    stopped = True
+                    continue
+                self.handle(record)
+
+            for handler in self.handlers:
+                handler.flush()
+
+            for _ in batch:
+                self.queue.task_done()
+
+            if stopped:
+                break
+
+    def restart(self):
+        """fork 後子程序沒有寫入執行緒，重新啟動"""
+        self._thread = None
+        self.start()
+
 def setup_logger():
     # 創建 logger
     logger = logging.getLogger('app')
@@ -45,7 +139,7 @@ def setup_logger():
     log_file = f"{log_path}/{current_time}.log"
 
     # 設置文件處理器
-    file_handler = TimedRotatingFileHandler(
+    file_handler = BatchedTimedRotatingFileHandler(
         filename=log_file,
         when="H",        # 每小時輪換
         interval=1,      # 間隔1小時
@@ -53,7 +147,7 @@ def setup_logger():
         encoding='utf-8',
         atTime=None     # 讓它在整點時轉換
     )
-    
+
     # 自定義文件命名格式
     def namer(default_name):
         """生成新的日誌檔名"""
@@ -68,22 +162,68 @@ def setup_logger():
     file_handler.namer = namer
     # 設定檔案後綴，這會決定輪換檔案的時間戳格式
     file_handler.suffix = "%Y-%m-%d-%H"
-    
+
     # 設定格式化器
     file_handler.setFormatter(ColorFormatter())
     file_handler.setLevel(logging.DEBUG)
 
-    # 添加處理器到 logger
-    logger.addHandler(file_handler)
-
     # 設置控制台處理器
     console_handler = logging.StreamHandler()
     console_formatter = ColorFormatter()
     console_formatter.use_color = True
     console_handler.setFormatter(console_formatter)
     console_handler.setLevel(logging.DEBUG)
-    logger.addHandler(console_handler)
 
-    return logger
+    # 請求端只把紀錄放入佇列，格式化與檔案 / 控制台輸出都在 listener 執行緒
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    queue_handler = DroppingQueueHandler(log_queue)
+    logger.addHandler(queue_handler)
+
+    listener = BatchingQueueListener(log_queue, file_handler, console_handler, batch_size=LOG_BATCH_SIZE)
+    listener.start()
+    atexit.register(listener.stop) # 結束前寫完佇列中的紀錄
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=listener.restart)
+
+    return logger, queue_handler, listener
+
+logger, queue_handler, log_listener = setup_logger()
 
-logger = setup_logger()
\ No newline at end of file
+_sample_lock = threading.Lock()
+_access_stats = {"logged": 0, "sampled_out": 0}
+
+def log_access(status: int, **fields):
+    """記錄一筆存取紀錄 (JSON)，高負載時依 ACCESS_LOG_SAMPLE_RATE 抽樣 2xx 紀錄
+
+    Args:
+        status: HTTP 狀態碼
+        fields: method / route / path / latency_us / user_id / db_commands 等欄位
+    """
+    sample_rate = 1.0
+    if 200 <= status < 300 and ACCESS_LOG_SAMPLE_RATE < 1 and queue_handler.queue.qsize() >= ACCESS_LOG_SAMPLE_QUEUE:
+        sample_rate = ACCESS_LOG_SAMPLE_RATE
+        if random.random() >= sample_rate:
+            with _sample_lock:
+                _access_stats["sampled_out"] += 1
+            return
+
+    with _sample_lock:
+        _access_stats["logged"] += 1
+
+    access = {**fields, "status": status}
+    if sample_rate < 1:
+        access["sample_rate"] = sample_rate
+
+    logger.info("access", extra={"access": access})
+
+def get_log_stats() -> dict:
+    """日誌佇列長度、因佇列已滿而丟棄及抽樣略過的紀錄數"""
+    with _sample_lock:
+        access = dict(_access_stats)
+
+    return {
+        "queue": queue_handler.queue.qsize(),
+        "queue_size": LOG_QUEUE_SIZE,
+        "dropped": queue_handler.dropped,
+        "access": access
+    }
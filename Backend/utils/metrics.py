@@ -0,0 +1,179 @@
+import math
+import threading
+from typing import Callable, Sequence
+from .histogram import Histogram
+from .token import token_cache
+from .logger_config import get_log_stats
+
+# 請求 / socket 事件耗時的 bucket 上界 (秒)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+def _number(value) -> str:
+    if value is None:
+        return "NaN"
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+
+    return repr(value) if isinstance(value, float) else str(value)
+
+class Counter:
+    """依 label 值分開累計的計數器"""
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {} # label 值 -> 累計值
+        self.lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount: float = 1):
+        with self.lock:
+            self.values[labelvalues] = self.values.get(labelvalues, 0) + amount
+
+    def collect(self) -> tuple:
+        with self.lock:
+            values = dict(self.values)
+
+        return self.name, 'counter', self.help, [
+            (dict(zip(self.labelnames, labelvalues)), value) for labelvalues, value in values.items()
+        ]
+
+class HistogramFamily:
+    """依 label 值分開的固定區間直方圖 (每組 label 一個 Histogram)"""
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.histograms = {} # label 值 -> Histogram
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues):
+        histogram = self.histograms.get(labelvalues)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(labelvalues, Histogram(self.buckets))
+
+        histogram.observe(value)
+
+    def collect(self) -> tuple:
+        with self.lock:
+            histograms = dict(self.histograms)
+
+        return self.name, 'histogram', self.help, [
+            (dict(zip(self.labelnames, labelvalues)), histogram) for labelvalues, histogram in histograms.items()
+        ]
+
+class MetricsRegistry:
+    """程序內的 metrics，以 Prometheus text format 輸出
+
+    counter / histogram 在事件發生時就累計到固定的 bucket，
+    collector 則在輸出時讀取其他模組已經統計好的資料 (連線池、辨識延遲等)，輸出時不需彙整原始樣本
+    """
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+        self.lock = threading.Lock()
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        counter = Counter(name, help, labelnames)
+        with self.lock:
+            self.metrics.append(counter)
+        return counter
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> HistogramFamily:
+        histogram = HistogramFamily(name, help, labelnames, buckets)
+        with self.lock:
+            self.metrics.append(histogram)
+        return histogram
+
+    def register_collector(self, collector: Callable[[], list]):
+        """collector() 回傳 [(name, type, help, [(labels, value)])]，histogram 的 value 為 Histogram (可加上第 5 個元素 scale 換算單位)"""
+        with self.lock:
+            self.collectors.append(collector)
+
+    def unregister_collector(self, collector: Callable[[], list]):
+        with self.lock:
+            if collector in self.collectors:
+                self.collectors.remove(collector)
+
+    def render(self) -> str:
+        with self.lock:
+            metrics, collectors = list(self.metrics), list(self.collectors)
+
+        families = [metric.collect() for metric in metrics]
+        for collector in collectors:
+            try:
+                families.extend(collector())
+            except Exception as e:
+                print(f"Metrics collector error: {str(e)}")
+
+        lines = []
+        for family in families:
+            name, metric_type, help, samples = family[:4]
+            scale = family[4] if len(family) > 4 else 1
+
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                if metric_type == 'histogram':
+                    lines.extend(self._render_histogram(name, labels, value, scale))
+                else:
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_histogram(name: str, labels: dict, histogram: Histogram, scale: float) -> list:
+        buckets, counts, count, total = histogram.snapshot()
+        lines = []
+        cumulative = 0
+        for bucket, bucket_count in zip(buckets, counts):
+            cumulative += bucket_count
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': _number(bucket * scale)})} {cumulative}")
+
+        lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {count}")
+        lines.append(f"{name}_sum{_labels(labels)} {_number(total * scale)}")
+        lines.append(f"{name}_count{_labels(labels)} {count}")
+        return lines
+
+metrics = MetricsRegistry()
+
+http_requests_total = metrics.counter(
+    'http_requests_total', "REST requests by route template and status", ('method', 'route', 'status')
+)
+http_request_duration_seconds = metrics.histogram(
+    'http_request_duration_seconds', "REST request latency by route template and status", ('method', 'route', 'status')
+)
+socket_events_total = metrics.counter(
+    'socket_events_total', "Socket events by event name and outcome", ('event', 'outcome')
+)
+socket_event_duration_seconds = metrics.histogram(
+    'socket_event_duration_seconds', "Socket event handler latency", ('event',)
+)
+
+def _utils_metrics() -> list:
+    tokens = token_cache.get_stats()
+    logs = get_log_stats()
+
+    return [
+        ('jwt_cache_hits_total', 'counter', "Verified JWT cache hits", [({}, tokens["hits"])]),
+        ('jwt_cache_misses_total', 'counter', "Verified JWT cache misses", [({}, tokens["misses"])]),
+        ('log_queue_depth', 'gauge', "Log records waiting to be written", [({}, logs["queue"])]),
+        ('log_records_dropped_total', 'counter', "Log records dropped because the queue was full", [({}, logs["dropped"])]),
+        ('access_log_sampled_out_total', 'counter', "2xx access records skipped by sampling", [({}, logs["access"]["sampled_out"])])
+    ]
+
+metrics.register_collector(_utils_metrics)
+
+def render_metrics() -> str:
+    return metrics.render()
@@ -0,0 +1,63 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+
+# bcrypt cost (2^rounds 次運算)，調高後舊的雜湊會在使用者下次登入時重新計算
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# 同時計算雜湊的執行緒數量
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+
+_executor = None
+_executor_lock = threading.Lock()
+_gevent_pools = threading.local() # 每個 gevent hub 各自的 ThreadPool
+
+def _gevent_pool():
+    """目前在 gevent greenlet 中時回傳此 hub 的 ThreadPool (等待結果時 hub 可繼續處理其他請求)"""
+    try:
+        import gevent
+        from gevent.threadpool import ThreadPool
+    except ImportError:
+        return None
+
+    if not isinstance(gevent.getcurrent(), gevent.Greenlet):
+        return None
+
+    pool = getattr(_gevent_pools, 'pool', None)
+    if pool is None:
+        pool = _gevent_pools.pool = ThreadPool(PASSWORD_HASH_WORKERS)
+    return pool
+
+def _run(func, *args):
+    """在專用執行緒計算 bcrypt (bcrypt 計算時會釋放 GIL)，呼叫端等待結果"""
+    pool = _gevent_pool()
+    if pool is not None:
+        return pool.apply(func, args)
+
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(PASSWORD_HASH_WORKERS, thread_name_prefix='password')
+
+    return _executor.submit(func, *args).result()
+
+def _hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+def _check(password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+def hash_password(password: str, rounds: int = None) -> str:
+    """以 BCRYPT_ROUNDS 計算密碼雜湊"""
+    return _run(_hash, password, rounds or BCRYPT_ROUNDS)
+
+def check_password(password: str, hashed_password: str) -> bool:
+    return _run(_check, password, hashed_password)
+
+def needs_rehash(hashed_password: str) -> bool:
+    """雜湊的 cost 與 BCRYPT_ROUNDS 不同時需要重新計算 ($2b$12$...)"""
+    try:
+        return int(hashed_password.split('$')[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
@@ -0,0 +1,153 @@
+import math
+import threading
+import time
+from typing import NamedTuple, Optional
+from pymongo import ReturnDocument
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: float # 桶子補滿所需秒數
+    retry_after: float # 被拒絕時需等待的秒數
+
+class MemoryBucketStore:
+    """單一程序內的 token bucket 儲存 (可由多個容量 / 補充速度不同的 RateLimiter 共用)"""
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        self.buckets = {} # key -> (tokens, updated_at, 補滿所需秒數)
+        self.lock = threading.Lock()
+
+    def take(self, key: str, capacity: int, refill_rate: float, cost: int = 1):
+        """扣除 token，回傳 (是否允許, 剩餘 token)"""
+        now = time.monotonic()
+
+        with self.lock:
+            tokens, updated_at, _ = self.buckets.get(key, (capacity, now, 0))
+            tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+
+            full_after = (capacity - tokens) / refill_rate if refill_rate > 0 else math.inf
+            self.buckets[key] = (tokens, now, full_after)
+
+            if len(self.buckets) > self.max_entries:
+                self._prune(now)
+
+            return allowed, tokens
+
+    def _prune(self, now: float):
+        """移除已經補滿的桶子 (補滿的桶子與不存在等價)
+
+        每個桶子依自己的容量與補充速度判斷，共用同一個 store 的其他限制器的桶子不會被提早移除
+        """
+        stale_keys = [
+            key for key, (_, updated_at, full_after) in self.buckets.items()
+            if now - updated_at >= full_after
+        ]
+        for key in stale_keys:
+            del self.buckets[key]
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+class MongoBucketStore:
+    """以 MongoDB 共享的 token bucket 儲存 (多節點部署使用)
+
+    使用 pipeline update 在單一 round trip 內完成補充與扣除，確保原子性
+    """
+    def __init__(self, collection):
+        self.collection = collection
+        self.collection.create_index("expire_at", expireAfterSeconds=0)
+
+    def take(self, key: str, capacity: int, refill_rate: float, cost: int = 1):
+        now = time.time()
+        idle_ttl = capacity / refill_rate if refill_rate > 0 else 86400
+
+        pipeline = [
+            {"$set": {
+                "tokens": {"$min": [
+                    capacity,
+                    {"$add": [
+                        {"$ifNull": ["$tokens", capacity]},
+                        {"$multiply": [
+                            {"$max": [0, {"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}]},
+                            refill_rate
+                        ]}
+                    ]}
+                ]},
+                "updated_at": now,
+            }},
+            {"$set": {"allowed": {"$gte": ["$tokens", cost]}}},
+            {"$set": {
+                "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", cost]}, "$tokens"]},
+                "expire_at": {"$add": ["$$NOW", int(idle_ttl * 1000)]},
+            }},
+        ]
+
+        bucket = self.collection.find_one_and_update(
+            {"_id": key},
+            pipeline,
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+        return bucket["allowed"], bucket["tokens"]
+
+    def clear(self):
+        self.collection.delete_many({})
+
+class RateLimiter:
+    def __init__(self, store, capacity: int, refill_rate: float, prefix: str = "rl"):
+        """
+        Args:
+            store: MemoryBucketStore 或 MongoBucketStore
+            capacity: 桶子容量 (允許的瞬間請求數)
+            refill_rate: 每秒補充的 token 數
+            prefix: key 前綴，用於區分不同的限制器
+        """
+        self.store = store
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.prefix = prefix
+
+    def consume(self, key: str, cost: int = 1) -> RateLimitResult:
+        allowed, tokens = self.store.take(f"{self.prefix}:{key}", self.capacity, self.refill_rate, cost)
+
+        if self.refill_rate > 0:
+            reset = (self.capacity - tokens) / self.refill_rate
+            retry_after = 0 if allowed else (cost - tokens) / self.refill_rate
+        else:
+            reset = retry_after = 0 if allowed else math.inf
+
+        return RateLimitResult(
+            allowed=allowed,
+            limit=self.capacity,
+            remaining=max(0, int(tokens)),
+            reset=reset,
+            retry_after=retry_after
+        )
+
+def most_restrictive(results: list[Optional[RateLimitResult]]) -> RateLimitResult:
+    """從多個限制結果中選出最嚴格的一個 (用於回應 header)"""
+    results = [result for result in results if result is not None]
+    denied = [result for result in results if not result.allowed]
+    if denied:
+        return max(denied, key=lambda result: result.retry_after)
+
+    return min(results, key=lambda result: result.remaining)
+
+def rate_limit_headers(result: RateLimitResult) -> dict:
+    headers = {
+        "X-RateLimit-Limit": str(result.limit),
+        "X-RateLimit-Remaining": str(result.remaining),
+        "X-RateLimit-Reset": str(math.ceil(result.reset)),
+    }
+
+    if not result.allowed:
+        headers["Retry-After"] = str(max(1, math.ceil(result.retry_after)))
+
+    return headers
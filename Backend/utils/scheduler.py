@@ -22,12 +22,35 @@ class Scheduler:
                 logger.warning("Failed to create daily trash table")
         except Exception as e:
             logger.error(f"Create daily trash table error: {str(e)}")
+            
+    def build_month_rollups_job(self):
+        """建立已結束月份的每日垃圾統計彙總"""
+        try:
+            months = self.daily_trash_serivce.build_month_rollups()
+            logger.info(f"Daily trash month rollups up to date ({months} closed months)")
+        except Exception as e:
+            logger.error(f"Build daily trash month rollups error: {str(e)}")
+            
+    def reconcile_trash_totals_job(self):
+        """以使用者的 trash_stats 核對全體垃圾統計"""
+        try:
+            result = self.daily_trash_serivce.reconcile_trash_totals(repair=Config.TRASH_TOTALS_AUTO_REPAIR)
+            
+            if result["drift"]:
+                logger.warning(f"Trash totals drift: {result['drift']} (repaired: {result['repaired']})")
+            
+            else:
+                logger.info("Trash totals reconciled, no drift")
+        except Exception as e:
+            logger.error(f"Reconcile trash totals error: {str(e)}")
                 
     def start_scheduler(self):
         if self.is_running:
             return
         
         schedule.every().day.at("00:00").do(self.create_daily_trash_job)
+        schedule.every().day.at(Config.TRASH_TOTALS_RECONCILE_AT).do(self.reconcile_trash_totals_job)
+        schedule.every().day.at("00:30").do(self.build_month_rollups_job)
         
         self.is_running = True
         
@@ -36,6 +59,9 @@ class Scheduler:
                 schedule.run_pending()
                 time.sleep(60) # 每分鐘檢查一次時間
                 
+        # 啟動時先核對一次 (既有資料尚未建立 trash_totals 時由此補上)
+        threading.Thread(target=self.reconcile_trash_totals_job, daemon=True).start()
+        
         scheduler_thread = threading.Thread(target=run, daemon=True)
         scheduler_thread.start()
         
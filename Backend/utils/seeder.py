@@ -1,6 +1,6 @@
 import os
-import bcrypt
 from utils import logger
+from .password import hash_password
 from models import User 
 from pymongo import database
 
@@ -9,9 +9,7 @@ def init_default_data(db: database.Database):
     
     if users_col.count_documents({"userRole": "admin"}) == 0:
         password_plain = os.getenv("DEFAULT_ADMIN_PASSWORD")
-        password_bytes = password_plain.encode('utf-8')
-        hashed_bytes = bcrypt.hashpw(password_bytes, bcrypt.gensalt(rounds=12))
-        hashed_password = hashed_bytes.decode('utf-8')
+        hashed_password = hash_password(password_plain)
         
         admin_user = User(
             userRole="admin",
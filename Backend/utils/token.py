@@ -1,10 +1,85 @@
 import os
 import jwt
+import time
+import hashlib
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
 def get_secret_key():
     return os.getenv("SECRET_KEY")
 
+class VerifiedTokenCache:
+    """已驗證 JWT 的 LRU 快取 (每個程序各自一份)
+
+    以 token 的 sha256 為 key (不在記憶體保存 token 原文)，保存解碼後的 claims 與 exp；
+    只快取驗證成功的 token，超過 exp 的項目在讀取時刪除，SECRET_KEY 變更時整個清空
+    """
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self.entries = OrderedDict() # digest -> (exp, claims)
+        self.secret_key = None
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str, secret_key: str):
+        """回傳 (digest, claims)，未命中時 claims 為 None"""
+        digest = hashlib.sha256(token.encode('utf-8')).digest()
+
+        with self.lock:
+            if secret_key != self.secret_key:
+                self.entries.clear()
+                self.secret_key = secret_key
+
+            entry = self.entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return digest, None
+
+            exp, claims = entry
+            if exp is not None and exp <= time.time():
+                del self.entries[digest]
+                self.misses += 1
+                return digest, None
+
+            self.entries.move_to_end(digest)
+            self.hits += 1
+            return digest, claims
+
+    def put(self, digest: bytes, claims: dict, secret_key: str):
+        if self.max_size <= 0:
+            return
+
+        with self.lock:
+            if secret_key != self.secret_key:
+                return
+
+            self.entries[digest] = (claims.get('exp'), claims)
+            self.entries.move_to_end(digest)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            hits, misses, size = self.hits, self.misses, len(self.entries)
+
+        lookups = hits + misses
+        return {
+            "max_size": self.max_size,
+            "size": size,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+        }
+
+token_cache = VerifiedTokenCache(int(os.getenv("JWT_CACHE_SIZE", "4096")))
+
 def generate_token(user_id, userRole):
     try:
         payload = {
@@ -17,10 +92,30 @@ def generate_token(user_id, userRole):
         print(f"Error generating token: {str(e)}")
         return None
 
-def verify_token(token):
+def verify_token(token, use_cache: bool = True):
+    """驗證 JWT，回傳 claims (失敗或過期時為 None)
+
+    同一個 token 在有效期間內重複驗證時直接回傳快取的 claims，不再重新計算 HS256 簽章
+    """
+    secret_key = get_secret_key()
+    use_cache = use_cache and isinstance(token, str)
+    if use_cache:
+        digest, claims = token_cache.get(token, secret_key)
+        if claims is not None:
+            return dict(claims)
+
     try:
-        return jwt.decode(token, get_secret_key(), algorithms=['HS256'])
+        claims = jwt.decode(token, secret_key, algorithms=['HS256'])
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
-        return None
\ No newline at end of file
+        return None
+
+    if use_cache:
+        token_cache.put(digest, claims, secret_key)
+
+    return dict(claims)
+
+def get_token_cache_stats() -> dict:
+    """已驗證 JWT 快取的命中率"""
+    return token_cache.get_stats()